@@ -0,0 +1,321 @@
+"""Benchmarks the clients against a local server serving recorded payloads
+
+Every endpoint is called in turn by a pool of workers at each concurrency level
+and the throughput, latency percentiles, traced allocations and peak RSS are
+reported. Each client is benchmarked in its own process so the RSS reported is
+its own. Results may be saved and compared against a previous run, the script
+exits with status 1 when throughput or p99 latency regress beyond the tolerance.
+
+Usage:
+    python benchmarks/clients.py [--clients sync async aio] [--concurrency 1 8 32]
+        [--requests N] [--endpoints ticker orderbook ...] [--save PATH]
+        [--compare PATH] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from concurrent.futures import ThreadPoolExecutor
+from luno.instrumentation import Histogram
+from luno.testing.server import PayloadServer
+
+CALLS = {
+    "ticker": lambda c: c.ticker("XBTZAR"),
+    "tickers": lambda c: c.tickers(),
+    "orderbook": lambda c: c.order_book("XBTZAR"),
+    "trades": lambda c: c.trades("XBTZAR"),
+    "accounts": lambda c: c.accounts("XBT", "Trading"),
+    "balance": lambda c: c.balance(),
+    "transactions": lambda c: c.transactions(1000, 1, 101),
+    "listorders": lambda c: c.list_orders(),
+    "postorder": lambda c: c.post_limit_order("XBTZAR", "BID", "0.01", "100000"),
+    "marketorder": lambda c: c.post_market_order("XBTZAR", "BUY", counter_volume="10"),
+    "stoporder": lambda c: c.cancel_order("BXMC2CJ7HNB88U4"),
+    "orders": lambda c: c.get_order("BXMC2CJ7HNB88U4"),
+    "listtrades": lambda c: c.list_trades("XBTZAR"),
+    "fee_info": lambda c: c.fee_info("XBTZAR"),
+    "receive_addresses": lambda c: c.receive_addresses("XBT"),
+    "create_receive_address": lambda c: c.create_receive_address("XBT"),
+    "withdrawals": lambda c: c.withdrawals(),
+    "create_withdrawal": lambda c: c.create_withdrawal_request("ZAR_EFT", "1000"),
+    "withdrawal_status": lambda c: c.withdrawal_request_status(1139),
+    "cancel_withdrawal": lambda c: c.cancel_withdrawal_request(1139),
+    "send": lambda c: c.send("0.1", "XBT", "E9Cmm5wnt5BQbN6BNqPoLJpgjeRyaWKhRT"),
+    "create_quote": lambda c: c.create_quote("BUY", "0.1", "XBTZAR"),
+    "get_quote": lambda c: c.get_quote(1324),
+    "exercise_quote": lambda c: c.exercise_quote(1324),
+    "discard_quote": lambda c: c.discard_quote(1324),
+}
+
+
+class Run:
+    """The measurements of a pass over the endpoints"""
+
+    def __init__(self, calls: list, requests: int) -> None:
+        self.calls = calls
+        self.requests = requests
+        self.jobs = iter(range(requests))
+        self.latency = Histogram()
+        self.errors = 0
+        self.seconds = 0.0
+        self.allocated = 0
+
+    def call(self, index: int):
+        return self.calls[index % len(self.calls)]
+
+    def record(self, start: float, failed: bool = False) -> None:
+        self.latency.record(time.perf_counter() - start)
+        self.errors += failed
+
+
+def traced(drive, calls: list) -> int:
+    """Returns the peak memory traced while calling every endpoint once"""
+    tracemalloc.start()
+    try:
+        drive(Run(calls, len(calls)), 1)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_sync(uri: str, calls: list, requests: int, concurrency: int) -> Run:
+    from luno.clients.sync import LunoSyncClient
+
+    client = LunoSyncClient("key", "secret", pool_maxsize=concurrency, base_uri=uri)
+
+    def drive(run: Run, concurrency: int) -> None:
+        def job(index: int) -> None:
+            start = time.perf_counter()
+            try:
+                run.call(index)(client)
+            except Exception:
+                return run.record(start, failed=True)
+
+            run.record(start)
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(job, run.jobs))
+
+    allocated = traced(drive, calls)
+
+    run = Run(calls, requests)
+    start = time.perf_counter()
+    drive(run, concurrency)
+    run.seconds = time.perf_counter() - start
+    run.allocated = allocated
+
+    client.session.close()
+    return run
+
+
+def run_async(uri: str, calls: list, requests: int, concurrency: int) -> Run:
+    """Benchmarks the twisted client, the reactor can only be run once per process"""
+    from luno.clients.asynchronous import LunoAsyncClient
+    from twisted.internet import reactor
+    from twisted.internet.defer import ensureDeferred
+    from twisted.internet.defer import gatherResults
+
+    client = LunoAsyncClient(
+        "key", "secret", max_persistent_per_host=concurrency, base_uri=uri
+    )
+    run = Run(calls, requests)
+
+    async def worker(run: Run) -> None:
+        for index in run.jobs:
+            start = time.perf_counter()
+            try:
+                await run.call(index)(client)
+            except Exception:
+                run.record(start, failed=True)
+                continue
+
+            run.record(start)
+
+    async def drive(run: Run, concurrency: int) -> None:
+        workers = [ensureDeferred(worker(run)) for _ in range(concurrency)]
+        await gatherResults(workers)
+
+    async def main() -> None:
+        try:
+            tracemalloc.start()
+            await drive(Run(calls, len(calls)), 1)
+            run.allocated = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            start = time.perf_counter()
+            await drive(run, concurrency)
+            run.seconds = time.perf_counter() - start
+        finally:
+            await client.close()
+
+    done = ensureDeferred(main())
+    done.addErrback(lambda failure: failure.printTraceback())
+    done.addBoth(lambda _: reactor.stop())
+    reactor.run()
+    return run
+
+
+def run_aio(uri: str, calls: list, requests: int, concurrency: int) -> Run:
+    import asyncio
+    from luno.clients.aio import LunoAsyncioClient
+
+    run = Run(calls, requests)
+
+    async def worker(client, run: Run) -> None:
+        for index in run.jobs:
+            start = time.perf_counter()
+            try:
+                await run.call(index)(client)
+            except Exception:
+                run.record(start, failed=True)
+                continue
+
+            run.record(start)
+
+    async def drive(client, run: Run, concurrency: int) -> None:
+        await asyncio.gather(*[worker(client, run) for _ in range(concurrency)])
+
+    async def main() -> None:
+        client = LunoAsyncioClient("key", "secret", limit=concurrency, base_uri=uri)
+        async with client:
+            tracemalloc.start()
+            await drive(client, Run(calls, len(calls)), 1)
+            run.allocated = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            start = time.perf_counter()
+            await drive(client, run, concurrency)
+            run.seconds = time.perf_counter() - start
+
+    asyncio.run(main())
+    return run
+
+
+RUNNERS = {"sync": run_sync, "async": run_async, "aio": run_aio}
+
+
+def peak_rss_mib() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kibibytes elsewhere
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def benchmark(client: str, args: argparse.Namespace) -> list:
+    """Benchmarks a client at each concurrency level"""
+    calls = [CALLS[name] for name in args.endpoints]
+    results = []
+
+    with PayloadServer() as server:
+        for concurrency in args.concurrency:
+            run = RUNNERS[client](server.uri, calls, args.requests, concurrency)
+            results.append(
+                {
+                    "client": client,
+                    "concurrency": concurrency,
+                    "requests": run.requests,
+                    "errors": run.errors,
+                    "rps": run.requests / run.seconds,
+                    "p50": run.latency.percentile(0.5),
+                    "p99": run.latency.percentile(0.99),
+                    "alloc_kib": run.allocated / 2**10,
+                    "rss_mib": peak_rss_mib(),
+                }
+            )
+
+    return results
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """Returns a description of every result which regressed against the baseline"""
+    previous = {(r["client"], r["concurrency"]): r for r in baseline}
+    regressions = []
+
+    for result in results:
+        base = previous.get((result["client"], result["concurrency"]))
+        if base is None:
+            continue
+
+        name = f"{result['client']} x{result['concurrency']}"
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {base['rps']:.0f} -> {result['rps']:.0f} rps")
+
+        if result["p99"] > base["p99"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p99 {base['p99'] * 1e3:.2f} -> {result['p99'] * 1e3:.2f}ms"
+            )
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", nargs="+", default=list(RUNNERS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--endpoints", nargs="+", default=list(CALLS))
+    parser.add_argument("--save")
+    parser.add_argument("--compare")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(benchmark(args.child, args)))
+        return
+
+    results = []
+    for client in args.clients:
+        # the twisted reactor runs once per process, so the async client is
+        # benchmarked in a process per concurrency level
+        levels = (
+            [[c] for c in args.concurrency] if client == "async" else [args.concurrency]
+        )
+        for concurrency in levels:
+            command = [
+                sys.executable,
+                __file__,
+                "--child",
+                client,
+                "--requests",
+                str(args.requests),
+                "--concurrency",
+                *map(str, concurrency),
+                "--endpoints",
+                *args.endpoints,
+            ]
+            output = subprocess.run(command, check=True, capture_output=True, text=True)
+            results.extend(json.loads(output.stdout))
+
+    print(
+        f"{'client':<8}{'conc':>6}{'requests':>10}{'errors':>8}{'rps':>10}"
+        f"{'p50 ms':>10}{'p99 ms':>10}{'alloc KiB':>11}{'rss MiB':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['client']:<8}{r['concurrency']:>6}{r['requests']:>10}{r['errors']:>8}"
+            f"{r['rps']:>10.0f}{r['p50'] * 1e3:>10.2f}{r['p99'] * 1e3:>10.2f}"
+            f"{r['alloc_kib']:>11.0f}{r['rss_mib']:>9.1f}"
+        )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+        for regression in regressions:
+            print(f"regression {regression}")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
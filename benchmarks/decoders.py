@@ -0,0 +1,45 @@
+"""Compares the json decoders available to the clients on recorded payloads
+
+Usage:
+    python benchmarks/decoders.py [--number N]
+"""
+import argparse
+import json
+import timeit
+
+from luno.decoders import DECODERS
+from luno.testing import payloads
+
+PAYLOADS = {
+    "ticker": payloads.ticker(),
+    "tickers": payloads.tickers(),
+    "orderbook": payloads.order_book(levels=1000),
+    "trades": payloads.trades(),
+    "transactions": payloads.transactions(),
+    "listorders": payloads.orders(),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'payload':<14}{'bytes':>10}" + "".join(f"{n:>12}" for n in DECODERS))
+
+    for name, payload in PAYLOADS.items():
+        body = json.dumps(payload).encode()
+        row = f"{name:<14}{len(body):>10}"
+
+        for decoder in DECODERS.values():
+            assert decoder(body) == payload
+            seconds = min(
+                timeit.repeat(lambda: decoder(body), number=args.number, repeat=5)
+            )
+            row += f"{seconds / args.number * 1e6:>10.1f}us"
+
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import threading
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+
+
+def index_tickers(response: Dict) -> Dict[str, Dict]:
+    """Indexes the response of tickers() by currency pair
+
+    Args:
+        response: A python dict as returned by tickers()
+
+    Returns:
+        A python dict mapping each pair to its ticker
+    """
+    return {ticker["pair"]: ticker for ticker in response.get("tickers") or []}
+
+
+class TickerBatcher:
+    """Collects ticker() calls made within a short window into a single tickers() request
+
+    The first call to join a batch becomes its leader, it waits for the window to
+    pass, closes the batch and fetches tickers() once for every caller in it.
+    Pairs missing from the tickers() response fall back to a ticker() request.
+    The object the callers wait on is created by the client so the batcher may be
+    used by the sync, async and asyncio clients.
+
+    Args:
+        window: Seconds the leader of a batch waits for other callers
+    """
+
+    def __init__(self, window: float = 0.05) -> None:
+        self.window = window
+        self.requests = 0
+        self.batches = 0
+        self._current = None
+        self._lock = threading.Lock()
+
+    def join(self, waiter: Callable[[], Any]) -> Tuple[bool, Any]:
+        """Joins the open batch, starting a new batch if none is open
+
+        Args:
+            waiter: Creates the object used to wait on the batch, e.g. a future
+
+        Returns:
+            A tuple of (leader, batch) where leader is True if the caller started the batch
+        """
+        with self._lock:
+            self.requests += 1
+
+            if self._current is None:
+                self._current = waiter()
+                self.batches += 1
+                return True, self._current
+
+            return False, self._current
+
+    def close(self, batch: Any) -> None:
+        """Stops callers from joining a batch, called by the leader before fetching tickers()"""
+        with self._lock:
+            if self._current is batch:
+                self._current = None
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of ticker requests and tickers() batches"""
+        with self._lock:
+            return {"requests": self.requests, "batches": self.batches}
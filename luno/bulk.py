@@ -0,0 +1,314 @@
+import threading
+import time
+
+from decimal import Decimal
+
+from luno.ratelimit import TokenBucket
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+
+class LimitOrder:
+    """The arguments of a post_limit_order() call
+
+    Args:
+        pair: The currency pair to trade e.g. XBTZAR
+        kind: "BID" for a bid (buy) limit order or "ASK" for an ask (sell) limit order
+        volume: The amount to buy or sell as a decimal string e.g. "1.423"
+        price: The limit price as a decimal string e.g. "1200"
+        base_account_id: The base currency account to use in the trade
+        counter_account_id: The counter currency account to use in the trade
+    """
+
+    __slots__ = (
+        "pair",
+        "kind",
+        "volume",
+        "price",
+        "base_account_id",
+        "counter_account_id",
+    )
+
+    method = "post_limit_order"
+
+    def __init__(
+        self,
+        pair: str,
+        kind: str,
+        volume: str,
+        price: str,
+        base_account_id: str = None,
+        counter_account_id: str = None,
+    ) -> None:
+        self.pair = pair
+        self.kind = kind
+        self.volume = volume
+        self.price = price
+        self.base_account_id = base_account_id
+        self.counter_account_id = counter_account_id
+
+    def kwargs(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"<LimitOrder {self.kind} {self.volume} {self.pair} @ {self.price}>"
+
+
+class MarketOrder:
+    """The arguments of a post_market_order() call
+
+    Args:
+        pair: The currency pair to trade e.g. XBTZAR
+        kind: "BUY" or "SELL"
+        counter_volume: The amount of counter currency to spend, required to buy
+        base_volume: The amount of base currency to sell, required to sell
+        base_account_id: The base currency account to use in the trade
+        counter_account_id: The counter currency account to use in the trade
+    """
+
+    __slots__ = (
+        "pair",
+        "kind",
+        "counter_volume",
+        "base_volume",
+        "base_account_id",
+        "counter_account_id",
+    )
+
+    method = "post_market_order"
+
+    def __init__(
+        self,
+        pair: str,
+        kind: str,
+        counter_volume: str = None,
+        base_volume: str = None,
+        base_account_id: str = None,
+        counter_account_id: str = None,
+    ) -> None:
+        self.pair = pair
+        self.kind = kind
+        self.counter_volume = counter_volume
+        self.base_volume = base_volume
+        self.base_account_id = base_account_id
+        self.counter_account_id = counter_account_id
+
+    def kwargs(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        volume = self.counter_volume if self.kind == "BUY" else self.base_volume
+        return f"<MarketOrder {self.kind} {volume} {self.pair}>"
+
+
+OrderSpec = Union[LimitOrder, MarketOrder, Dict]
+
+
+def as_order(spec: OrderSpec) -> Union[LimitOrder, MarketOrder]:
+    """Returns the order described by a spec
+
+    Args:
+        spec: An order, or a dict of post_limit_order() arguments or of post_market_order() arguments when it has a counter_volume or base_volume
+    """
+    if isinstance(spec, (LimitOrder, MarketOrder)):
+        return spec
+
+    if "counter_volume" in spec or "base_volume" in spec:
+        return MarketOrder(**spec)
+
+    return LimitOrder(**spec)
+
+
+class OrderFilter:
+    """Selects open orders by pair, side and limit price
+
+    Args:
+        pair: Only orders in this currency pair e.g. XBTZAR
+        side: Only "BID" or only "ASK" orders
+        min_price: Only orders with a limit price at or above this price
+        max_price: Only orders with a limit price at or below this price
+    """
+
+    __slots__ = ("pair", "side", "min_price", "max_price")
+
+    def __init__(
+        self,
+        pair: str = None,
+        side: str = None,
+        min_price: Union[str, Decimal] = None,
+        max_price: Union[str, Decimal] = None,
+    ) -> None:
+        if side not in (None, "BID", "ASK"):
+            raise ValueError(f"side must be BID or ASK, received {side!r}")
+
+        self.pair = pair
+        self.side = side
+        self.min_price = None if min_price is None else Decimal(str(min_price))
+        self.max_price = None if max_price is None else Decimal(str(max_price))
+
+    def params(self) -> Dict:
+        """Returns the listorders query params which narrow the orders down on the exchange"""
+        params = {"state": "PENDING"}
+        if self.pair is not None:
+            params["pair"] = self.pair
+
+        return params
+
+    def matches(self, order: Dict) -> bool:
+        if order.get("state") != "PENDING":
+            return False
+
+        if self.pair is not None and order.get("pair") != self.pair:
+            return False
+
+        if self.side is not None and order.get("type") != self.side:
+            return False
+
+        if self.min_price is None and self.max_price is None:
+            return True
+
+        price = Decimal(order["limit_price"])
+        if self.min_price is not None and price < self.min_price:
+            return False
+
+        return self.max_price is None or price <= self.max_price
+
+    def select(self, response: Dict) -> List[str]:
+        """Returns the ids of the matching orders in a list_orders() response"""
+        orders = response.get("orders") or []
+        return [order["order_id"] for order in orders if self.matches(order)]
+
+
+class BatchResult:
+    """The outcome of a single item of a batch
+
+    Args:
+        index: The position of the item in the batch
+        item: The item e.g. a LimitOrder
+        response: The response of the request made for the item
+        error: The exception the request failed with
+    """
+
+    __slots__ = ("index", "item", "response", "error")
+
+    def __init__(
+        self, index: int, item: Any, response: Any = None, error: Exception = None
+    ) -> None:
+        self.index = index
+        self.item = item
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        outcome = self.response if self.ok else repr(self.error)
+        return f"<BatchResult {self.index} {self.item!r} {outcome}>"
+
+
+# called with a result, the number of completed items and the number of items
+Progress = Callable[[BatchResult, int, int], None]
+
+
+class Batch:
+    """Hands out the items of a batch to a bounded number of workers
+
+    Each client runs batch.workers workers which take() items, wait for the time
+    returned, make the request and finish() the item, until take() returns None.
+    An optional token bucket paces the whole batch on top of any rate limiter
+    the client has. Results are kept in the order the items were given.
+
+    Args:
+        items: The items to process
+        concurrency: The maximum number of requests in flight at once
+        rate: The maximum number of requests started per second, unlimited by default
+        burst: The number of requests which may be started at once before the rate applies, concurrency by default
+        progress: Called with each BatchResult, the number of items completed and the number of items
+        clock: A function returning monotonic time in seconds
+    """
+
+    def __init__(
+        self,
+        items: Iterable,
+        concurrency: int = 8,
+        rate: float = None,
+        burst: int = None,
+        progress: Progress = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.items = list(items)
+        self.concurrency = concurrency
+        self.progress = progress
+        self.bucket = None
+        if rate is not None:
+            self.bucket = TokenBucket(rate, burst or concurrency, clock=clock)
+
+        self.results = [None] * len(self.items)
+        self.completed = 0
+        self.errors = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self) -> int:
+        return max(min(self.concurrency, len(self.items)), 1)
+
+    def take(self) -> Optional[Tuple[int, Any, float]]:
+        """Returns the next (index, item, seconds to wait) or None once every item is taken"""
+        with self._lock:
+            index = self._next
+            if index >= len(self.items):
+                return None
+
+            self._next += 1
+
+        wait = self.bucket.reserve() if self.bucket is not None else 0.0
+        return index, self.items[index], wait
+
+    def finish(
+        self, index: int, response: Any = None, error: Exception = None
+    ) -> BatchResult:
+        """Records the outcome of an item and reports it to the progress callback"""
+        result = BatchResult(index, self.items[index], response, error)
+
+        with self._lock:
+            self.results[index] = result
+            self.completed += 1
+            self.errors += error is not None
+            completed = self.completed
+
+        if self.progress is not None:
+            self.progress(result, completed, len(self.items))
+
+        return result
+
+
+def order_batch(
+    orders: Iterable[OrderSpec],
+    concurrency: int = 8,
+    rate: float = None,
+    progress: Progress = None,
+) -> Batch:
+    """Returns a batch placing orders, each item is a LimitOrder or MarketOrder"""
+    return Batch(
+        [as_order(order) for order in orders],
+        concurrency=concurrency,
+        rate=rate,
+        progress=progress,
+    )
+
+
+def place(client: Any, order: Union[LimitOrder, MarketOrder]) -> Any:
+    """Calls the client method which places an order"""
+    return getattr(client, order.method)(**order.kwargs())
@@ -0,0 +1,133 @@
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+from typing import Tuple
+
+HIT = "hit"
+WAIT = "wait"
+FETCH = "fetch"
+
+DEFAULT_TTLS = {"ticker": 1.0, "tickers": 1.0, "orderbook": 0.5, "trades": 1.0}
+
+
+class ResponseCache:
+    """A bounded LRU cache of public market data responses with per endpoint TTLs
+
+    Besides caching responses the cache coalesces concurrent identical requests,
+    the first caller fetches the resource while later callers wait for its result.
+    The object used to wait on a request in flight is created by the client so
+    that the cache can be shared by the sync, async and asyncio clients.
+
+    Cached responses are shared between callers and must not be mutated.
+
+    Args:
+        ttls: A dict mapping an endpoint name e.g. orderbook to a TTL in seconds which overrides the defaults
+        maxsize: The maximum number of cached responses
+        clock: A function returning monotonic time in seconds
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float] = None,
+        maxsize: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.maxsize = maxsize
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def key(self, method: str, suffix: str, params: Dict) -> Optional[Hashable]:
+        """Returns the cache key of a request or None if the request is not cacheable
+
+        Args:
+            method: The http verb i.e. get, post, put, delete
+            suffix: The uri suffix
+            params: A dict of query params
+        """
+        if method != "get" or self.ttls.get(suffix, 0) <= 0:
+            return None
+
+        return suffix, tuple(sorted(params.items()))
+
+    def begin(self, key: Hashable, waiter: Callable[[], Any]) -> Tuple[str, Any]:
+        """Looks up a request in the cache
+
+        Args:
+            key: A key returned by key()
+            waiter: Creates the object used to wait on the request, e.g. a future
+
+        Returns:
+            A tuple of (HIT, response) for a cached response, (WAIT, waiter) if an
+            identical request is in flight or (FETCH, waiter) if the caller must
+            fetch the resource and then call finish()
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return HIT, value
+
+                del self._entries[key]
+
+            if key in self._inflight:
+                self.coalesced += 1
+                return WAIT, self._inflight[key]
+
+            self.misses += 1
+            self._inflight[key] = obj = waiter()
+            return FETCH, obj
+
+    def finish(self, key: Hashable, value: Any = None, failed: bool = False) -> None:
+        """Completes a request started with begin(), caching the response if it succeeded
+
+        Args:
+            key: A key returned by key()
+            value: The response
+            failed: Set if the request failed, nothing is cached
+        """
+        with self._lock:
+            self._inflight.pop(key, None)
+            if failed:
+                return
+
+            self._entries[key] = (self.clock() + self.ttls[key[0]], value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Removes every cached response"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit, miss, coalesced and eviction counts along with the cache size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
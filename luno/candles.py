@@ -0,0 +1,466 @@
+import time
+
+from array import array
+from luno.endpoints import Routine
+from luno.endpoints import drive
+from luno.lazy import lazy_import
+from luno.pagination import TradePager
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+np = lazy_import("numpy", optional=True)
+
+UNITS = {"s": 1000, "m": 60000, "h": 3600000, "d": 86400000}
+COLUMNS = ("start", "open", "high", "low", "close", "volume", "count")
+
+Interval = Union[int, str]
+
+
+def interval_ms(interval: Interval) -> int:
+    """Returns an interval in milliseconds
+
+    Args:
+        interval: Milliseconds or a string such as 1s, 1m, 5m, 1h or 1d
+    """
+    if isinstance(interval, str):
+        value, unit = interval[:-1], interval[-1]
+        if unit not in UNITS or not value.isdigit():
+            raise ValueError(f"unknown interval {interval!r}")
+
+        interval = int(value) * UNITS[unit]
+
+    if interval < 1:
+        raise ValueError("interval must be at least 1ms")
+
+    return int(interval)
+
+
+class Candle:
+    """The open, high, low, close and volume of the trades in an interval
+
+    Args:
+        interval: The length of the candle in milliseconds
+        start: Unix timestamp in milliseconds the candle starts at
+    """
+
+    __slots__ = ("interval", "start", "open", "high", "low", "close", "volume", "count")
+
+    def __init__(
+        self,
+        interval: int,
+        start: int,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        count: int,
+    ) -> None:
+        self.interval = interval
+        self.start = start
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.count = count
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Candle):
+            return NotImplemented
+
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"<Candle {self.interval}ms {self.start} o={self.open} h={self.high} "
+            f"l={self.low} c={self.close} v={self.volume}>"
+        )
+
+
+class CandleSeries:
+    """The candles of one interval kept in a ring buffer
+
+    The candle of a trade is found from its timestamp, bucket = timestamp //
+    interval, in the slot bucket % capacity so each trade is applied in O(1).
+    The slot records the start of the candle it holds, slots left over from
+    earlier buckets are treated as empty, intervals without trades have no
+    candle. Only the newest capacity intervals are kept, trades older than that
+    are dropped.
+
+    A trade older than the newest candle is applied to its candle. The first and
+    last trade timestamps of each candle are kept so a late trade only replaces
+    the open or close when it precedes or follows every trade applied so far.
+
+    The columns are array module arrays, NumPy views of them are used to rebuild
+    many candles at once in backfill().
+
+    Args:
+        interval: The candle length in milliseconds or a string such as 1m
+        capacity: The number of candles kept
+    """
+
+    def __init__(self, interval: Interval, capacity: int = 1440) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.interval = interval_ms(interval)
+        self.capacity = capacity
+        self.newest = None
+        self.late = 0
+        self.dropped = 0
+        self._start = array("q", [-1]) * capacity
+        self._first = array("q", [0]) * capacity
+        self._last = array("q", [0]) * capacity
+        self._open = array("d", [0.0]) * capacity
+        self._high = array("d", [0.0]) * capacity
+        self._low = array("d", [0.0]) * capacity
+        self._close = array("d", [0.0]) * capacity
+        self._volume = array("d", [0.0]) * capacity
+        self._count = array("q", [0]) * capacity
+
+    def __len__(self) -> int:
+        return len(self._buckets())
+
+    def update(self, timestamp: int, price: float, volume: float) -> Optional[Candle]:
+        """Applies a trade
+
+        Args:
+            timestamp: Unix timestamp in milliseconds of the trade
+            price: The price of the trade
+            volume: The base volume of the trade
+
+        Returns:
+            The previous newest candle when the trade starts a newer candle
+        """
+        bucket = timestamp // self.interval
+        closed = None
+
+        if self.newest is None or bucket > self.newest:
+            if self.newest is not None:
+                closed = self.candle(self.newest)
+
+            self.newest = bucket
+        elif bucket <= self.newest - self.capacity:
+            self.dropped += 1
+            return None
+        elif bucket < self.newest:
+            self.late += 1
+
+        slot = bucket % self.capacity
+        start = bucket * self.interval
+
+        if self._start[slot] != start:
+            self._start[slot] = start
+            self._first[slot] = self._last[slot] = timestamp
+            self._open[slot] = self._high[slot] = price
+            self._low[slot] = self._close[slot] = price
+            self._volume[slot] = volume
+            self._count[slot] = 1
+            return closed
+
+        if timestamp < self._first[slot]:
+            self._first[slot] = timestamp
+            self._open[slot] = price
+
+        if timestamp >= self._last[slot]:
+            self._last[slot] = timestamp
+            self._close[slot] = price
+
+        if price > self._high[slot]:
+            self._high[slot] = price
+        elif price < self._low[slot]:
+            self._low[slot] = price
+
+        self._volume[slot] += volume
+        self._count[slot] += 1
+        return closed
+
+    def backfill(
+        self,
+        timestamps: Sequence[int],
+        prices: Sequence[float],
+        volumes: Sequence[float],
+    ) -> None:
+        """Rebuilds the candles of every interval with a trade in a batch
+
+        The batch must hold every trade of the intervals it covers, the candles
+        of those intervals are replaced. With NumPy the candles are computed with
+        reductions over the whole batch instead of a trade at a time.
+
+        Args:
+            timestamps: Unix timestamps in milliseconds of the trades
+            prices: The prices of the trades
+            volumes: The base volumes of the trades
+        """
+        if np is None:
+            return self._backfill_trades(timestamps, prices, volumes)
+
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if not len(timestamps):
+            return
+
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, prices, volumes = timestamps[order], prices[order], volumes[order]
+
+        buckets = timestamps // self.interval
+        first = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        last = np.r_[first[1:], len(buckets)] - 1
+        buckets = buckets[first]
+
+        newest = int(buckets[-1])
+        if self.newest is not None:
+            newest = max(newest, self.newest)
+
+        kept = buckets > newest - self.capacity
+        slots = buckets[kept] % self.capacity
+        self.newest = newest
+
+        columns = self._views()
+        columns["start"][slots] = buckets[kept] * self.interval
+        columns["first"][slots] = timestamps[first][kept]
+        columns["last"][slots] = timestamps[last][kept]
+        columns["open"][slots] = prices[first][kept]
+        columns["close"][slots] = prices[last][kept]
+        columns["high"][slots] = np.maximum.reduceat(prices, first)[kept]
+        columns["low"][slots] = np.minimum.reduceat(prices, first)[kept]
+        columns["volume"][slots] = np.add.reduceat(volumes, first)[kept]
+        columns["count"][slots] = (last - first + 1)[kept]
+
+    def candle(self, bucket: int) -> Optional[Candle]:
+        """Returns the candle of a bucket, None if it has no trades or is no longer kept"""
+        slot = bucket % self.capacity
+        start = bucket * self.interval
+        if self._start[slot] != start:
+            return None
+
+        return Candle(
+            self.interval,
+            start,
+            self._open[slot],
+            self._high[slot],
+            self._low[slot],
+            self._close[slot],
+            self._volume[slot],
+            self._count[slot],
+        )
+
+    def latest(self) -> Optional[Candle]:
+        """Returns the newest candle, which is still open"""
+        if self.newest is None:
+            return None
+
+        return self.candle(self.newest)
+
+    def candles(self) -> List[Candle]:
+        """Returns the candles kept oldest first"""
+        return [self.candle(bucket) for bucket in self._buckets()]
+
+    def columns(self) -> Dict:
+        """Returns the candles kept oldest first as columns
+
+        Returns:
+            A dict of NumPy arrays keyed by the COLUMNS, or of lists without NumPy
+        """
+        if np is None:
+            candles = self.candles()
+            return {
+                name: [getattr(candle, name) for candle in candles] for name in COLUMNS
+            }
+
+        if self.newest is None:
+            return {name: np.empty(0) for name in COLUMNS}
+
+        buckets = np.arange(self.newest - self.capacity + 1, self.newest + 1)
+        slots = buckets % self.capacity
+        columns = self._views()
+        slots = slots[columns["start"][slots] == buckets * self.interval]
+        return {name: columns[name][slots] for name in COLUMNS}
+
+    def _buckets(self) -> List[int]:
+        if self.newest is None:
+            return []
+
+        return [
+            bucket
+            for bucket in range(self.newest - self.capacity + 1, self.newest + 1)
+            if self._start[bucket % self.capacity] == bucket * self.interval
+        ]
+
+    def _views(self) -> Dict:
+        """Returns NumPy views of the columns"""
+        return {
+            "start": np.frombuffer(self._start, dtype=np.int64),
+            "first": np.frombuffer(self._first, dtype=np.int64),
+            "last": np.frombuffer(self._last, dtype=np.int64),
+            "open": np.frombuffer(self._open, dtype=np.float64),
+            "high": np.frombuffer(self._high, dtype=np.float64),
+            "low": np.frombuffer(self._low, dtype=np.float64),
+            "close": np.frombuffer(self._close, dtype=np.float64),
+            "volume": np.frombuffer(self._volume, dtype=np.float64),
+            "count": np.frombuffer(self._count, dtype=np.int64),
+        }
+
+    def _backfill_trades(
+        self,
+        timestamps: Sequence[int],
+        prices: Sequence[float],
+        volumes: Sequence[float],
+    ) -> None:
+        trades = sorted(zip(timestamps, prices, volumes), key=lambda t: t[0])
+        for bucket in {int(timestamp) // self.interval for timestamp, _, _ in trades}:
+            slot = bucket % self.capacity
+            if self._start[slot] == bucket * self.interval:
+                self._start[slot] = -1
+
+        for timestamp, price, volume in trades:
+            self.update(int(timestamp), float(price), float(volume))
+
+
+class CandleEngine:
+    """Maintains candles of several intervals at once from a feed of trades
+
+    Trades may be applied one at a time with update() from any source, a batch
+    of trades() rows with add_trades() or a history with backfill(). When a pair
+    is given the engine also pages through trades() from since, refresh_candles()
+    feeds it with any of the clients.
+
+    Example:
+        engine = CandleEngine(["1s", "1m", "5m"], pair="XBTZAR")
+        refresh_candles(client, engine)
+        engine["1m"].latest()
+
+    Args:
+        intervals: The candle lengths in milliseconds or strings such as 1s, 1m or 5m
+        capacity: The number of candles kept per interval
+        pair: Currency pair e.g. XBTZAR to fetch trades of with trades()
+        since: Unix timestamp in milliseconds to fetch trades from, the start of the longest interval by default
+    """
+
+    def __init__(
+        self,
+        intervals: Iterable[Interval] = ("1s", "1m", "5m"),
+        capacity: int = 1440,
+        pair: str = None,
+        since: int = None,
+    ) -> None:
+        self.series = {}
+        for interval in intervals:
+            series = CandleSeries(interval, capacity)
+            self.series[series.interval] = series
+
+        if not self.series:
+            raise ValueError("at least one interval is required")
+
+        self.pair = pair
+        self._pager = None
+        if pair is not None:
+            if since is None:
+                longest = max(self.series)
+                since = int(time.time() * 1000) // longest * longest
+
+            self._pager = TradePager(pair, since)
+
+    def __getitem__(self, interval: Interval) -> CandleSeries:
+        return self.series[interval_ms(interval)]
+
+    def update(self, timestamp: int, price: float, volume: float) -> List[Candle]:
+        """Applies a trade to every interval
+
+        Returns:
+            The candles closed by the trade
+        """
+        closed = []
+        for series in self.series.values():
+            candle = series.update(timestamp, price, volume)
+            if candle is not None:
+                closed.append(candle)
+
+        return closed
+
+    def add_trades(self, trades: Iterable[Dict]) -> List[Candle]:
+        """Applies trades() rows
+
+        Returns:
+            The candles closed by the trades
+        """
+        closed = []
+        for trade in trades:
+            closed.extend(
+                self.update(
+                    int(trade["timestamp"]),
+                    float(trade["price"]),
+                    float(trade["volume"]),
+                )
+            )
+
+        return closed
+
+    def backfill(
+        self,
+        timestamps: Sequence[int],
+        prices: Sequence[float],
+        volumes: Sequence[float],
+    ) -> None:
+        """Rebuilds the candles of every interval covered by a batch of trades, see CandleSeries.backfill"""
+        for series in self.series.values():
+            series.backfill(timestamps, prices, volumes)
+
+    def params(self) -> Dict:
+        """Returns the trades query params of the next page"""
+        if self._pager is None:
+            raise ValueError("the engine was created without a pair")
+
+        return self._pager.params()
+
+    def feed(self, response: Dict) -> List[Candle]:
+        """Applies the new trades of a trades() response requested with params()
+
+        Returns:
+            The candles closed by the trades
+        """
+        self._pager.done = False
+        return self.add_trades(self._pager.page(response))
+
+    @property
+    def caught_up(self) -> bool:
+        """True once the last response fed held the newest trades"""
+        return self._pager is not None and self._pager.done
+
+
+def refresh_candles(client: Any, engine: CandleEngine) -> Any:
+    """Feeds the trades executed since the last refresh to a candle engine, fetching a page of at most 100 trades at a time
+
+    Example:
+        closed = refresh_candles(client, engine)
+        closed = await refresh_candles(asyncio_client, engine)
+
+    Args:
+        client: A sync, twisted or asyncio client
+        engine: A CandleEngine created with a pair
+
+    Returns:
+        The candles closed by the new trades, a twisted deferred which will
+        eventually return them for the twisted client or a coroutine for the
+        asyncio client
+    """
+    return drive(client, _refresh_candles(engine))
+
+
+def _refresh_candles(engine: CandleEngine) -> Routine:
+    closed = []
+
+    while True:
+        response = yield "get", "trades", engine.params()
+        closed.extend(engine.feed(response))
+        if engine.caught_up:
+            return closed
@@ -1,2 +1,24 @@
-from luno.clients.sync import LunoSyncClient
-from luno.clients.asynchronous import LunoAsyncClient
+import importlib
+
+# clients are imported on first access so that using one client does not
+# import the dependencies of the others e.g. twisted and treq
+_CLIENTS = {
+    "LunoSyncClient": "luno.clients.sync",
+    "LunoAsyncClient": "luno.clients.asynchronous",
+    "LunoAsyncioClient": "luno.clients.aio",
+}
+
+__all__ = list(_CLIENTS)
+
+
+def __getattr__(name: str):
+    if name not in _CLIENTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    client = getattr(importlib.import_module(_CLIENTS[name]), name)
+    globals()[name] = client
+    return client
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
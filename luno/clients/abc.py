@@ -1,5 +1,14 @@
 import abc
 
+# the request headers of each verb, built once and shared by every client
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+HEADERS = {
+    "get": None,
+    "post": FORM_HEADERS,
+    "delete": FORM_HEADERS,
+    "put": FORM_HEADERS,
+}
+
 
 class LunoClientABC(abc.ABC):
     @abc.abstractproperty
@@ -28,4 +37,4 @@ class LunoClientBase(LunoClientABC):
 
     @property
     def _has_auth_details(self) -> bool:
-        return all([self.api_key is not None, self.secret is not None])
+        return self.api_key is not None and self.secret is not None
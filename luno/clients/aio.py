@@ -0,0 +1,628 @@
+import aiohttp
+import asyncio
+import base64
+
+from collections import deque
+from luno.batching import TickerBatcher
+from luno.batching import index_tickers
+from luno.bulk import Batch
+from luno.bulk import BatchResult
+from luno.bulk import OrderFilter
+from luno.bulk import OrderSpec
+from luno.bulk import Progress
+from luno.bulk import order_batch
+from luno.bulk import place
+from luno.cache import HIT
+from luno.cache import ResponseCache
+from luno.cache import WAIT
+from luno.clients.abc import HEADERS
+from luno.clients.abc import LunoClientBase
+from luno.decoders import Decoder
+from luno.decoders import get_decoder
+from luno.decorators import requires_authentication
+from luno.endpoints import ASYNCIO
+from luno.endpoints import endpoint_methods
+from luno.exceptions import UnsupportedHttpVerbException
+from luno.instrumentation import Instrumentation
+from luno.models import Ticker
+from luno.models import parse_response
+from luno.orderbook import ColumnarOrderBook
+from luno.pagination import TradePager
+from luno.pagination import next_row
+from luno.pagination import row_windows
+from luno.pagination import window_rows
+from luno.ratelimit import RateLimiter
+from luno.retry import Retry
+from luno.retry import RetryPolicy
+from luno.tracker import OrderEvent
+from luno.tracker import OrderTracker
+
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+# failures after which the request may not have reached the exchange or its
+# response was lost, only retried for requests the retry policy deems safe
+RETRY_EXCEPTIONS = (
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    asyncio.TimeoutError,
+)
+
+
+# the phase which ends with each aiohttp tracing signal, the rate limiter wait is
+# included in the wait phase which ends once the session starts the request. The
+# server phase is marked by the client once the response headers are returned.
+TRACE_PHASES = {
+    "on_request_start": "wait",
+    "on_connection_queued_end": "queue",
+    "on_connection_create_start": "queue",
+    "on_connection_reuseconn": "queue",
+    "on_dns_resolvehost_end": "dns",
+    "on_connection_create_end": "connect",
+}
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """Returns a trace config which marks the phases of requests made with a RequestTiming"""
+
+    def marker(phase: str):
+        async def mark(session, context, params) -> None:
+            timing = context.trace_request_ctx
+            if timing is not None:
+                timing.mark(phase)
+
+        return mark
+
+    config = aiohttp.TraceConfig()
+    for signal, phase in TRACE_PHASES.items():
+        getattr(config, signal).append(marker(phase))
+
+    return config
+
+
+@endpoint_methods(ASYNCIO)
+class LunoAsyncioClient(LunoClientBase):
+    """A Luno client for asyncio built on aiohttp
+
+    The client owns a keep-alive connection pool which is shared by every request
+    and should be closed when the client is no longer required, either by calling
+    close() or by using the client as an async context manager.
+
+    Example:
+        async with LunoAsyncioClient(api_key, secret) as client:
+            await client.ticker("XBTZAR")
+
+    Args:
+        api_key: A Luno api key
+        secret: A Luno api secret
+        limit: The maximum number of open connections
+        limit_per_host: The maximum number of open connections per host, 0 is unlimited
+        keepalive_timeout: Seconds an idle connection is kept open for reuse
+        timeout: The total timeout of a request in seconds
+        rate_limiter: Paces requests, it may be shared with other clients
+        cache: Caches public market data responses, it may be shared with other clients
+        ticker_batcher: Serves concurrent ticker() calls from a single tickers() request
+        decoder: Decodes json response bodies from bytes, the fastest installed decoder is used by default
+        typed: Return typed models from ticker(), trades(), balance(), transactions(), list_orders() and list_trades()
+        retry_policy: Retries failed requests, it may be shared with other clients
+        instrumentation: Times every request by phase, it may be shared with other clients
+        base_uri: The uri the api is served from e.g. a local fake exchange, defaults to BASE_URI
+    """
+
+    def __init__(
+        self,
+        api_key: str = None,
+        secret: str = None,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 15.0,
+        timeout: float = None,
+        rate_limiter: RateLimiter = None,
+        cache: ResponseCache = None,
+        ticker_batcher: TickerBatcher = None,
+        decoder: Decoder = None,
+        typed: bool = False,
+        retry_policy: RetryPolicy = None,
+        instrumentation: Instrumentation = None,
+        base_uri: str = None,
+    ) -> None:
+        self.api_key = api_key
+        self.secret = secret
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.ticker_batcher = ticker_batcher
+        self.decoder = decoder or get_decoder()
+        self.typed = typed
+        self.retry_policy = retry_policy
+        self.instrumentation = instrumentation
+        if base_uri is not None:
+            self.BASE_URI = base_uri
+
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The aiohttp session, created on first use from within the running loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            headers = {}
+            if self.api_key is not None and self.secret is not None:
+                credentials = f"{self.api_key}:{self.secret}".encode()
+                token = base64.b64encode(credentials).decode()
+                headers["Authorization"] = f"Basic {token}"
+
+            trace_configs = None
+            if self.instrumentation is not None:
+                trace_configs = [trace_config()]
+
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=trace_configs,
+            )
+
+        return self._session
+
+    async def close(self) -> None:
+        """Closes the connection pool"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "LunoAsyncioClient":
+        self.session
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _fetch_resource(
+        self, method: str, suffix: str, params: Dict = {}
+    ) -> Dict:
+        """Helper function to make API requests
+
+        Args:
+            method: The http verb i.e. get, post, put, delete
+            suffix: The uri suffix
+            params: A dict of query params
+
+        Returns:
+            A python dict of the decoded response
+        """
+        if self.cache is not None:
+            key = self.cache.key(method, suffix, params)
+            if key is not None:
+                return await self._fetch_cached(key, method, suffix, params)
+
+        return await self._request(method, suffix, params)
+
+    async def _fetch_cached(self, key, method: str, suffix: str, params: Dict) -> Dict:
+        loop = asyncio.get_running_loop()
+        state, future = self.cache.begin(key, loop.create_future)
+        if state == HIT:
+            return future
+
+        if state == WAIT:
+            return await asyncio.shield(future)
+
+        try:
+            data = await self._request(method, suffix, params)
+        except asyncio.CancelledError:
+            self.cache.finish(key, failed=True)
+            future.cancel()
+            raise
+        except Exception as e:
+            self.cache.finish(key, failed=True)
+            future.set_exception(e)
+            future.exception()
+            raise
+
+        self.cache.finish(key, data)
+        future.set_result(data)
+        return data
+
+    async def _request(self, method: str, suffix: str, params: Dict) -> Dict:
+        if method not in HEADERS:
+            raise UnsupportedHttpVerbException(f"http verb {method} is not supported")
+
+        retry = None
+        if self.retry_policy is not None:
+            retry = self.retry_policy.begin(method, suffix)
+
+        url = f"{self.BASE_URI}{suffix}"
+        params = {key: value for key, value in params.items() if value is not None}
+        headers = HEADERS[method]
+
+        while True:
+            timing = None
+            if self.instrumentation is not None:
+                timing = self.instrumentation.begin(method, suffix)
+
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve(method, suffix)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            # the body is read within the retried block so a response cut off
+            # mid body is retried like a dropped connection
+            try:
+                resp = await self.session.request(
+                    method,
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=self._timeout(retry),
+                    trace_request_ctx=timing,
+                )
+
+                if timing is not None:
+                    timing.mark("server")
+                    timing.status = resp.status
+
+                try:
+                    body = await resp.read()
+                finally:
+                    resp.release()
+            except RETRY_EXCEPTIONS as e:
+                if timing is not None:
+                    self.instrumentation.finish(timing, error=e)
+
+                delay = None if retry is None else retry.next_delay()
+                if delay is None:
+                    raise
+
+                await asyncio.sleep(delay)
+                continue
+
+            if timing is not None:
+                timing.mark("read")
+                timing.bytes = len(body)
+
+            if retry is not None and resp.status >= 400:
+                retry_after = resp.headers.get("Retry-After")
+                delay = retry.next_delay(resp.status, retry_after)
+                if delay is not None:
+                    if timing is not None:
+                        self.instrumentation.finish(timing)
+
+                    await asyncio.sleep(delay)
+                    continue
+
+            try:
+                resp.raise_for_status()
+
+                return self.decoder(body)
+            finally:
+                if timing is not None:
+                    timing.mark("decode")
+                    self.instrumentation.finish(timing)
+
+    def _timeout(self, retry: Optional[Retry]) -> aiohttp.ClientTimeout:
+        """Returns the timeout of an attempt, bounded by the deadline of its retries"""
+        total = self.timeout
+        remaining = None if retry is None else retry.timeout()
+        if remaining is not None:
+            total = remaining if total is None else min(total, remaining)
+
+        return aiohttp.ClientTimeout(total=total)
+
+    def _parse(self, data: Dict, model: type, key: str = None) -> Any:
+        """Converts a response into typed models when the client is in typed mode"""
+        if not self.typed:
+            return data
+
+        return parse_response(data, model, key)
+
+    async def ticker(self, pair: str) -> Dict:
+        """Returns the latest ticker indicators
+
+        Args:
+            pair: A currency pair
+
+        Returns:
+            A python dict of ticker indicators or a Ticker in typed mode
+        """
+        if self.ticker_batcher is not None:
+            data = await self._batched_ticker(pair)
+            return self._parse(data, Ticker)
+
+        data = await self._fetch_resource("get", "ticker", {"pair": pair})
+        return self._parse(data, Ticker)
+
+    async def _batched_ticker(self, pair: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        leader, future = self.ticker_batcher.join(loop.create_future)
+
+        if leader:
+            try:
+                await asyncio.sleep(self.ticker_batcher.window)
+                self.ticker_batcher.close(future)
+                future.set_result(
+                    index_tickers(await self._fetch_resource("get", "tickers"))
+                )
+            except asyncio.CancelledError:
+                self.ticker_batcher.close(future)
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+
+        tickers = await asyncio.shield(future)
+        if pair in tickers:
+            return tickers[pair]
+
+        return await self._fetch_resource("get", "ticker", {"pair": pair})
+
+    async def order_book(
+        self, pair: str, columnar: bool = False
+    ) -> Union[Dict, ColumnarOrderBook]:
+        """Returns a list of bids and asks in the order book. Ask orders are sorted by price ascending.
+        Bid orders are sorted by price descending. Note that multiple orders at the same price are not necessarily conflated
+
+        Args:
+            pair: Currency pair e.g. XBTZAR
+            columnar: Return the bids and asks as price and volume arrays
+
+        Returns:
+            A python dict of orders data or a ColumnarOrderBook if columnar is True
+        """
+        data = await self._fetch_resource("get", "orderbook", {"pair": pair})
+        if columnar:
+            return ColumnarOrderBook.from_snapshot(data, pair)
+
+        return data
+
+    async def iter_trades(
+        self, pair: str, since: int, until: int = None, prefetch: bool = False
+    ) -> AsyncIterator[Dict]:
+        """Iterates over the trade history from a point in time, fetching a page of at most 100 trades at a time
+
+        Trades repeated at the boundary between pages are skipped and only the current page is held in memory.
+
+        Args:
+            pair: Currency pair e.g. XBTZAR
+            since: Fetch trades executed after this time, specified as a Unix timestamp in milliseconds
+            until: Stop after this Unix timestamp in milliseconds
+            prefetch: Request the next page while the current page is consumed
+
+        Returns:
+            An async iterator of trade dicts sorted by timestamp ascending
+        """
+        pager = TradePager(pair, since, until)
+        pending = None
+
+        try:
+            response = await self._fetch_resource("get", "trades", pager.params())
+
+            while True:
+                trades = pager.page(response)
+                if prefetch and not pager.done:
+                    pending = asyncio.ensure_future(
+                        self._fetch_resource("get", "trades", pager.params())
+                    )
+
+                for trade in trades:
+                    yield trade
+
+                if pager.done:
+                    return
+
+                if pending is not None:
+                    response, pending = await pending, None
+                else:
+                    response = await self._fetch_resource(
+                        "get", "trades", pager.params()
+                    )
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    @requires_authentication
+    async def iter_transactions(
+        self,
+        account_id: int,
+        min_row: int = 1,
+        max_row: int = None,
+        concurrency: int = 8,
+    ) -> AsyncIterator[Dict]:
+        """Iterates over the transactions of an account, fetching windows of 1000 rows concurrently
+
+        Rows are yielded in order and at most concurrency windows are requested at once.
+
+        Args:
+            account_id: Account ID
+            min_row: Minimum of the row range to return (inclusive)
+            max_row: Maximum of the row range to return (exclusive), by default all rows up to the most recent row are returned
+            concurrency: The maximum number of windows fetched at once
+
+        Returns:
+            An async iterator of transaction dicts sorted by row index
+        """
+        suffix = f"accounts/{account_id}/transactions"
+
+        if max_row is None:
+            latest = await self._fetch_resource(
+                "get", suffix, {"min_row": -1, "max_row": 0}
+            )
+            max_row = next_row(latest)
+
+        pending = deque()
+
+        try:
+            for start, end in row_windows(min_row, max_row):
+                params = {"min_row": start, "max_row": end}
+                pending.append(
+                    asyncio.ensure_future(self._fetch_resource("get", suffix, params))
+                )
+
+                if len(pending) >= concurrency:
+                    for row in window_rows(await pending.popleft()):
+                        yield row
+
+            while pending:
+                for row in window_rows(await pending.popleft()):
+                    yield row
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @requires_authentication
+    async def refresh_orders(self, tracker: OrderTracker) -> List[OrderEvent]:
+        """Brings an order tracker up to date
+
+        The pending orders are listed with a single request and orders which are no
+        longer pending are resolved from list_trades, one request per pair unless a
+        pair has more than a page of trades to go through. Orders which the trades
+        do not show as filled are confirmed with one get_order request each, so the
+        cost of a refresh does not grow with the number of open orders.
+
+        Args:
+            tracker: The order tracker to refresh, it may be shared with other clients
+
+        Returns:
+            A list of the OrderEvent of the refresh, which are also passed to the tracker's observers
+        """
+        listing = await self._fetch_resource("get", "listorders", tracker.params())
+        events = tracker.update(listing)
+
+        queries = tracker.trade_queries()
+        while queries:
+            responses = await asyncio.gather(
+                *[
+                    self._fetch_resource("get", "listtrades", params)
+                    for params in queries
+                ]
+            )
+            for params, trades in zip(queries, responses):
+                events.extend(tracker.resolve(params["pair"], trades))
+
+            queries = tracker.trade_queries()
+
+        orders = await asyncio.gather(
+            *[
+                self._fetch_resource("get", f"orders/{order_id}")
+                for order_id in tracker.order_queries()
+            ]
+        )
+        for order in orders:
+            events.extend(tracker.confirm(order))
+
+        return events
+
+    @requires_authentication
+    async def watch_orders(self, tracker: OrderTracker) -> AsyncIterator[OrderEvent]:
+        """Refreshes an order tracker on its adaptive schedule until the iterator is closed
+
+        Args:
+            tracker: The order tracker to refresh
+
+        Returns:
+            An async iterator of OrderEvent
+        """
+        while True:
+            for event in await self.refresh_orders(tracker):
+                yield event
+
+            await asyncio.sleep(tracker.delay())
+
+    @requires_authentication
+    async def post_orders(
+        self,
+        orders: Iterable[OrderSpec],
+        concurrency: int = 8,
+        rate: float = None,
+        progress: Progress = None,
+    ) -> List[BatchResult]:
+        """Places many orders concurrently
+
+        At most concurrency orders are in flight at once so a ladder of orders takes
+        roughly as long as the slowest order rather than the sum of all of them. The
+        client's rate limiter and retry policy apply to every order. A failed order
+        does not stop the others.
+
+        Args:
+            orders: LimitOrder and MarketOrder instances or dicts of post_limit_order() or post_market_order() arguments
+            concurrency: The maximum number of orders placed at once
+            rate: The maximum number of orders placed per second, unlimited by default
+            progress: Called with each BatchResult, the number of orders placed so far and the number of orders
+
+        Returns:
+            A list of BatchResult in the order the orders were given, each holding the response or the error of an order
+        """
+        batch = order_batch(orders, concurrency, rate, progress)
+        return await self._run_batch(batch, lambda order: place(self, order))
+
+    @requires_authentication
+    async def cancel_orders(
+        self,
+        pair: str = None,
+        side: str = None,
+        min_price: str = None,
+        max_price: str = None,
+        concurrency: int = 8,
+        rate: float = None,
+        progress: Progress = None,
+    ) -> List[BatchResult]:
+        """Stops open orders concurrently
+
+        Open orders are listed with a single list_orders request and every order
+        matching all of the filters given is stopped, at most concurrency at once.
+        With no filters every open order is stopped. A failed stop does not stop
+        the others.
+
+        Args:
+            pair: Only stop orders in this currency pair e.g. XBTZAR
+            side: Only stop "BID" or only stop "ASK" orders
+            min_price: Only stop orders with a limit price at or above this price
+            max_price: Only stop orders with a limit price at or below this price
+            concurrency: The maximum number of orders stopped at once
+            rate: The maximum number of orders stopped per second, unlimited by default
+            progress: Called with each BatchResult, the number of orders stopped so far and the number of orders
+
+        Returns:
+            A list of BatchResult in the order the orders were listed, the item of each is an order id
+        """
+        selection = OrderFilter(pair, side, min_price, max_price)
+        response = await self._fetch_resource("get", "listorders", selection.params())
+
+        batch = Batch(selection.select(response), concurrency, rate, progress=progress)
+        return await self._run_batch(batch, self.cancel_order)
+
+    async def _run_batch(
+        self, batch: Batch, call: Callable[[Any], Awaitable]
+    ) -> List[BatchResult]:
+        async def worker() -> None:
+            while True:
+                job = batch.take()
+                if job is None:
+                    return
+
+                index, item, wait = job
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                try:
+                    response = await call(item)
+                except Exception as e:
+                    batch.finish(index, error=e)
+                else:
+                    batch.finish(index, response)
+
+        await asyncio.gather(*[worker() for _ in range(batch.workers)])
+        return batch.results
@@ -1,19 +1,138 @@
 import treq
 
+from collections import deque
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
 from typing import Dict
+from typing import Iterable
+from luno.batching import TickerBatcher
+from luno.batching import index_tickers
+from luno.bulk import Batch
+from luno.bulk import OrderFilter
+from luno.bulk import OrderSpec
+from luno.bulk import Progress
+from luno.bulk import order_batch
+from luno.bulk import place
+from luno.cache import HIT
+from luno.cache import ResponseCache
+from luno.cache import WAIT
+from luno.clients.abc import HEADERS
 from luno.clients.abc import LunoClientBase
+from luno.decoders import Decoder
+from luno.decoders import get_decoder
 from luno.decorators import requires_authentication
+from luno.endpoints import TWISTED
+from luno.endpoints import endpoint_methods
+from luno.exceptions import HttpStatusException
 from luno.exceptions import UnsupportedHttpVerbException
+from luno.instrumentation import Instrumentation
+from luno.models import Ticker
+from luno.models import parse_response
+from luno.orderbook import ColumnarOrderBook
+from luno.pagination import TradePager
+from luno.pagination import next_row
+from luno.pagination import row_windows
+from luno.pagination import window_rows
+from luno.ratelimit import RateLimiter
+from luno.retry import RetryPolicy
+from luno.tracker import OrderEvent
+from luno.tracker import OrderTracker
 from twisted.internet.defer import Deferred
+from twisted.internet.defer import gatherResults
 from twisted.internet.defer import inlineCallbacks
+from twisted.internet.defer import succeed
+from twisted.internet.error import ConnectError
+from twisted.internet.error import DNSLookupError
+from twisted.internet.error import TimeoutError
+from twisted.internet.task import deferLater
+from twisted.python.failure import Failure
+from twisted.web.client import HTTPConnectionPool
+from twisted.web.client import RequestTransmissionFailed
+from twisted.web.client import ResponseFailed
+from twisted.web.client import ResponseNeverReceived
+
+
+# failures after which the request may not have reached the exchange or its
+# response was lost, only retried for requests the retry policy deems safe
+RETRY_EXCEPTIONS = (
+    ConnectError,
+    DNSLookupError,
+    TimeoutError,
+    RequestTransmissionFailed,
+    ResponseNeverReceived,
+    ResponseFailed,
+)
+
+
+@endpoint_methods(TWISTED)
+class LunoAsyncClient(LunoClientBase):
+    def __init__(
+        self,
+        api_key: str = None,
+        secret: str = None,
+        max_persistent_per_host: int = 10,
+        cached_connection_timeout: int = 240,
+        retry_automatically: bool = True,
+        rate_limiter: RateLimiter = None,
+        cache: ResponseCache = None,
+        ticker_batcher: TickerBatcher = None,
+        decoder: Decoder = None,
+        typed: bool = False,
+        retry_policy: RetryPolicy = None,
+        instrumentation: Instrumentation = None,
+        base_uri: str = None,
+        reactor=None,
+    ) -> None:
+        """A Luno client built on treq
+
+		The client owns a persistent connection pool which is used for every request. Call close() to drain the pool once the client is no longer required.
 
+		Args:
+			api_key: A Luno api key
+			secret: A Luno api secret
+			max_persistent_per_host: The maximum number of idle connections cached per host
+			cached_connection_timeout: Seconds an idle connection is cached for before it is closed
+			retry_automatically: Retry idempotent requests which fail on a cached connection
+			rate_limiter: Paces requests, it may be shared with other clients
+			cache: Caches public market data responses, it may be shared with other clients
+			ticker_batcher: Serves concurrent ticker() calls from a single tickers() request
+			decoder: Decodes json response bodies from bytes, the fastest installed decoder is used by default
+			typed: Return typed models from ticker(), trades(), balance(), transactions(), list_orders() and list_trades()
+			retry_policy: Retries failed requests, it may be shared with other clients
+			instrumentation: Times every request by phase, it may be shared with other clients
+			base_uri: The uri the api is served from e.g. a local fake exchange, defaults to BASE_URI
+			reactor: The twisted reactor, the global reactor is used by default
+		"""
+        if reactor is None:
+            from twisted.internet import reactor
 
-class LunoAsyncClient(LunoClientBase):
-    def __init__(self, api_key: str = None, secret: str = None) -> None:
         self.api_key = api_key
         self.secret = secret
+        self.reactor = reactor
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.ticker_batcher = ticker_batcher
+        self.decoder = decoder or get_decoder()
+        self.typed = typed
+        self.retry_policy = retry_policy
+        self.instrumentation = instrumentation
+        if base_uri is not None:
+            self.BASE_URI = base_uri
+
+        self.pool = HTTPConnectionPool(reactor, persistent=True)
+        self.pool.maxPersistentPerHost = max_persistent_per_host
+        self.pool.cachedConnectionTimeout = cached_connection_timeout
+        self.pool.retryAutomatically = retry_automatically
+
+    def close(self) -> Deferred:
+        """Closes the cached connections in the pool
+
+		Returns:
+		    A twisted deferred which fires once all connections are closed
+		"""
+        return self.pool.closeCachedConnections()
 
-    @inlineCallbacks
     def _fetch_resource(self, method: str, suffix: str, params: Dict = {}) -> Deferred:
         """Helper function to make API requests
 
@@ -25,443 +144,408 @@ class LunoAsyncClient(LunoClientBase):
 		Returns:
 		    A twisted deferred
 		"""
-        url = f"{self.BASE_URI}{suffix}"
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        auth = (self.api_key, self.secret)
+        if self.cache is not None:
+            key = self.cache.key(method, suffix, params)
+            if key is not None:
+                return self._fetch_cached(key, method, suffix, params)
 
-        resp = yield treq.request(
-            method, url, params=params, headers=headers, auth=auth
-        )
-        data = yield resp.json()
-        return data
+        return self._request(method, suffix, params)
 
-    def ticker(self, pair: str) -> Deferred:
-        """Returns the latest ticker indicators
+    def _fetch_cached(self, key, method: str, suffix: str, params: Dict) -> Deferred:
+        state, waiting = self.cache.begin(key, list)
+        if state == HIT:
+            return succeed(waiting)
 
-		Args:
-			pair: A currency pair
+        if state == WAIT:
+            d = Deferred()
+            waiting.append(d)
+            return d
 
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("get", "ticker", {"pair": pair})
+        def done(result):
+            failed = isinstance(result, Failure)
+            self.cache.finish(key, None if failed else result, failed=failed)
 
-    def tickers(self) -> Deferred:
-        """Returns the latest ticker indicators from all active Luno exchanges
+            for d in waiting:
+                d.callback(result)
 
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("get", "tickers")
+            return result
 
-    def order_book(self, pair: str) -> Deferred:
-        """Returns a list of bids and asks in the order book. Ask orders are sorted by price ascending. 
-		Bid orders are sorted by price descending. Note that multiple orders at the same price are not necessarily conflated
+        return self._request(method, suffix, params).addBoth(done)
 
-		Args:
-			pair: Currency pair e.g. XBTZAR
-
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("get", "orderbook", {"pair": pair})
-
-    def trades(self, pair: str, since: int = None) -> Deferred:
-        """Returns a list of the most recent trades. At most 100 results are returned per call
+    @inlineCallbacks
+    def _request(self, method: str, suffix: str, params: Dict) -> Deferred:
+        if method not in HEADERS:
+            raise UnsupportedHttpVerbException(f"http verb {method} is not supported")
 
-		Args:
-			pair: Currency pair e.g. XBTZAR
-			since: Fetch trades executed after this time, specified as a Unix timestamp in milliseconds
+        retry = None
+        if self.retry_policy is not None:
+            retry = self.retry_policy.begin(method, suffix)
 
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        params = {"pair": pair}
-        if since is not None:
-            params["since"] = since
+        url = f"{self.BASE_URI}{suffix}"
+        headers = HEADERS[method]
+        auth = (self.api_key, self.secret)
 
-        return self._fetch_resource("get", "trades", params)
+        while True:
+            timing = None
+            if self.instrumentation is not None:
+                timing = self.instrumentation.begin(method, suffix)
+
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve(method, suffix)
+                if wait > 0:
+                    yield deferLater(self.reactor, wait, lambda: None)
+
+            if timing is not None:
+                timing.mark("wait")
+
+            try:
+                resp = yield treq.request(
+                    method,
+                    url,
+                    params=params,
+                    headers=headers,
+                    auth=auth,
+                    pool=self.pool,
+                    reactor=self.reactor,
+                    timeout=None if retry is None else retry.timeout(),
+                )
+                if timing is not None:
+                    timing.mark("server")
+
+                body = yield resp.content()
+            except RETRY_EXCEPTIONS as e:
+                if timing is not None:
+                    self.instrumentation.finish(timing, error=e)
+
+                delay = None if retry is None else retry.next_delay()
+                if delay is None:
+                    raise
+
+                yield deferLater(self.reactor, delay, lambda: None)
+                continue
+
+            if timing is not None:
+                timing.mark("read")
+                timing.status = resp.code
+                timing.bytes = len(body)
+
+            if resp.code < 400:
+                try:
+                    return self.decoder(body)
+                finally:
+                    if timing is not None:
+                        timing.mark("decode")
+                        self.instrumentation.finish(timing)
+
+            if timing is not None:
+                self.instrumentation.finish(timing)
+
+            delay = None
+            if retry is not None:
+                retry_after = resp.headers.getRawHeaders("Retry-After", [None])[0]
+                delay = retry.next_delay(resp.code, retry_after)
+
+            if delay is None:
+                raise HttpStatusException(resp.code, body)
+
+            yield deferLater(self.reactor, delay, lambda: None)
+
+    def _parse(self, d: Deferred, model: type, key: str = None) -> Deferred:
+        """Converts a response into typed models when the client is in typed mode"""
+        if self.typed:
+            d.addCallback(parse_response, model, key)
+
+        return d
 
-    @requires_authentication
-    def accounts(self, currency: str, name: str) -> Deferred:
-        """Create an additional account for the specified currency
+    def ticker(self, pair: str) -> Deferred:
+        """Returns the latest ticker indicators
 
 		Args:
-			currency: The currency code for the account you want to create e.g. XBT, IDR, MYR, ZAR
-			name: The label to use for this account e.g. "Trading ACC".
-
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource(
-            "post", "trades", {"currency": currency, "name": name}
-        )
-
-    @requires_authentication
-    def balance(self) -> Deferred:
-        """Return the list of all accounts and their respective balances
+			pair: A currency pair
 
 		Returns:
-		    A twisted deferred which will eventually return a python dict
+		    A twisted deferred which will eventually return a python dict or a Ticker in typed mode
 		"""
-        return self._fetch_resource("get", "balance")
+        if self.ticker_batcher is not None:
+            d = self._batched_ticker(pair)
+            return self._parse(d, Ticker)
 
-    @requires_authentication
-    def transactions(self, account_id: int, min_row: int, max_row: int) -> Deferred:
-        """Return a list of transaction entries from an account.
+        d = self._fetch_resource("get", "ticker", {"pair": pair})
+        return self._parse(d, Ticker)
 
-		Transaction entry rows are numbered sequentially starting from 1, where 1 is the oldest entry. 
-		The range of rows to return are specified with the min_row (inclusive) and max_row (exclusive) parameters. 
-		At most 1000 rows can be requested per call.
+    def _batched_ticker(self, pair: str) -> Deferred:
+        leader, waiting = self.ticker_batcher.join(list)
+        d = Deferred()
+        waiting.append(d)
 
-		If min_row or max_row is non-positive, the range wraps around the most recent row. 
+        def fire(result):
+            for waiter in waiting:
+                waiter.callback(result)
 
-		For example, to fetch the 100 most recent rows, use min_row=-100 and max_row=0
+        def fetch():
+            self.ticker_batcher.close(waiting)
+            d = self._fetch_resource("get", "tickers")
+            d.addCallback(index_tickers)
+            d.addBoth(fire)
 
-		Args:
-			account_id: Account ID
-			min_row: Minimum of the row range to return (inclusive)
-			max_row: Maximum of the row range to return (exclusive)
+        if leader:
+            self.reactor.callLater(self.ticker_batcher.window, fetch)
 
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource(
-            "get",
-            f"accounts/{account_id}/transactions",
-            {"min_row": min_row, "max_row": max_row},
-        )
+        def select(tickers):
+            if pair in tickers:
+                return tickers[pair]
 
-    @requires_authentication
-    def list_orders(self) -> Deferred:
-        """Trading on the market is done by submitting trade orders. 
-		
-		After a new order has been created, it is submitted for processing by the order matching engine.
-		The order then either matches against an existing order in the order book and is filled or it rests in the order book until it is stopped. 
+            return self._fetch_resource("get", "ticker", {"pair": pair})
 
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("get", "listorders")
+        return d.addCallback(select)
 
-    @requires_authentication
-    def post_limit_order(
-        self,
-        pair: str,
-        kind: str,
-        volume: str,
-        price: str,
-        base_account_id: str = None,
-        counter_account_id: str = None,
-    ) -> Deferred:
-        """Create a new trade order
+    def order_book(self, pair: str, columnar: bool = False) -> Deferred:
+        """Returns a list of bids and asks in the order book. Ask orders are sorted by price ascending. 
+		Bid orders are sorted by price descending. Note that multiple orders at the same price are not necessarily conflated
 
-		If no base_account_id or counter_account_id are specified, your default base currency or counter currency account will be used. You can find your account IDs by calling the Balances API.
-		
 		Args:
-			pair: The currency pair to trade e.g. XBTZAR
-			kind: "BID" for a bid (buy) limit order or "ASK" for an ask (sell) limit order.
-			volume: unt of Bitcoin to buy or sell as a decimal string in units of BTC e.g. "1.423".
-			price: mit price as a decimal string in units of ZAR/BTC e.g. "1200".
-			base_account_id: The base currency account to use in the trade.
-			counter_account_id: The counter currency account to use in the trade.
+			pair: Currency pair e.g. XBTZAR
+			columnar: Return the bids and asks as price and volume arrays
 
 		Returns:
-		    A twisted deferred which will eventually return a python dict
+		    A twisted deferred which will eventually return a python dict or a ColumnarOrderBook if columnar is True
 		"""
-        params = {"pair": pair, "type": kind, "volume": volume, "price": price}
+        d = self._fetch_resource("get", "orderbook", {"pair": pair})
+        if columnar:
+            d.addCallback(ColumnarOrderBook.from_snapshot, pair)
 
-        if base_account_id is not None:
-            params["base_account_id"] = (base_account_id,)
+        return d
 
-        if counter_account_id is not None:
-            params["counter_account_id"] = counter_account_id
+    async def iter_trades(
+        self, pair: str, since: int, until: int = None, prefetch: bool = False
+    ) -> AsyncIterator[Dict]:
+        """Iterates over the trade history from a point in time, fetching a page of at most 100 trades at a time
 
-        return self._fetch_resource("post", "postorder", params)
+		Trades repeated at the boundary between pages are skipped and only the current page is held in memory.
+		The iterator must be consumed from a coroutine driven by twisted e.g. with Deferred.fromCoroutine.
 
-    @requires_authentication
-    def post_market_order(
-        self,
-        pair: str,
-        kind: str,
-        counter_volume: str = None,
-        base_volume: str = None,
-        base_account_id: str = None,
-        counter_account_id: str = None,
-    ) -> Deferred:
-        """
-		Create a new market order.
-
-		If no base_account_id or counter_account_id are specified, your default base currency or counter currency account will be used. You can find your account IDs by calling the Balances API.
-		
-		Note:
-			A market order executes immediately, and either buys as much bitcoin that can be bought for a set amount of fiat currency, or sells a set amount of bitcoin for as much fiat as possible.
-		
 		Args:
-			pair: The currency pair to trade e.g. XBTZAR
-			kind: "BUY" to buy bitcoin, or "SELL" to sell bitcoin.
-			counter_volume: - Required if kind is "BUY". Amount of local currency (e.g. ZAR, MYR) to spend as a decimal string in units of the local currency e.g. "100.50".
-			base_volume: - Required if kind is "SELL". Amount of Bitcoin to sell as a decimal string in units of BTC e.g. "1.423".
-			base_account_id: The base currency account to use in the trade.
-			counter_account_id: The counter currency account to use in the trade.
+			pair: Currency pair e.g. XBTZAR
+			since: Fetch trades executed after this time, specified as a Unix timestamp in milliseconds
+			until: Stop after this Unix timestamp in milliseconds
+			prefetch: Request the next page while the current page is consumed
 
 		Returns:
-			A twisted deferred which will eventually return a python dict
+		    An async iterator of trade dicts sorted by timestamp ascending
 		"""
-        if kind == "BUY" and counter_volume is None:
-            raise ValueError(f"counter_volume is required if the order type is 'BUY'")
+        pager = TradePager(pair, since, until)
+        pending = self._fetch_resource("get", "trades", pager.params())
 
-        if kind == "SELL" and base_volume is None:
-            raise ValueError(f"base_volume is required if the order type is 'SELL'")
+        try:
+            while True:
+                trades = pager.page(await pending)
+                pending = None
+                if prefetch and not pager.done:
+                    pending = self._fetch_resource("get", "trades", pager.params())
 
-        params = {
-            "pair": pair,
-            "type": kind,
-            "counter_volume": counter_volume,
-            "base_volume": base_volume,
-        }
+                for trade in trades:
+                    yield trade
 
-        if base_account_id is not None:
-            params["base_account_id"] = base_account_id
+                if pager.done:
+                    return
 
-        if counter_account_id is not None:
-            params["counter_account_id"] = counter_account_id
-
-        return self._fetch_resource("post", "marketorder", params)
+                if pending is None:
+                    pending = self._fetch_resource("get", "trades", pager.params())
+        finally:
+            if pending is not None:
+                pending.addErrback(lambda failure: None)
+                pending.cancel()
 
     @requires_authentication
-    def cancel_order(self, order_id: str) -> Deferred:
-        """Request to stop an order.
-			
-		Args:
-			order_id: The order reference as a string e.g. BXMC2CJ7HNB88U4
+    async def iter_transactions(
+        self,
+        account_id: int,
+        min_row: int = 1,
+        max_row: int = None,
+        concurrency: int = 8,
+    ) -> AsyncIterator[Dict]:
+        """Iterates over the transactions of an account, fetching windows of 1000 rows concurrently
 
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("post", "marketorder", {"order_id": order_id})
+		Rows are yielded in order and at most concurrency windows are requested at once.
+		The iterator must be consumed from a coroutine driven by twisted e.g. with Deferred.fromCoroutine.
 
-    @requires_authentication
-    def get_order(self, order_id: str) -> Deferred:
-        """Get an order by its id.
-			
 		Args:
-			order_id: The order ID
+			account_id: Account ID
+			min_row: Minimum of the row range to return (inclusive)
+			max_row: Maximum of the row range to return (exclusive), by default all rows up to the most recent row are returned
+			concurrency: The maximum number of windows fetched at once
 
 		Returns:
-		    A twisted deferred which will eventually return a python dict
+		    An async iterator of transaction dicts sorted by row index
 		"""
-        return self._fetch_resource("get", f"orders/{order_id}")
+        suffix = f"accounts/{account_id}/transactions"
 
-    @requires_authentication
-    def list_trades(self, pair: str, since: int = None, limit: int = None) -> Deferred:
-        """Returns a list of your recent trades for a given pair, sorted by oldest first.
-
-		Note:
-			- The 'type' in the response indicates the type of order that you placed in order to participate in the trade. Possible types include BID and ASK.
-			- If is_buy in the response is true, then the order which completed the trade (market taker) was a bid order.
-			- Results of this query may lag behind the latest data.
-			
-		Args:
-			pair: Filter to trades of this currency pair e.g. XBTZAR
-			since: Filter to trades on or after this timestamp, e.g. 1470810728478
-			limit: Limit to this number of trades (min 1, max 100, default 100)
+        if max_row is None:
+            latest = await self._fetch_resource(
+                "get", suffix, {"min_row": -1, "max_row": 0}
+            )
+            max_row = next_row(latest)
 
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        params = {"pair": pair}
+        pending = deque()
 
-        if since is not None:
-            params["since"] = since
+        try:
+            for start, end in row_windows(min_row, max_row):
+                params = {"min_row": start, "max_row": end}
+                pending.append(self._fetch_resource("get", suffix, params))
 
-        if limit is not None:
-            params["limit"] = limit
+                if len(pending) >= concurrency:
+                    for row in window_rows(await pending.popleft()):
+                        yield row
 
-        return self._fetch_resource("get", "listtrades", params=params)
+            while pending:
+                for row in window_rows(await pending.popleft()):
+                    yield row
+        finally:
+            for d in pending:
+                d.addErrback(lambda failure: None)
+                d.cancel()
 
     @requires_authentication
-    def fee_info(self, pair: str) -> Deferred:
-        """Returns your fees and 30 day trading volume (as of midnight) for a given pair.
-
-		Args:
-			pair: Filter to trades of this currency pair e.g. XBTZAR
-
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("get", "fee_info", params={"pair": pair})
+    @inlineCallbacks
+    def refresh_orders(self, tracker: OrderTracker) -> Deferred:
+        """Brings an order tracker up to date
 
-    @requires_authentication
-    def receive_addresses(self, asset: str, address: str = None) -> Deferred:
-        """Returns the default receive address associated with your account and the amount received via the address. 
-		You can specify an optional address parameter to return information for a non-default receive address. 
-		In the response, total_received is the total confirmed Bitcoin amount received excluding unconfirmed transactions. 
-		The total_unconfirmed is the total sum of unconfirmed receive transactions.
+		The pending orders are listed with a single request and orders which are no longer pending are resolved from list_trades, one request per pair unless a pair has more than a page of trades to go through. Orders which the trades do not show as filled are confirmed with one get_order request each, so the cost of a refresh does not grow with the number of open orders.
 
 		Args:
-			asset: Currency code of the asset e.g. XBT
-			address: Specific Bitcoin address to retrieve. If not provided, the default address will be used.
+			tracker: The order tracker to refresh, it may be shared with other clients
 
 		Returns:
-		    A twisted deferred which will eventually return a python dict
+		    A twisted deferred which will eventually return a list of the OrderEvent of the refresh
 		"""
-        return self._fetch_resource(
-            "get", "funding_address", params={"asset": asset, "address": address}
+        listing = yield self._fetch_resource("get", "listorders", tracker.params())
+        events = tracker.update(listing)
+
+        queries = tracker.trade_queries()
+        while queries:
+            responses = yield gatherResults(
+                [
+                    self._fetch_resource("get", "listtrades", params)
+                    for params in queries
+                ],
+                consumeErrors=True,
+            )
+            for params, trades in zip(queries, responses):
+                events.extend(tracker.resolve(params["pair"], trades))
+
+            queries = tracker.trade_queries()
+
+        orders = yield gatherResults(
+            [
+                self._fetch_resource("get", f"orders/{order_id}")
+                for order_id in tracker.order_queries()
+            ],
+            consumeErrors=True,
         )
+        for order in orders:
+            events.extend(tracker.confirm(order))
 
-    @requires_authentication
-    def create_receive_address(self, asset: str) -> Deferred:
-        """Allocates a new receive address to your account. 
-		There is a rate limit of 1 address per hour, but bursts of up to 10 addresses are allowed.
-
-		Args:
-			asset: Currency code of the asset e.g. XBT
-
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("post", "funding_address", params={"asset": asset})
+        return events
 
     @requires_authentication
-    def withdrawals(self) -> Deferred:
-        """Returns a list of withdrawal requests.
+    async def watch_orders(self, tracker: OrderTracker) -> AsyncIterator[OrderEvent]:
+        """Refreshes an order tracker on its adaptive schedule until the iterator is closed
 
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("get", "withdrawals")
-
-    @requires_authentication
-    def create_withdrawal_request(
-        self, kind: str, amount: str, beneficiary_id: str = None
-    ) -> Deferred:
-        """Creates a new withdrawal request
+		The iterator must be consumed from a coroutine driven by twisted e.g. with Deferred.fromCoroutine.
 
 		Args:
-			kind: Withdrawal types e.g. ZAR_EFT, NAD_EFT, KES_MPESA, MYR_IBG, IDR_LLG
-			amount: Amount to withdraw. The currency depends on the type.
-			beneficiary_id: The beneficiary ID of the bank account the withdrawal will be paid out to. This parameter is required if you have multiple bank accounts. Your bank account beneficiary ID can be found by clicking on the beneficiary name on the Beneficiaries page. 
+			tracker: The order tracker to refresh
 
 		Returns:
-		    A twisted deferred which will eventually return a python dict
+		    An async iterator of OrderEvent
 		"""
-        params = {"type": kind, "amount": amount, "beneficiary_id": beneficiary_id}
-
-        return self._fetch_resource("post", "withdrawals", params=params)
-
-    @requires_authentication
-    def withdrawal_request_status(self, withdrawal_id: int) -> Deferred:
-        """Returns the status of a particular withdrawal request.
+        while True:
+            for event in await self.refresh_orders(tracker):
+                yield event
 
-		Args:
-			withdrawal_id: Withdrawal ID to retrieve.
-
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("post", "withdrawals", {"id": withdrawal_id})
+            await deferLater(self.reactor, tracker.delay(), lambda: None)
 
     @requires_authentication
-    def cancel_withdrawal_request(self, withdrawal_id: int) -> Deferred:
-        """Cancel a withdrawal request. This can only be done if the request is still in state PENDING.
-
-		Args:
-			withdrawal_id: ID of the withdrawal to cancel.
-
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("delete", "withdrawals", {"id": withdrawal_id})
-
-    @requires_authentication
-    def send(
+    def post_orders(
         self,
-        amount: str,
-        currency: str,
-        address: str,
-        description: str = None,
-        message: str = None,
+        orders: Iterable[OrderSpec],
+        concurrency: int = 8,
+        rate: float = None,
+        progress: Progress = None,
     ) -> Deferred:
-        """
-
-		Args:
-			amount: Amount to send as a decimal string.
-			currency: Currency to send e.g. XBT
-			address: Destination Bitcoin address or email address to send to.
-			description: Description for the transaction to record on the account statement.
-			message: Message to send to the recipient. This is only relevant when sending to an email address.
-
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        params = {"amount": amount, "currency": currency, "address": address}
-
-        if description is not None:
-            params["description"] = description
-
-        if message is not None:
-            params["message"] = message
-
-        return self._fetch_resource("post", "withdrawals", params)
-
-    @requires_authentication
-    def create_quote(self, kind: str, base_amount: str, pair: str) -> Deferred:
-        """Creates a new quote to buy or sell a particular amount.
+        """Places many orders concurrently
 
-		You can specify either the exact amount that you want to pay or the exact amount that you want too receive.
-		For example, to buy exactly 0.1 Bitcoin using ZAR, you would create a quote to BUY 0.1 XBTZAR. The returned quote includes the appropriate ZAR amount. 
-		To buy Bitcoin using exactly ZAR 100, you would create a quote to SELL 100 ZARXBT. 
-		The returned quote specifies the Bitcoin as the counter amount that will be returned.
-		An error is returned if your account is not verified for the currency pair, or if your account would have insufficient balance to ever exercise the quote. 
+		At most concurrency orders are in flight at once so a ladder of orders takes roughly as long as the slowest order rather than the sum of all of them. The client's rate limiter and retry policy apply to every order. A failed order does not stop the others.
 
 		Args:
-			kind: Possible types: BUY, SELL
-			base_amount: Amount to buy or sell in the pair base currency.
-			pair: Currency pair to trade e.g. XBTZAR, XBTMYR. The pair can also be flipped if you want to buy or sell the counter currency (e.g. ZARXBT).
+			orders: LimitOrder and MarketOrder instances or dicts of post_limit_order() or post_market_order() arguments
+			concurrency: The maximum number of orders placed at once
+			rate: The maximum number of orders placed per second, unlimited by default
+			progress: Called with each BatchResult, the number of orders placed so far and the number of orders
 
 		Returns:
-		    A twisted deferred which will eventually return a python dict
+		    A twisted deferred which will eventually return a list of BatchResult in the order the orders were given
 		"""
-        params = {"type": kind, "base_amount": base_amount, "pair": pair}
-
-        return self._fetch_resource("post", "quotes", params)
+        batch = order_batch(orders, concurrency, rate, progress)
+        return self._run_batch(batch, lambda order: place(self, order))
 
     @requires_authentication
-    def get_quote(self, quote_id: int) -> Deferred:
-        """Get the latest status of a quote.
-
-		Args:
-			quote_id: ID of the quote to retrieve.
-
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("get", f"quotes/{quote_id}")
-
-    @requires_authentication
-    def exercise_quote(self, quote_id: int) -> Deferred:
-        """Exercise a quote to perform the trade. 
-
-		If there is sufficient balance available in your account, it will be debited and the counter amount credited.
-		An error is returned if the quote has expired or if you have insufficient available balance.
-
-		Args:
-			quote_id: ID of the quote to retrieve.
-
-		Returns:
-		    A twisted deferred which will eventually return a python dict
-		"""
-        return self._fetch_resource("put", f"quotes/{quote_id}")
+    def cancel_orders(
+        self,
+        pair: str = None,
+        side: str = None,
+        min_price: str = None,
+        max_price: str = None,
+        concurrency: int = 8,
+        rate: float = None,
+        progress: Progress = None,
+    ) -> Deferred:
+        """Stops open orders concurrently
 
-    @requires_authentication
-    def discard_quote(self, quote_id: int) -> Deferred:
-        """Discard a quote. Once a quote has been discarded, it cannot be exercised even if it has not expired yet.
+		Open orders are listed with a single list_orders request and every order matching all of the filters given is stopped, at most concurrency at once. With no filters every open order is stopped. A failed stop does not stop the others.
 
 		Args:
-			quote_id: ID of the quote to retrieve.
+			pair: Only stop orders in this currency pair e.g. XBTZAR
+			side: Only stop "BID" or only stop "ASK" orders
+			min_price: Only stop orders with a limit price at or above this price
+			max_price: Only stop orders with a limit price at or below this price
+			concurrency: The maximum number of orders stopped at once
+			rate: The maximum number of orders stopped per second, unlimited by default
+			progress: Called with each BatchResult, the number of orders stopped so far and the number of orders
 
 		Returns:
-		    A twisted deferred which will eventually return a python dict
+		    A twisted deferred which will eventually return a list of BatchResult in the order the orders were listed
 		"""
-        return self._fetch_resource("delete", f"quotes/{quote_id}")
+        selection = OrderFilter(pair, side, min_price, max_price)
+
+        def stop(response: Dict) -> Deferred:
+            order_ids = selection.select(response)
+            batch = Batch(order_ids, concurrency, rate, progress=progress)
+            return self._run_batch(batch, self.cancel_order)
+
+        d = self._fetch_resource("get", "listorders", selection.params())
+        d.addCallback(stop)
+        return d
+
+    def _run_batch(self, batch: Batch, call: Callable[[Any], Deferred]) -> Deferred:
+        @inlineCallbacks
+        def worker():
+            while True:
+                job = batch.take()
+                if job is None:
+                    return
+
+                index, item, wait = job
+                if wait > 0:
+                    yield deferLater(self.reactor, wait, lambda: None)
+
+                try:
+                    response = yield call(item)
+                except Exception as e:
+                    batch.finish(index, error=e)
+                else:
+                    batch.finish(index, response)
+
+        d = gatherResults([worker() for _ in range(batch.workers)], consumeErrors=True)
+        d.addCallback(lambda _: batch.results)
+        return d
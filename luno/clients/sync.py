@@ -1,477 +1,574 @@
+import threading
+import time
+
+from collections import deque
+from concurrent import futures
+from requests import Response
 from requests import Session
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError
+from requests.exceptions import Timeout
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from luno.batching import TickerBatcher
+from luno.batching import index_tickers
+from luno.bulk import Batch
+from luno.bulk import BatchResult
+from luno.bulk import OrderFilter
+from luno.bulk import OrderSpec
+from luno.bulk import Progress
+from luno.bulk import order_batch
+from luno.bulk import place
+from luno.cache import HIT
+from luno.cache import ResponseCache
+from luno.cache import WAIT
+from luno.clients.abc import HEADERS
 from luno.clients.abc import LunoClientBase
+from luno.decoders import Decoder
+from luno.decoders import get_decoder
 from luno.decorators import requires_authentication
+from luno.endpoints import SYNC
+from luno.endpoints import endpoint_methods
 from luno.exceptions import UnsupportedHttpVerbException
-
+from luno.instrumentation import Instrumentation
+from luno.instrumentation import RequestTiming
+from luno.models import Ticker
+from luno.models import parse_response
+from luno.orderbook import ColumnarOrderBook
+from luno.pagination import TradePager
+from luno.pagination import next_row
+from luno.pagination import row_windows
+from luno.pagination import window_rows
+from luno.ratelimit import RateLimiter
+from luno.retry import RetryPolicy
+from luno.tracker import OrderEvent
+from luno.tracker import OrderTracker
+
+from typing import Any
+from typing import Callable
 from typing import Dict
-
-
-class LunoSyncClient(LunoClientBase):
-    def __init__(self, api_key: str = None, secret: str = None) -> None:
-        self.api_key = api_key
-        self.secret = secret
-        self.session = Session()
-
-        if api_key is not None and secret is not None:
-            self.session.auth = HTTPBasicAuth(api_key, secret)
-
-    def _fetch_resource(self, method: str, suffix: str, params: Dict = {}) -> Dict:
-        url = f"{self.BASE_URI}{suffix}"
-        if method == "get":
-            resp = self.session.get(url, params=params)
-        elif method == "post":
-            resp = self.session.post(
-                url,
-                params=params,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
-        elif method == "delete":
-            resp = self.session.delete(
-                url,
-                params=params,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Union
+
+# failures after which the request may not have reached the exchange or its
+# response was lost, only retried for requests the retry policy deems safe
+RETRY_EXCEPTIONS = (ConnectionError, Timeout, ChunkedEncodingError)
+
+
+class PoolStatsAdapter(HTTPAdapter):
+    """An http adapter which counts the requests sent and the connections opened by its pools
+
+    The time spent opening connections, including the TLS handshake, is tracked per
+    thread so that it may be attributed to the request which opened the connection.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.requests_sent = 0
+        self.connections_opened = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+        classes = {}
+
+        for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items():
+
+            class Connection(pool_cls.ConnectionCls):
+                def connect(self) -> None:
+                    with adapter._lock:
+                        adapter.connections_opened += 1
+
+                    start = time.perf_counter()
+                    super().connect()
+                    local = adapter._local
+                    local.connect_time = getattr(local, "connect_time", 0.0) + (
+                        time.perf_counter() - start
+                    )
+
+            classes[scheme] = type(
+                pool_cls.__name__, (pool_cls,), {"ConnectionCls": Connection}
             )
-        elif method == "put":
-            resp = self.session.put(
-                url,
-                params=params,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
-        else:
-            raise UnsupportedHttpVerbException(f"http verb {method} is not supported")
-
-        resp.raise_for_status()
-
-        return resp.json()
 
-    def ticker(self, pair: str) -> Dict:
-        """Returns the latest ticker indicators
-
-		Args:
-			pair: A currency pair
-
-		Returns:
-		    A python dict of ticker indicators
-		"""
-        return self._fetch_resource("get", "ticker", {"pair": pair})
+        self.poolmanager.pool_classes_by_scheme = classes
 
-    def tickers(self) -> Dict:
-        """Returns the latest ticker indicators from all active Luno exchanges
+    def take_connect_time(self) -> float:
+        """Returns and resets the seconds the calling thread spent opening connections"""
+        connect_time = getattr(self._local, "connect_time", 0.0)
+        self._local.connect_time = 0.0
+        return connect_time
 
-		Returns:
-		    A python dict of ticker indicators
-		"""
-        return self._fetch_resource("get", "tickers")
+    def send(self, *args, **kwargs):
+        with self._lock:
+            self.requests_sent += 1
 
-    def order_book(self, pair: str) -> Dict:
-        """Returns a list of bids and asks in the order book. Ask orders are sorted by price ascending. 
-		Bid orders are sorted by price descending. Note that multiple orders at the same price are not necessarily conflated
+        return super().send(*args, **kwargs)
 
-		Args:
-			pair: Currency pair e.g. XBTZAR
-
-		Returns:
-		    A python dict of orders data
-		"""
-        return self._fetch_resource("get", "orderbook", {"pair": pair})
 
-    def trades(self, pair: str, since: int = None) -> Dict:
-        """Returns a list of the most recent trades. At most 100 results are returned per call
+@endpoint_methods(SYNC)
+class LunoSyncClient(LunoClientBase):
+    def __init__(
+        self,
+        api_key: str = None,
+        secret: str = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        rate_limiter: RateLimiter = None,
+        cache: ResponseCache = None,
+        ticker_batcher: TickerBatcher = None,
+        decoder: Decoder = None,
+        typed: bool = False,
+        retry_policy: RetryPolicy = None,
+        instrumentation: Instrumentation = None,
+        base_uri: str = None,
+    ) -> None:
+        """A Luno client built on a requests session
+
+		The session keeps a pool of connections per host which is shared by all threads using the client.
 
 		Args:
-			pair: Currency pair e.g. XBTZAR
-			since: Fetch trades executed after this time, specified as a Unix timestamp in milliseconds
-
-		Returns:
-		    A python dict of trade data
+			api_key: A Luno api key
+			secret: A Luno api secret
+			pool_connections: The number of host connection pools to cache
+			pool_maxsize: The maximum number of connections kept open per host
+			pool_block: Block when the pool has no free connections instead of opening a connection which is discarded after use
+			keep_alive: Set to False to close connections after every request
+			rate_limiter: Paces requests, it may be shared with other clients
+			cache: Caches public market data responses, it may be shared with other clients
+			ticker_batcher: Serves concurrent ticker() calls from a single tickers() request
+			decoder: Decodes json response bodies from bytes, the fastest installed decoder is used by default
+			typed: Return typed models from ticker(), trades(), balance(), transactions(), list_orders() and list_trades()
+			retry_policy: Retries failed requests, it may be shared with other clients
+			instrumentation: Times every request by phase, it may be shared with other clients
+			base_uri: The uri the api is served from e.g. a local fake exchange, defaults to BASE_URI
 		"""
-        params = {"pair": pair}
-        if since is not None:
-            params["since"] = since
-
-        return self._fetch_resource("get", "trades", params)
-
-    @requires_authentication
-    def accounts(self, currency: str, name: str) -> Dict:
-        """Create an additional account for the specified currency
-
-		Args:
-			currency: The currency code for the account you want to create e.g. XBT, IDR, MYR, ZAR
-			name: The label to use for this account e.g. "Trading ACC".
+        self.api_key = api_key
+        self.secret = secret
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.ticker_batcher = ticker_batcher
+        self.decoder = decoder or get_decoder()
+        self.typed = typed
+        self.retry_policy = retry_policy
+        self.instrumentation = instrumentation
+        if base_uri is not None:
+            self.BASE_URI = base_uri
 
-		Returns:
-		    A python dict of account data
-		"""
-        return self._fetch_resource(
-            "post", "accounts", {"currency": currency, "name": name}
+        self.session = Session()
+        self.adapter = PoolStatsAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
         )
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
 
-    @requires_authentication
-    def balance(self) -> Dict:
-        """Return the list of all accounts and their respective balances
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
 
-		Returns:
-		    A python dict of balance data
-		"""
-        return self._fetch_resource("get", "balance")
-
-    @requires_authentication
-    def transactions(self, account_id: int, min_row: int, max_row: int) -> Dict:
-        """Return a list of transaction entries from an account.
-
-		Transaction entry rows are numbered sequentially starting from 1, where 1 is the oldest entry. 
-		The range of rows to return are specified with the min_row (inclusive) and max_row (exclusive) parameters. 
-		At most 1000 rows can be requested per call.
-
-		If min_row or max_row is non-positive, the range wraps around the most recent row. 
+        if api_key is not None and secret is not None:
+            self.session.auth = HTTPBasicAuth(api_key, secret)
 
-		For example, to fetch the 100 most recent rows, use min_row=-100 and max_row=0
-
-		Args:
-			account_id: Account ID
-			min_row: Minimum of the row range to return (inclusive)
-			max_row: Maximum of the row range to return (exclusive)
+    def connection_stats(self) -> Dict:
+        """Returns counters for the connections opened and reused by the session
 
 		Returns:
-		    A python dict of transaction data
+		    A python dict with the number of requests made, connections opened and connections reused
 		"""
-        return self._fetch_resource(
-            "get",
-            f"accounts/{account_id}/transactions",
-            {"min_row": min_row, "max_row": max_row},
-        )
-
-    @requires_authentication
-    def list_orders(self) -> Dict:
-        """Trading on the market is done by submitting trade orders. 
-		
-		After a new order has been created, it is submitted for processing by the order matching engine.
-		The order then either matches against an existing order in the order book and is filled or it rests in the order book until it is stopped. 
+        requests = self.adapter.requests_sent
+        opened = self.adapter.connections_opened
 
-		Returns:
-		    A python dict of orders data
-		"""
-        return self._fetch_resource("get", "listorders")
+        return {"requests": requests, "opened": opened, "reused": requests - opened}
 
-    @requires_authentication
-    def post_limit_order(
-        self,
-        pair: str,
-        kind: str,
-        volume: str,
-        price: str,
-        base_account_id: str = None,
-        counter_account_id: str = None,
-    ) -> Dict:
-        """Create a new trade order
-
-		If no base_account_id or counter_account_id are specified, your default base currency or counter currency account will be used. You can find your account IDs by calling the Balances API.
-		
-		Args:
-			pair: The currency pair to trade e.g. XBTZAR
-			kind: "BID" for a bid (buy) limit order or "ASK" for an ask (sell) limit order.
-			volume: unt of Bitcoin to buy or sell as a decimal string in units of BTC e.g. "1.423".
-			price: mit price as a decimal string in units of ZAR/BTC e.g. "1200".
-			base_account_id: The base currency account to use in the trade.
-			counter_account_id: The counter currency account to use in the trade.
+    def _fetch_resource(self, method: str, suffix: str, params: Dict = {}) -> Dict:
+        if self.cache is not None:
+            key = self.cache.key(method, suffix, params)
+            if key is not None:
+                return self._fetch_cached(key, method, suffix, params)
+
+        return self._request(method, suffix, params)
+
+    def _fetch_cached(self, key, method: str, suffix: str, params: Dict) -> Dict:
+        state, obj = self.cache.begin(key, futures.Future)
+        if state == HIT:
+            return obj
+
+        if state == WAIT:
+            return obj.result()
+
+        try:
+            data = self._request(method, suffix, params)
+        except BaseException as e:
+            self.cache.finish(key, failed=True)
+            obj.set_exception(e)
+            raise
+
+        self.cache.finish(key, data)
+        obj.set_result(data)
+        return data
+
+    def _request(self, method: str, suffix: str, params: Dict) -> Dict:
+        retry = None
+        if self.retry_policy is not None:
+            retry = self.retry_policy.begin(method, suffix)
+
+        while True:
+            timing = None
+            if self.instrumentation is not None:
+                timing = self.instrumentation.begin(method, suffix)
+
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve(method, suffix)
+                if wait > 0:
+                    time.sleep(wait)
+
+            if timing is not None:
+                timing.mark("wait")
+                self.adapter.take_connect_time()
+
+            try:
+                timeout = None if retry is None else retry.timeout()
+                resp = self._send(method, suffix, params, timeout)
+            except RETRY_EXCEPTIONS as e:
+                if timing is not None:
+                    self.instrumentation.finish(timing, error=e)
+
+                delay = None if retry is None else retry.next_delay()
+                if delay is None:
+                    raise
+
+                time.sleep(delay)
+                continue
+
+            if timing is not None:
+                self._time_response(timing, resp)
+
+            if retry is not None and resp.status_code >= 400:
+                retry_after = resp.headers.get("Retry-After")
+                delay = retry.next_delay(resp.status_code, retry_after)
+                if delay is not None:
+                    if timing is not None:
+                        self.instrumentation.finish(timing)
+
+                    resp.close()
+                    time.sleep(delay)
+                    continue
+
+            try:
+                resp.raise_for_status()
+
+                return self.decoder(resp.content)
+            finally:
+                if timing is not None:
+                    timing.mark("decode")
+                    self.instrumentation.finish(timing)
+
+    def _time_response(self, timing: RequestTiming, resp: Response) -> None:
+        """Splits the time spent sending a request into the connect, server and read phases"""
+        elapsed = timing.lap()
+        connect = self.adapter.take_connect_time()
+        server = resp.elapsed.total_seconds() - connect
+        server = min(max(server, 0.0), elapsed - connect)
+
+        timing.add("connect", connect)
+        timing.add("server", server)
+        timing.add("read", max(elapsed - connect - server, 0.0))
+        timing.status = resp.status_code
+        timing.bytes = len(resp.content)
+
+    def _send(
+        self, method: str, suffix: str, params: Dict, timeout: float = None
+    ) -> Response:
+        if method not in HEADERS:
+            raise UnsupportedHttpVerbException(f"http verb {method} is not supported")
 
-		Returns:
-		    A python dict of order data
-		"""
-        params = {"pair": pair, "type": kind, "volume": volume, "price": price}
+        return self.session.request(
+            method.upper(),
+            f"{self.BASE_URI}{suffix}",
+            params=params,
+            headers=HEADERS[method],
+            timeout=timeout,
+        )
 
-        if base_account_id is not None:
-            params["base_account_id"] = (base_account_id,)
+    def _parse(self, data: Dict, model: type, key: str = None) -> Any:
+        """Converts a response into typed models when the client is in typed mode"""
+        if not self.typed:
+            return data
 
-        if counter_account_id is not None:
-            params["counter_account_id"] = counter_account_id
+        return parse_response(data, model, key)
 
-        return self._fetch_resource("post", "postorder", params)
+    def ticker(self, pair: str) -> Dict:
+        """Returns the latest ticker indicators
 
-    @requires_authentication
-    def post_market_order(
-        self,
-        pair: str,
-        kind: str,
-        counter_volume: str = None,
-        base_volume: str = None,
-        base_account_id: str = None,
-        counter_account_id: str = None,
-    ) -> Dict:
-        """
-		Create a new market order.
-
-		If no base_account_id or counter_account_id are specified, your default base currency or counter currency account will be used. You can find your account IDs by calling the Balances API.
-		
-		Note:
-			A market order executes immediately, and either buys as much bitcoin that can be bought for a set amount of fiat currency, or sells a set amount of bitcoin for as much fiat as possible.
-		
 		Args:
-			pair: The currency pair to trade e.g. XBTZAR
-			kind: "BUY" to buy bitcoin, or "SELL" to sell bitcoin.
-			counter_volume: - Required if kind is "BUY". Amount of local currency (e.g. ZAR, MYR) to spend as a decimal string in units of the local currency e.g. "100.50".
-			base_volume: - Required if kind is "SELL". Amount of Bitcoin to sell as a decimal string in units of BTC e.g. "1.423".
-			base_account_id: The base currency account to use in the trade.
-			counter_account_id: The counter currency account to use in the trade.
+			pair: A currency pair
 
 		Returns:
-			A python dict of order data		
+		    A python dict of ticker indicators or a Ticker in typed mode
 		"""
-        if kind == "BUY" and counter_volume is None:
-            raise ValueError(f"counter_volume is required if the order type is 'BUY'")
+        if self.ticker_batcher is not None:
+            data = self._batched_ticker(pair)
+            return self._parse(data, Ticker)
 
-        if kind == "SELL" and base_volume is None:
-            raise ValueError(f"base_volume is required if the order type is 'SELL'")
+        data = self._fetch_resource("get", "ticker", {"pair": pair})
+        return self._parse(data, Ticker)
 
-        params = {
-            "pair": pair,
-            "type": kind,
-            "counter_volume": counter_volume,
-            "base_volume": base_volume,
-        }
+    def _batched_ticker(self, pair: str) -> Dict:
+        leader, batch = self.ticker_batcher.join(futures.Future)
 
-        if base_account_id is not None:
-            params["base_account_id"] = base_account_id
+        if leader:
+            try:
+                time.sleep(self.ticker_batcher.window)
+                self.ticker_batcher.close(batch)
+                tickers = index_tickers(self._fetch_resource("get", "tickers"))
+            except BaseException as e:
+                self.ticker_batcher.close(batch)
+                batch.set_exception(e)
+                raise
 
-        if counter_account_id is not None:
-            params["counter_account_id"] = counter_account_id
+            batch.set_result(tickers)
 
-        return self._fetch_resource("post", "marketorder", params)
-
-    @requires_authentication
-    def cancel_order(self, order_id: str) -> Dict:
-        """Request to stop an order.
-			
-		Args:
-			order_id: The order reference as a string e.g. BXMC2CJ7HNB88U4
-
-		Returns:
-		    A python dict indicating success or failure
-		"""
-        return self._fetch_resource("post", "stoporder", {"order_id": order_id})
+        tickers = batch.result()
+        if pair in tickers:
+            return tickers[pair]
 
-    @requires_authentication
-    def get_order(self, order_id: str) -> Dict:
-        """Get an order by its id.
-			
-		Args:
-			order_id: The order ID
+        return self._fetch_resource("get", "ticker", {"pair": pair})
 
-		Returns:
-		    A python dict of order data
-		"""
-        return self._fetch_resource("get", f"orders/{order_id}")
+    def order_book(
+        self, pair: str, columnar: bool = False
+    ) -> Union[Dict, ColumnarOrderBook]:
+        """Returns a list of bids and asks in the order book. Ask orders are sorted by price ascending. 
+		Bid orders are sorted by price descending. Note that multiple orders at the same price are not necessarily conflated
 
-    @requires_authentication
-    def list_trades(self, pair: str, since: int = None, limit: int = None) -> Dict:
-        """Returns a list of your recent trades for a given pair, sorted by oldest first.
-
-		Note:
-			- The 'type' in the response indicates the type of order that you placed in order to participate in the trade. Possible types include BID and ASK.
-			- If is_buy in the response is true, then the order which completed the trade (market taker) was a bid order.
-			- Results of this query may lag behind the latest data.
-			
 		Args:
-			pair: Filter to trades of this currency pair e.g. XBTZAR
-			since: Filter to trades on or after this timestamp, e.g. 1470810728478
-			limit: Limit to this number of trades (min 1, max 100, default 100)
+			pair: Currency pair e.g. XBTZAR
+			columnar: Return the bids and asks as price and volume arrays
 
 		Returns:
-		    A python dict of order data
+		    A python dict of orders data or a ColumnarOrderBook if columnar is True
 		"""
-        params = {"pair": pair}
+        data = self._fetch_resource("get", "orderbook", {"pair": pair})
+        if columnar:
+            return ColumnarOrderBook.from_snapshot(data, pair)
 
-        if since is not None:
-            params["since"] = since
+        return data
 
-        if limit is not None:
-            params["limit"] = limit
+    def iter_trades(
+        self, pair: str, since: int, until: int = None, prefetch: bool = False
+    ) -> Iterator[Dict]:
+        """Iterates over the trade history from a point in time, fetching a page of at most 100 trades at a time
 
-        return self._fetch_resource("get", "listtrades", params=params)
-
-    @requires_authentication
-    def fee_info(self, pair: str) -> Dict:
-        """Returns your fees and 30 day trading volume (as of midnight) for a given pair.
+		Trades repeated at the boundary between pages are skipped and only the current page is held in memory.
 
 		Args:
-			pair: Filter to trades of this currency pair e.g. XBTZAR
+			pair: Currency pair e.g. XBTZAR
+			since: Fetch trades executed after this time, specified as a Unix timestamp in milliseconds
+			until: Stop after this Unix timestamp in milliseconds
+			prefetch: Fetch the next page on a background thread while the current page is consumed
 
 		Returns:
-		    A python dict of fee data
+		    A generator of trade dicts sorted by timestamp ascending
 		"""
-        return self._fetch_resource("get", "fee_info", params={"pair": pair})
+        pager = TradePager(pair, since, until)
+        executor = futures.ThreadPoolExecutor(max_workers=1) if prefetch else None
+        pending = None
 
-    @requires_authentication
-    def receive_addresses(self, asset: str, address: str = None) -> Dict:
-        """Returns the default receive address associated with your account and the amount received via the address. 
-		You can specify an optional address parameter to return information for a non-default receive address. 
-		In the response, total_received is the total confirmed Bitcoin amount received excluding unconfirmed transactions. 
-		The total_unconfirmed is the total sum of unconfirmed receive transactions.
-
-		Args:
-			asset: Currency code of the asset e.g. XBT
-			address: Specific Bitcoin address to retrieve. If not provided, the default address will be used.
+        try:
+            response = self._fetch_resource("get", "trades", pager.params())
 
-		Returns:
-		    A python dict of addresses
-		"""
-        return self._fetch_resource(
-            "get", "funding_address", params={"asset": asset, "address": address}
-        )
+            while True:
+                trades = pager.page(response)
+                if executor is not None and not pager.done:
+                    pending = executor.submit(
+                        self._fetch_resource, "get", "trades", pager.params()
+                    )
 
-    @requires_authentication
-    def create_receive_address(self, asset: str) -> Dict:
-        """Allocates a new receive address to your account. 
-		There is a rate limit of 1 address per hour, but bursts of up to 10 addresses are allowed.
+                yield from trades
 
-		Args:
-			asset: Currency code of the asset e.g. XBT
+                if pager.done:
+                    return
 
-		Returns:
-		    A python dict of address data
-		"""
-        return self._fetch_resource("post", "funding_address", params={"asset": asset})
+                if pending is not None:
+                    response = pending.result()
+                else:
+                    response = self._fetch_resource("get", "trades", pager.params())
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
 
     @requires_authentication
-    def withdrawals(self) -> Dict:
-        """Returns a list of withdrawal requests.
-
-		Returns:
-		    A python dict of withdrawal data
-		"""
-        return self._fetch_resource("get", "withdrawals")
+    def iter_transactions(
+        self,
+        account_id: int,
+        min_row: int = 1,
+        max_row: int = None,
+        concurrency: int = 8,
+    ) -> Iterator[Dict]:
+        """Iterates over the transactions of an account, fetching windows of 1000 rows concurrently
 
-    @requires_authentication
-    def create_withdrawal_request(
-        self, kind: str, amount: str, beneficiary_id: str = None
-    ) -> Dict:
-        """Creates a new withdrawal request
+		The row range is split into windows which are fetched by a pool of threads. Rows are yielded in order and at most concurrency windows are held in memory.
 
 		Args:
-			kind: Withdrawal types e.g. ZAR_EFT, NAD_EFT, KES_MPESA, MYR_IBG, IDR_LLG
-			amount: Amount to withdraw. The currency depends on the type.
-			beneficiary_id: The beneficiary ID of the bank account the withdrawal will be paid out to. This parameter is required if you have multiple bank accounts. Your bank account beneficiary ID can be found by clicking on the beneficiary name on the Beneficiaries page. 
+			account_id: Account ID
+			min_row: Minimum of the row range to return (inclusive)
+			max_row: Maximum of the row range to return (exclusive), by default all rows up to the most recent row are returned
+			concurrency: The maximum number of windows fetched at once
 
 		Returns:
-		    A python dict of withdrawal request data
+		    A generator of transaction dicts sorted by row index
 		"""
-        params = {"type": kind, "amount": amount, "beneficiary_id": beneficiary_id}
+        suffix = f"accounts/{account_id}/transactions"
 
-        return self._fetch_resource("post", "withdrawals", params=params)
+        if max_row is None:
+            latest = self._fetch_resource("get", suffix, {"min_row": -1, "max_row": 0})
+            max_row = next_row(latest)
 
-    @requires_authentication
-    def withdrawal_request_status(self, withdrawal_id: int) -> Dict:
-        """Returns the status of a particular withdrawal request.
+        windows = row_windows(min_row, max_row)
+        pending = deque()
 
-		Args:
-			withdrawal_id: Withdrawal ID to retrieve.
+        with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                for window in windows:
+                    params = {"min_row": window[0], "max_row": window[1]}
+                    pending.append(
+                        executor.submit(self._fetch_resource, "get", suffix, params)
+                    )
 
-		Returns:
-		    A python dict of withdrawal request data
-		"""
-        return self._fetch_resource("get", f"withdrawals/{withdrawal_id}")
+                    if len(pending) >= concurrency:
+                        yield from window_rows(pending.popleft().result())
 
-    @requires_authentication
-    def cancel_withdrawal_request(self, withdrawal_id: int) -> Dict:
-        """Cancel a withdrawal request. This can only be done if the request is still in state PENDING.
-
-		Args:
-			withdrawal_id: ID of the withdrawal to cancel.
-
-		Returns:
-		    A python dict of withdrawal request data
-		"""
-        return self._fetch_resource("delete", f"withdrawals/{withdrawal_id}")
+                while pending:
+                    yield from window_rows(pending.popleft().result())
+            finally:
+                for future in pending:
+                    future.cancel()
 
     @requires_authentication
-    def send(
-        self,
-        amount: str,
-        currency: str,
-        address: str,
-        description: str = None,
-        message: str = None,
-    ) -> Dict:
-        """
+    def refresh_orders(self, tracker: OrderTracker) -> List[OrderEvent]:
+        """Brings an order tracker up to date
+
+		The pending orders are listed with a single request and orders which are no longer pending are resolved from list_trades, one request per pair unless a pair has more than a page of trades to go through. Orders which the trades do not show as filled are confirmed with one get_order request each, so the cost of a refresh does not grow with the number of open orders.
 
 		Args:
-			amount: Amount to send as a decimal string.
-			currency: Currency to send e.g. XBT
-			address: Destination Bitcoin address or email address to send to.
-			description: Description for the transaction to record on the account statement.
-			message: Message to send to the recipient. This is only relevant when sending to an email address.
+			tracker: The order tracker to refresh, it may be shared with other clients
 
 		Returns:
-		    A python dict of indicating the status of the send request
+		    A list of the OrderEvent of the refresh, which are also passed to the tracker's observers
 		"""
-        params = {"amount": amount, "currency": currency, "address": address}
+        listing = self._fetch_resource("get", "listorders", tracker.params())
+        events = tracker.update(listing)
 
-        if description is not None:
-            params["description"] = description
+        queries = tracker.trade_queries()
+        while queries:
+            for params in queries:
+                trades = self._fetch_resource("get", "listtrades", params)
+                events.extend(tracker.resolve(params["pair"], trades))
 
-        if message is not None:
-            params["message"] = message
+            queries = tracker.trade_queries()
 
-        return self._fetch_resource("post", "send", params)
-
-    @requires_authentication
-    def create_quote(self, kind: str, base_amount: str, pair: str) -> Dict:
-        """Creates a new quote to buy or sell a particular amount.
+        for order_id in tracker.order_queries():
+            order = self._fetch_resource("get", f"orders/{order_id}")
+            events.extend(tracker.confirm(order))
 
-		You can specify either the exact amount that you want to pay or the exact amount that you want too receive.
-		For example, to buy exactly 0.1 Bitcoin using ZAR, you would create a quote to BUY 0.1 XBTZAR. The returned quote includes the appropriate ZAR amount. 
-		To buy Bitcoin using exactly ZAR 100, you would create a quote to SELL 100 ZARXBT. 
-		The returned quote specifies the Bitcoin as the counter amount that will be returned.
-		An error is returned if your account is not verified for the currency pair, or if your account would have insufficient balance to ever exercise the quote. 
-
-		Args:
-			kind: Possible types: BUY, SELL
-			base_amount: Amount to buy or sell in the pair base currency.
-			pair: Currency pair to trade e.g. XBTZAR, XBTMYR. The pair can also be flipped if you want to buy or sell the counter currency (e.g. ZARXBT).
-
-		Returns:
-		    A python dict of quote data
-		"""
-        params = {"type": kind, "base_amount": base_amount, "pair": pair}
-
-        return self._fetch_resource("post", "quotes", params)
+        return events
 
     @requires_authentication
-    def get_quote(self, quote_id: int) -> Dict:
-        """Get the latest status of a quote.
+    def watch_orders(self, tracker: OrderTracker) -> Iterator[OrderEvent]:
+        """Refreshes an order tracker on its adaptive schedule until the generator is closed
 
 		Args:
-			quote_id: ID of the quote to retrieve.
+			tracker: The order tracker to refresh
 
 		Returns:
-		    A python dict of quote data
+		    A generator of OrderEvent
 		"""
-        return self._fetch_resource("get", f"quotes/{quote_id}")
+        while True:
+            yield from self.refresh_orders(tracker)
+            time.sleep(tracker.delay())
 
     @requires_authentication
-    def exercise_quote(self, quote_id: int) -> Dict:
-        """Exercise a quote to perform the trade. 
+    def post_orders(
+        self,
+        orders: Iterable[OrderSpec],
+        concurrency: int = 8,
+        rate: float = None,
+        progress: Progress = None,
+    ) -> List[BatchResult]:
+        """Places many orders concurrently
 
-		If there is sufficient balance available in your account, it will be debited and the counter amount credited.
-		An error is returned if the quote has expired or if you have insufficient available balance.
+		Orders are placed by a pool of threads so a ladder of orders takes roughly as long as the slowest order rather than the sum of all of them. The client's rate limiter and retry policy apply to every order. A failed order does not stop the others.
 
 		Args:
-			quote_id: ID of the quote to retrieve.
+			orders: LimitOrder and MarketOrder instances or dicts of post_limit_order() or post_market_order() arguments
+			concurrency: The maximum number of orders placed at once, keep it at or below pool_maxsize
+			rate: The maximum number of orders placed per second, unlimited by default
+			progress: Called with each BatchResult, the number of orders placed so far and the number of orders, from the worker threads
 
 		Returns:
-		    A python dict of quote data
+		    A list of BatchResult in the order the orders were given, each holding the response or the error of an order
 		"""
-        return self._fetch_resource("put", f"quotes/{quote_id}")
+        batch = order_batch(orders, concurrency, rate, progress)
+        return self._run_batch(batch, lambda order: place(self, order))
 
     @requires_authentication
-    def discard_quote(self, quote_id: int) -> Dict:
-        """Discard a quote. Once a quote has been discarded, it cannot be exercised even if it has not expired yet.
+    def cancel_orders(
+        self,
+        pair: str = None,
+        side: str = None,
+        min_price: str = None,
+        max_price: str = None,
+        concurrency: int = 8,
+        rate: float = None,
+        progress: Progress = None,
+    ) -> List[BatchResult]:
+        """Stops open orders concurrently
+
+		Open orders are listed with a single list_orders request and every order matching all of the filters given is stopped by a pool of threads, with no filters every open order is stopped. A failed stop does not stop the others.
 
 		Args:
-			quote_id: ID of the quote to retrieve.
+			pair: Only stop orders in this currency pair e.g. XBTZAR
+			side: Only stop "BID" or only stop "ASK" orders
+			min_price: Only stop orders with a limit price at or above this price
+			max_price: Only stop orders with a limit price at or below this price
+			concurrency: The maximum number of orders stopped at once, keep it at or below pool_maxsize
+			rate: The maximum number of orders stopped per second, unlimited by default
+			progress: Called with each BatchResult, the number of orders stopped so far and the number of orders, from the worker threads
 
 		Returns:
-		    A python dict of quote data
+		    A list of BatchResult in the order the orders were listed, the item of each is an order id
 		"""
-        return self._fetch_resource("delete", f"quotes/{quote_id}")
+        selection = OrderFilter(pair, side, min_price, max_price)
+        response = self._fetch_resource("get", "listorders", selection.params())
+
+        batch = Batch(selection.select(response), concurrency, rate, progress=progress)
+        return self._run_batch(batch, self.cancel_order)
+
+    def _run_batch(self, batch: Batch, call: Callable[[Any], Any]) -> List[BatchResult]:
+        def worker() -> None:
+            while True:
+                job = batch.take()
+                if job is None:
+                    return
+
+                index, item, wait = job
+                if wait > 0:
+                    time.sleep(wait)
+
+                try:
+                    response = call(item)
+                except Exception as e:
+                    batch.finish(index, error=e)
+                else:
+                    batch.finish(index, response)
+
+        with futures.ThreadPoolExecutor(max_workers=batch.workers) as executor:
+            for future in [executor.submit(worker) for _ in range(batch.workers)]:
+                future.result()
+
+        return batch.results
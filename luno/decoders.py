@@ -0,0 +1,50 @@
+import json
+
+from luno.lazy import lazy_import
+from typing import Any
+from typing import Callable
+
+Decoder = Callable[[bytes], Any]
+
+orjson = lazy_import("orjson", optional=True)
+ujson = lazy_import("ujson", optional=True)
+
+
+# the decoders are wrapped so that the modules are only loaded once used
+def _orjson_loads(data: bytes) -> Any:
+    return orjson.loads(data)
+
+
+def _ujson_loads(data: bytes) -> Any:
+    return ujson.loads(data)
+
+
+DECODERS = {"json": json.loads}
+
+if ujson is not None:
+    DECODERS["ujson"] = _ujson_loads
+
+if orjson is not None:
+    DECODERS["orjson"] = _orjson_loads
+
+PREFERENCE = ("orjson", "ujson", "json")
+
+
+def get_decoder(name: str = None) -> Decoder:
+    """Returns a function which decodes a json response body from bytes
+
+    Args:
+        name: One of orjson, ujson or json, the fastest installed decoder is returned by default
+
+    Returns:
+        A function which accepts the raw response body
+    """
+    if name is None:
+        name = next(name for name in PREFERENCE if name in DECODERS)
+
+    if name not in DECODERS:
+        raise ValueError(
+            f"decoder {name} is not available, expected one of {sorted(DECODERS)}"
+        )
+
+    return DECODERS[name]
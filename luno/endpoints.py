@@ -0,0 +1,690 @@
+import ast
+import inspect
+import string
+
+from luno.decorators import requires_authentication
+from luno.models import Balance
+from luno.models import Order
+from luno.models import Trade
+from luno.models import Transaction
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Generator
+from typing import List
+from typing import Tuple
+
+SYNC = "sync"
+TWISTED = "twisted"
+ASYNCIO = "asyncio"
+
+# the return annotation of the generated methods of each client
+RETURNS = {SYNC: "Dict", TWISTED: "Deferred", ASYNCIO: "Dict"}
+
+
+class Endpoint:
+    """A Luno api endpoint which the clients expose as a method
+
+    The signature lists the method arguments as they are written in a def
+    statement. Arguments named in the path template are formatted into the uri,
+    the others are sent as params, those which default to None are left out when
+    they are None. Arguments which depend on each other are validated by a check
+    function called before the request.
+
+    Args:
+        name: The client method name e.g. list_trades
+        verb: The http verb i.e. get, post, put, delete
+        path: The uri suffix, placeholders name method arguments e.g. orders/{order_id}
+        signature: The method arguments e.g. "pair: str, since: int = None"
+        rename: Maps arguments to the params they are sent as e.g. {"kind": "type"}
+        auth: Whether the endpoint requires authentication
+        model: The model responses are converted into in typed mode
+        key: The response key holding the rows converted into models
+        doc: The method docstring without its Returns section
+        returns: What the response holds e.g. "A python dict of order data"
+        check: Called with the method arguments as keywords, raises ValueError if they are invalid
+    """
+
+    __slots__ = (
+        "name",
+        "verb",
+        "path",
+        "signature",
+        "rename",
+        "auth",
+        "model",
+        "key",
+        "doc",
+        "returns",
+        "check",
+        "arguments",
+        "placeholders",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        verb: str,
+        path: str,
+        signature: str = "",
+        rename: Dict[str, str] = None,
+        auth: bool = True,
+        model: type = None,
+        key: str = None,
+        doc: str = "",
+        returns: str = "A python dict",
+        check: Callable[..., None] = None,
+    ) -> None:
+        self.name = name
+        self.verb = verb
+        self.path = path
+        self.signature = signature
+        self.rename = rename or {}
+        self.auth = auth
+        self.model = model
+        self.key = key
+        self.doc = inspect.cleandoc(doc)
+        self.returns = returns
+        self.check = check
+        self.arguments = _arguments(signature)
+        self.placeholders = [
+            field for _, field, _, _ in string.Formatter().parse(path) if field
+        ]
+
+        unknown = set(self.placeholders) - {argument for argument, _ in self.arguments}
+        if unknown:
+            raise ValueError(f"{name} path {path!r} names unknown arguments {unknown}")
+
+    @property
+    def params(self) -> List[Tuple[str, bool]]:
+        """The (argument, optional) pairs sent as params"""
+        return [
+            (argument, optional)
+            for argument, optional in self.arguments
+            if argument not in self.placeholders
+        ]
+
+    def source(self, flavour: str = SYNC) -> str:
+        """Returns the source of the client method
+
+        The path is written as an f-string and the params as a dict literal so a
+        call does no more work than a method written by hand.
+
+        Args:
+            flavour: The client the method is for i.e. sync, twisted or asyncio
+        """
+        prefix = "async def" if flavour == ASYNCIO else "def"
+        arguments = f"self, {self.signature}" if self.signature else "self"
+        lines = [f"{prefix} {self.name}({arguments}) -> {RETURNS[flavour]!r}:"]
+
+        if self.check is not None:
+            keywords = ", ".join(
+                f"{argument}={argument}" for argument, _ in self.arguments
+            )
+            lines.append(f"    CHECK({keywords})")
+
+        params = self.params
+        if params:
+            required = ", ".join(
+                f"{self.rename.get(argument, argument)!r}: {argument}"
+                for argument, optional in params
+                if not optional
+            )
+            lines.append(f"    params = {{{required}}}")
+
+            for argument, optional in params:
+                if optional:
+                    key = self.rename.get(argument, argument)
+                    lines.append(f"    if {argument} is not None:")
+                    lines.append(f"        params[{key!r}] = {argument}")
+
+        path = f"f{self.path!r}" if self.placeholders else repr(self.path)
+        call = f"self._fetch_resource({self.verb!r}, {path}"
+        call += ", params)" if params else ")"
+        if flavour == ASYNCIO:
+            call = f"await {call}"
+
+        if self.model is not None:
+            call = f"self._parse({call}, MODEL, {self.key!r})"
+
+        lines.append(f"    return {call}")
+        return "\n".join(lines) + "\n"
+
+    def build(self, flavour: str = SYNC, owner: type = None) -> Callable:
+        """Compiles the client method
+
+        Args:
+            flavour: The client the method is for i.e. sync, twisted or asyncio
+            owner: The client class the method is added to
+        """
+        namespace = {"MODEL": self.model, "CHECK": self.check}
+        exec(
+            compile(self.source(flavour), f"<endpoint {self.name}>", "exec"), namespace
+        )
+        method = namespace[self.name]
+
+        returns = self.returns
+        if flavour == TWISTED:
+            returns = returns[0].lower() + returns[1:]
+            returns = f"A twisted deferred which will eventually return {returns}"
+
+        method.__doc__ = f"{self.doc}\n\nReturns:\n    {returns}"
+        if owner is not None:
+            method.__module__ = owner.__module__
+            method.__qualname__ = f"{owner.__name__}.{self.name}"
+
+        if self.auth:
+            method = requires_authentication(method)
+
+        return method
+
+    def __repr__(self) -> str:
+        return f"<Endpoint {self.name} {self.verb.upper()} {self.path}>"
+
+
+def _arguments(signature: str) -> List[Tuple[str, bool]]:
+    """Returns the (name, optional) pairs of a signature, optional arguments default to None"""
+    if not signature:
+        return []
+
+    tree = ast.parse(f"def f({signature}): pass")
+    args = tree.body[0].args
+    required = len(args.args) - len(args.defaults)
+
+    arguments = []
+    for index, arg in enumerate(args.args):
+        optional = index >= required
+        if optional:
+            default = args.defaults[index - required]
+            if not (isinstance(default, ast.Constant) and default.value is None):
+                raise ValueError(f"{arg.arg} must default to None in {signature!r}")
+
+        arguments.append((arg.arg, optional))
+
+    return arguments
+
+
+def _market_order_volume(
+    kind: str, counter_volume: str = None, base_volume: str = None, **arguments
+) -> None:
+    """Checks that a market order has the volume its kind is placed with"""
+    if kind == "BUY" and counter_volume is None:
+        raise ValueError("counter_volume is required if the order type is 'BUY'")
+
+    if kind == "SELL" and base_volume is None:
+        raise ValueError("base_volume is required if the order type is 'SELL'")
+
+
+ENDPOINTS = (
+    Endpoint(
+        "tickers",
+        "get",
+        "tickers",
+        auth=False,
+        doc="Returns the latest ticker indicators from all active Luno exchanges",
+        returns="A python dict of ticker indicators",
+    ),
+    Endpoint(
+        "trades",
+        "get",
+        "trades",
+        "pair: str, since: int = None",
+        auth=False,
+        model=Trade,
+        key="trades",
+        doc="""Returns a list of the most recent trades. At most 100 results are returned per call
+
+        Args:
+            pair: Currency pair e.g. XBTZAR
+            since: Fetch trades executed after this time, specified as a Unix timestamp in milliseconds
+        """,
+        returns="A python dict of trade data or a list of Trade models in typed mode",
+    ),
+    Endpoint(
+        "accounts",
+        "post",
+        "accounts",
+        "currency: str, name: str",
+        doc="""Create an additional account for the specified currency
+
+        Args:
+            currency: The currency code for the account you want to create e.g. XBT, IDR, MYR, ZAR
+            name: The label to use for this account e.g. "Trading ACC".
+        """,
+        returns="A python dict of account data",
+    ),
+    Endpoint(
+        "balance",
+        "get",
+        "balance",
+        model=Balance,
+        key="balance",
+        doc="Return the list of all accounts and their respective balances",
+        returns="A python dict of balance data or a list of Balance models in typed mode",
+    ),
+    Endpoint(
+        "transactions",
+        "get",
+        "accounts/{account_id}/transactions",
+        "account_id: int, min_row: int, max_row: int",
+        model=Transaction,
+        key="transactions",
+        doc="""Return a list of transaction entries from an account.
+
+        Transaction entry rows are numbered sequentially starting from 1, where 1 is the oldest entry.
+        The range of rows to return are specified with the min_row (inclusive) and max_row (exclusive) parameters.
+        At most 1000 rows can be requested per call.
+
+        If min_row or max_row is non-positive, the range wraps around the most recent row.
+
+        For example, to fetch the 100 most recent rows, use min_row=-100 and max_row=0
+
+        Args:
+            account_id: Account ID
+            min_row: Minimum of the row range to return (inclusive)
+            max_row: Maximum of the row range to return (exclusive)
+        """,
+        returns="A python dict of transaction data or a list of Transaction models in typed mode",
+    ),
+    Endpoint(
+        "list_orders",
+        "get",
+        "listorders",
+        model=Order,
+        key="orders",
+        doc="""Trading on the market is done by submitting trade orders.
+
+        After a new order has been created, it is submitted for processing by the order matching engine.
+        The order then either matches against an existing order in the order book and is filled or it rests in the order book until it is stopped.
+        """,
+        returns="A python dict of orders data or a list of Order models in typed mode",
+    ),
+    Endpoint(
+        "post_limit_order",
+        "post",
+        "postorder",
+        "pair: str, kind: str, volume: str, price: str, "
+        "base_account_id: str = None, counter_account_id: str = None",
+        rename={"kind": "type"},
+        doc="""Create a new trade order
+
+        If no base_account_id or counter_account_id are specified, your default base currency or counter currency account will be used. You can find your account IDs by calling the Balances API.
+
+        Args:
+            pair: The currency pair to trade e.g. XBTZAR
+            kind: "BID" for a bid (buy) limit order or "ASK" for an ask (sell) limit order.
+            volume: Amount of Bitcoin to buy or sell as a decimal string in units of BTC e.g. "1.423".
+            price: Limit price as a decimal string in units of ZAR/BTC e.g. "1200".
+            base_account_id: The base currency account to use in the trade.
+            counter_account_id: The counter currency account to use in the trade.
+        """,
+        returns="A python dict of order data",
+    ),
+    Endpoint(
+        "post_market_order",
+        "post",
+        "marketorder",
+        "pair: str, kind: str, counter_volume: str = None, base_volume: str = None, "
+        "base_account_id: str = None, counter_account_id: str = None",
+        rename={"kind": "type"},
+        check=_market_order_volume,
+        doc="""Create a new market order.
+
+        If no base_account_id or counter_account_id are specified, your default base currency or counter currency account will be used. You can find your account IDs by calling the Balances API.
+
+        Note:
+            A market order executes immediately, and either buys as much bitcoin that can be bought for a set amount of fiat currency, or sells a set amount of bitcoin for as much fiat as possible.
+
+        Args:
+            pair: The currency pair to trade e.g. XBTZAR
+            kind: "BUY" to buy bitcoin, or "SELL" to sell bitcoin.
+            counter_volume: - Required if kind is "BUY". Amount of local currency (e.g. ZAR, MYR) to spend as a decimal string in units of the local currency e.g. "100.50".
+            base_volume: - Required if kind is "SELL". Amount of Bitcoin to sell as a decimal string in units of BTC e.g. "1.423".
+            base_account_id: The base currency account to use in the trade.
+            counter_account_id: The counter currency account to use in the trade.
+        """,
+        returns="A python dict of order data",
+    ),
+    Endpoint(
+        "cancel_order",
+        "post",
+        "stoporder",
+        "order_id: str",
+        doc="""Request to stop an order.
+
+        Args:
+            order_id: The order reference as a string e.g. BXMC2CJ7HNB88U4
+        """,
+        returns="A python dict indicating success or failure",
+    ),
+    Endpoint(
+        "get_order",
+        "get",
+        "orders/{order_id}",
+        "order_id: str",
+        doc="""Get an order by its id.
+
+        Args:
+            order_id: The order ID
+        """,
+        returns="A python dict of order data",
+    ),
+    Endpoint(
+        "list_trades",
+        "get",
+        "listtrades",
+        "pair: str, since: int = None, limit: int = None",
+        model=Trade,
+        key="trades",
+        doc="""Returns a list of your recent trades for a given pair, sorted by oldest first.
+
+        Note:
+            - The 'type' in the response indicates the type of order that you placed in order to participate in the trade. Possible types include BID and ASK.
+            - If is_buy in the response is true, then the order which completed the trade (market taker) was a bid order.
+            - Results of this query may lag behind the latest data.
+
+        Args:
+            pair: Filter to trades of this currency pair e.g. XBTZAR
+            since: Filter to trades on or after this timestamp, e.g. 1470810728478
+            limit: Limit to this number of trades (min 1, max 100, default 100)
+        """,
+        returns="A python dict of trade data or a list of Trade models in typed mode",
+    ),
+    Endpoint(
+        "fee_info",
+        "get",
+        "fee_info",
+        "pair: str",
+        doc="""Returns your fees and 30 day trading volume (as of midnight) for a given pair.
+
+        Args:
+            pair: Filter to trades of this currency pair e.g. XBTZAR
+        """,
+        returns="A python dict of fee data",
+    ),
+    Endpoint(
+        "receive_addresses",
+        "get",
+        "funding_address",
+        "asset: str, address: str = None",
+        doc="""Returns the default receive address associated with your account and the amount received via the address.
+        You can specify an optional address parameter to return information for a non-default receive address.
+        In the response, total_received is the total confirmed Bitcoin amount received excluding unconfirmed transactions.
+        The total_unconfirmed is the total sum of unconfirmed receive transactions.
+
+        Args:
+            asset: Currency code of the asset e.g. XBT
+            address: Specific Bitcoin address to retrieve. If not provided, the default address will be used.
+        """,
+        returns="A python dict of addresses",
+    ),
+    Endpoint(
+        "create_receive_address",
+        "post",
+        "funding_address",
+        "asset: str",
+        doc="""Allocates a new receive address to your account.
+        There is a rate limit of 1 address per hour, but bursts of up to 10 addresses are allowed.
+
+        Args:
+            asset: Currency code of the asset e.g. XBT
+        """,
+        returns="A python dict of address data",
+    ),
+    Endpoint(
+        "withdrawals",
+        "get",
+        "withdrawals",
+        doc="Returns a list of withdrawal requests.",
+        returns="A python dict of withdrawal data",
+    ),
+    Endpoint(
+        "create_withdrawal_request",
+        "post",
+        "withdrawals",
+        "kind: str, amount: str, beneficiary_id: str = None",
+        rename={"kind": "type"},
+        doc="""Creates a new withdrawal request
+
+        Args:
+            kind: Withdrawal types e.g. ZAR_EFT, NAD_EFT, KES_MPESA, MYR_IBG, IDR_LLG
+            amount: Amount to withdraw. The currency depends on the type.
+            beneficiary_id: The beneficiary ID of the bank account the withdrawal will be paid out to. This parameter is required if you have multiple bank accounts. Your bank account beneficiary ID can be found by clicking on the beneficiary name on the Beneficiaries page.
+        """,
+        returns="A python dict of withdrawal request data",
+    ),
+    Endpoint(
+        "withdrawal_request_status",
+        "get",
+        "withdrawals/{withdrawal_id}",
+        "withdrawal_id: int",
+        doc="""Returns the status of a particular withdrawal request.
+
+        Args:
+            withdrawal_id: Withdrawal ID to retrieve.
+        """,
+        returns="A python dict of withdrawal request data",
+    ),
+    Endpoint(
+        "cancel_withdrawal_request",
+        "delete",
+        "withdrawals/{withdrawal_id}",
+        "withdrawal_id: int",
+        doc="""Cancel a withdrawal request. This can only be done if the request is still in state PENDING.
+
+        Args:
+            withdrawal_id: ID of the withdrawal to cancel.
+        """,
+        returns="A python dict of withdrawal request data",
+    ),
+    Endpoint(
+        "send",
+        "post",
+        "send",
+        "amount: str, currency: str, address: str, description: str = None, message: str = None",
+        doc="""Send Bitcoin from your account to a Bitcoin address or email address.
+
+        Args:
+            amount: Amount to send as a decimal string.
+            currency: Currency to send e.g. XBT
+            address: Destination Bitcoin address or email address to send to.
+            description: Description for the transaction to record on the account statement.
+            message: Message to send to the recipient. This is only relevant when sending to an email address.
+        """,
+        returns="A python dict indicating the status of the send request",
+    ),
+    Endpoint(
+        "create_quote",
+        "post",
+        "quotes",
+        "kind: str, base_amount: str, pair: str",
+        rename={"kind": "type"},
+        doc="""Creates a new quote to buy or sell a particular amount.
+
+        You can specify either the exact amount that you want to pay or the exact amount that you want too receive.
+        For example, to buy exactly 0.1 Bitcoin using ZAR, you would create a quote to BUY 0.1 XBTZAR. The returned quote includes the appropriate ZAR amount.
+        To buy Bitcoin using exactly ZAR 100, you would create a quote to SELL 100 ZARXBT.
+        The returned quote specifies the Bitcoin as the counter amount that will be returned.
+        An error is returned if your account is not verified for the currency pair, or if your account would have insufficient balance to ever exercise the quote.
+
+        Args:
+            kind: Possible types: BUY, SELL
+            base_amount: Amount to buy or sell in the pair base currency.
+            pair: Currency pair to trade e.g. XBTZAR, XBTMYR. The pair can also be flipped if you want to buy or sell the counter currency (e.g. ZARXBT).
+        """,
+        returns="A python dict of quote data",
+    ),
+    Endpoint(
+        "get_quote",
+        "get",
+        "quotes/{quote_id}",
+        "quote_id: int",
+        doc="""Get the latest status of a quote.
+
+        Args:
+            quote_id: ID of the quote to retrieve.
+        """,
+        returns="A python dict of quote data",
+    ),
+    Endpoint(
+        "exercise_quote",
+        "put",
+        "quotes/{quote_id}",
+        "quote_id: int",
+        doc="""Exercise a quote to perform the trade.
+
+        If there is sufficient balance available in your account, it will be debited and the counter amount credited.
+        An error is returned if the quote has expired or if you have insufficient available balance.
+
+        Args:
+            quote_id: ID of the quote to exercise.
+        """,
+        returns="A python dict of quote data",
+    ),
+    Endpoint(
+        "discard_quote",
+        "delete",
+        "quotes/{quote_id}",
+        "quote_id: int",
+        doc="""Discard a quote. Once a quote has been discarded, it cannot be exercised even if it has not expired yet.
+
+        Args:
+            quote_id: ID of the quote to discard.
+        """,
+        returns="A python dict of quote data",
+    ),
+)
+
+
+def _templates() -> Dict[int, List[str]]:
+    """Returns the paths in ENDPOINTS which have placeholders by segment count"""
+    templates = {}
+    for endpoint in ENDPOINTS:
+        paths = templates.setdefault(endpoint.path.count("/") + 1, [])
+        if endpoint.placeholders and endpoint.path not in paths:
+            paths.append(endpoint.path)
+
+    return templates
+
+
+_TEMPLATES = _templates()
+
+
+def template(suffix: str) -> str:
+    """Returns the path template of the endpoint a uri suffix requests
+
+    Ids in the suffix are replaced by the placeholders of the matching path in
+    ENDPOINTS so that requests for different resources share a name e.g.
+    orders/BXMC2CJ7HNB88U4 becomes orders/{order_id}. Other suffixes are
+    returned unchanged.
+
+    Args:
+        suffix: The uri suffix e.g. accounts/1224/transactions
+    """
+    segments = suffix.strip("/").split("/")
+    for path in _TEMPLATES.get(len(segments), ()):
+        parts = path.split("/")
+        if all(p.startswith("{") or p == s for p, s in zip(parts, segments)):
+            return path
+
+    return "/".join(segments)
+
+
+def endpoint_methods(flavour: str) -> Callable[[type], type]:
+    """Returns a class decorator which adds a method per endpoint to a client
+
+    The methods are compiled once when the client module is imported. A method
+    the client defines itself is an error, endpoints which need more than a
+    request are left out of ENDPOINTS and written by hand. The flavour is kept as
+    the FLAVOUR attribute of the client for drive().
+
+    Args:
+        flavour: The client the methods are for i.e. sync, twisted or asyncio
+    """
+    if flavour not in RETURNS:
+        raise ValueError(f"unknown flavour {flavour!r}")
+
+    def install(cls: type) -> type:
+        for endpoint in ENDPOINTS:
+            if endpoint.name in vars(cls):
+                raise TypeError(
+                    f"{cls.__name__}.{endpoint.name} is generated from the endpoint table"
+                )
+
+            setattr(cls, endpoint.name, endpoint.build(flavour, cls))
+
+        cls.FLAVOUR = flavour
+        return cls
+
+    return install
+
+
+Request = Tuple[str, str, Dict]
+Routine = Generator[Request, Dict, Any]
+
+
+def drive(client: Any, routine: Routine) -> Any:
+    """Runs a routine of several requests with the transport of a client
+
+    A routine is a generator which yields the (verb, path, params) of each
+    request and is sent its response, or has the error of a failed request
+    raised where it yielded. Work which needs more than a request, such as
+    paging through the trade history, is written once as a routine and runs on
+    the sync, twisted and asyncio clients alike.
+
+    Args:
+        client: A client whose endpoint methods were added by endpoint_methods()
+        routine: The generator of requests
+
+    Returns:
+        The return value of the routine, a twisted deferred which will eventually
+        return it for the twisted client or a coroutine for the asyncio client
+    """
+    flavour = client.FLAVOUR
+    if flavour == TWISTED:
+        from twisted.internet.defer import inlineCallbacks
+
+        return inlineCallbacks(_drive_twisted)(client, routine)
+
+    if flavour == ASYNCIO:
+        return _drive_asyncio(client, routine)
+
+    send, value = routine.send, None
+    while True:
+        try:
+            request = send(value)
+        except StopIteration as stop:
+            return stop.value
+
+        try:
+            send, value = routine.send, client._fetch_resource(*request)
+        except Exception as e:
+            send, value = routine.throw, e
+
+
+def _drive_twisted(client: Any, routine: Routine):
+    send, value = routine.send, None
+    while True:
+        try:
+            request = send(value)
+        except StopIteration as stop:
+            return stop.value
+
+        try:
+            send, value = routine.send, (yield client._fetch_resource(*request))
+        except Exception as e:
+            send, value = routine.throw, e
+
+
+async def _drive_asyncio(client: Any, routine: Routine) -> Any:
+    send, value = routine.send, None
+    while True:
+        try:
+            request = send(value)
+        except StopIteration as stop:
+            return stop.value
+
+        try:
+            send, value = routine.send, await client._fetch_resource(*request)
+        except Exception as e:
+            send, value = routine.throw, e
@@ -4,3 +4,14 @@ class UnauthorisedResourceException(Exception):
 
 class UnsupportedHttpVerbException(Exception):
     pass
+
+
+class SequenceGapException(Exception):
+    pass
+
+
+class HttpStatusException(Exception):
+    def __init__(self, status: int, body: bytes = b"") -> None:
+        super().__init__(f"http status {status}: {body[:200]!r}")
+        self.status = status
+        self.body = body
@@ -0,0 +1,281 @@
+import bisect
+import itertools
+import numbers
+
+from array import array
+from luno.lazy import lazy_import
+from luno.orderbook import ASK
+from luno.orderbook import BID
+from luno.orderbook import ColumnarOrderBook
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Union
+
+np = lazy_import("numpy", optional=True)
+
+BUY = "BUY"
+SELL = "SELL"
+COLUMNS = (
+    "volume",
+    "base",
+    "counter",
+    "price",
+    "worst_price",
+    "levels",
+    "slippage",
+    "complete",
+)
+
+Volumes = Union[float, Iterable[float]]
+
+
+class ImpactEstimate:
+    """The estimated fills of market orders of several sizes
+
+    Each attribute is a column with an entry per order size, NumPy arrays when
+    NumPy is installed and lists otherwise.
+
+    Attributes:
+        volume: The order sizes, counter volume for a BUY and base volume for a SELL
+        base: The base volume filled
+        counter: The counter volume filled
+        price: The average fill price
+        worst_price: The price of the last level the order reaches
+        levels: The number of price levels the order reaches
+        slippage: The fraction the average price is worse than the best price
+        complete: Whether the book holds enough volume to fill the order
+    """
+
+    __slots__ = ("kind",) + COLUMNS
+
+    def __init__(self, kind: str, **columns) -> None:
+        self.kind = kind
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self) -> int:
+        return len(self.volume)
+
+    def __getitem__(self, index: int) -> Dict:
+        return {name: getattr(self, name)[index] for name in COLUMNS}
+
+    def rows(self) -> List[Dict]:
+        """Returns a dict of the columns per order size"""
+        return [self[index] for index in range(len(self))]
+
+    def __repr__(self) -> str:
+        return f"<ImpactEstimate {self.kind} sizes={len(self)}>"
+
+
+class MarketImpact:
+    """Estimates the fills of market orders against an order book snapshot
+
+    The running totals of base and counter volume of each side are computed once
+    per snapshot, after which the level an order of any size ends at is found with
+    a binary search over them, so many order sizes are estimated at once without
+    walking the book. With NumPy every size is searched in a single call to
+    searchsorted.
+
+    Sizes are given as they are to post_market_order(), the counter volume to
+    spend for a BUY which fills against the asks and the base volume to sell for
+    a SELL which fills against the bids. Fees are not included.
+
+    Example:
+        impact = MarketImpact(client.order_book("XBTZAR", columnar=True))
+        estimate = impact.estimate("BUY", [10000, 100000, 1000000])
+        estimate.price, estimate.slippage
+
+    Args:
+        book: A ColumnarOrderBook e.g. as returned by order_book(pair, columnar=True)
+    """
+
+    def __init__(self, book: ColumnarOrderBook) -> None:
+        self.book = book
+        self._totals = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict, pair: str = None) -> "MarketImpact":
+        """Creates an estimator from the response of order_book()"""
+        return cls(ColumnarOrderBook.from_snapshot(snapshot, pair))
+
+    def estimate(self, kind: str, volumes: Volumes) -> ImpactEstimate:
+        """Estimates the fills of market orders of several sizes
+
+        Args:
+            kind: "BUY" or "SELL"
+            volumes: The counter volumes to spend for a BUY or the base volumes to sell for a SELL,
+            a volume of 0 is estimated at the best price
+
+        Returns:
+            An ImpactEstimate with an entry per volume
+
+        Raises:
+            ValueError: If the kind is unknown or a volume is negative or not a number
+        """
+        kind = kind.upper()
+        if kind not in (BUY, SELL):
+            raise ValueError(f"kind must be one of '{BUY}' or '{SELL}', got '{kind}'")
+
+        if isinstance(volumes, (numbers.Number, str)):
+            volumes = [volumes]
+        elif not hasattr(volumes, "__len__"):
+            volumes = list(volumes)
+
+        side = ASK if kind == BUY else BID
+        if np is not None:
+            columns = self._estimate_arrays(side, volumes)
+        else:
+            columns = self._estimate_lists(side, volumes)
+
+        return ImpactEstimate(kind, **columns)
+
+    def buy(self, counter_volumes: Volumes) -> ImpactEstimate:
+        """Estimates BUY market orders spending each counter volume"""
+        return self.estimate(BUY, counter_volumes)
+
+    def sell(self, base_volumes: Volumes) -> ImpactEstimate:
+        """Estimates SELL market orders selling each base volume"""
+        return self.estimate(SELL, base_volumes)
+
+    def _side_totals(self, side: str):
+        """Returns the prices and running base and counter totals of a side starting at 0"""
+        totals = self._totals.get(side)
+        if totals is None:
+            prices, volumes = self.book._side(side)
+            if np is not None:
+                base = np.concatenate(([0.0], np.cumsum(volumes)))
+                counter = np.concatenate(([0.0], np.cumsum(prices * volumes)))
+            else:
+                base = array("d", itertools.accumulate(volumes, initial=0.0))
+                notional = (p * v for p, v in zip(prices, volumes))
+                counter = array("d", itertools.accumulate(notional, initial=0.0))
+
+            totals = self._totals[side] = prices, base, counter
+
+        return totals
+
+    def _estimate_arrays(self, side: str, volumes: Volumes) -> Dict:
+        prices, base_totals, counter_totals = self._side_totals(side)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        count = len(prices)
+
+        invalid = ~(volumes >= 0)
+        if invalid.any():
+            volume = volumes[invalid][0]
+            raise ValueError(f"volume must not be negative, got {volume}")
+
+        if not count:
+            nan = np.full(len(volumes), np.nan)
+            return {
+                "volume": volumes,
+                "base": np.zeros(len(volumes)),
+                "counter": np.zeros(len(volumes)),
+                "price": nan,
+                "worst_price": nan,
+                "levels": np.zeros(len(volumes), dtype=np.int64),
+                "slippage": nan,
+                "complete": volumes <= 0,
+            }
+
+        in_counter = side == ASK
+        totals = counter_totals if in_counter else base_totals
+
+        # totals[index] < volume <= totals[index + 1], the order ends in level index
+        index = np.searchsorted(totals, volumes, side="left") - 1
+        complete = index < count
+        index = np.clip(index, 0, count - 1)
+        level_price = prices[index]
+
+        if in_counter:
+            spent = np.minimum(volumes, totals[-1])
+            base = base_totals[index] + (spent - counter_totals[index]) / level_price
+            counter = spent
+        else:
+            sold = np.minimum(volumes, totals[-1])
+            counter = counter_totals[index] + (sold - base_totals[index]) * level_price
+            base = sold
+
+        best = float(prices[0])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price = np.where(base > 0, counter / base, best)
+
+        return {
+            "volume": volumes,
+            "base": base,
+            "counter": counter,
+            "price": price,
+            "worst_price": level_price,
+            "levels": np.where(volumes > 0, index + 1, 0),
+            "slippage": _slippage(price, best, side),
+            "complete": complete,
+        }
+
+    def _estimate_lists(self, side: str, volumes: Volumes) -> Dict:
+        prices, base_totals, counter_totals = self._side_totals(side)
+        in_counter = side == ASK
+        totals = counter_totals if in_counter else base_totals
+        count = len(prices)
+        columns = {name: [] for name in COLUMNS}
+
+        for volume in volumes:
+            volume = float(volume)
+            if not volume >= 0:
+                raise ValueError(f"volume must not be negative, got {volume}")
+
+            row = {"volume": volume}
+
+            if not count:
+                nan = float("nan")
+                row.update(
+                    base=0.0,
+                    counter=0.0,
+                    price=nan,
+                    worst_price=nan,
+                    levels=0,
+                    slippage=nan,
+                    complete=volume <= 0,
+                )
+            else:
+                index = bisect.bisect_left(totals, volume) - 1
+                complete = index < count
+                index = min(max(index, 0), count - 1)
+                level_price = prices[index]
+                filled = min(volume, totals[-1])
+
+                if in_counter:
+                    base = (
+                        base_totals[index]
+                        + (filled - counter_totals[index]) / level_price
+                    )
+                    counter = filled
+                else:
+                    counter = (
+                        counter_totals[index]
+                        + (filled - base_totals[index]) * level_price
+                    )
+                    base = filled
+
+                price = counter / base if base > 0 else prices[0]
+                row.update(
+                    base=base,
+                    counter=counter,
+                    price=price,
+                    worst_price=level_price,
+                    levels=index + 1 if volume > 0 else 0,
+                    slippage=_slippage(price, prices[0], side),
+                    complete=complete,
+                )
+
+            for name in COLUMNS:
+                columns[name].append(row[name])
+
+        return columns
+
+
+def _slippage(price, best: float, side: str):
+    """Returns the fraction an average price is worse than the best price of a side"""
+    if side == ASK:
+        return (price - best) / best
+
+    return (best - price) / best
@@ -0,0 +1,346 @@
+import math
+import threading
+import time
+
+from array import array
+from luno.endpoints import template
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class Histogram:
+    """A latency histogram with log-linear buckets in the style of HdrHistogram
+
+    Values are recorded in microseconds into buckets whose width grows with the
+    magnitude of the value so that every recorded value is reported within the
+    configured number of significant figures. Recording is O(1) and the memory
+    used does not depend on the number of values recorded.
+
+    Args:
+        significant_figures: The number of significant decimal digits kept, 1 to 5
+        highest: The highest value tracked in seconds, larger values are clamped to it
+    """
+
+    def __init__(self, significant_figures: int = 2, highest: float = 60.0) -> None:
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+
+        self.significant_figures = significant_figures
+        self.highest = highest
+        self._sub_bits = math.ceil(math.log2(2 * 10**significant_figures))
+        self._sub_count = 1 << self._sub_bits
+        self._half = self._sub_count // 2
+        self._max_value = int(highest * 1e6)
+        self._size = self._index(self._max_value) + 1
+        self.reset()
+
+    def reset(self) -> None:
+        """Removes all recorded values"""
+        self.counts = array("q", [0]) * self._size
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _index(self, value: int) -> int:
+        bucket = max(value.bit_length() - self._sub_bits, 0)
+        return bucket * self._half + (value >> bucket)
+
+    def _value(self, index: int) -> int:
+        """Returns the highest value which is recorded at an index"""
+        if index < self._sub_count:
+            return index
+
+        bucket, sub = divmod(index - self._sub_count, self._half)
+        bucket += 1
+        return ((sub + self._half + 1) << bucket) - 1
+
+    def record(self, seconds: float) -> None:
+        """Records a latency
+
+        Args:
+            seconds: The latency in seconds
+        """
+        value = min(max(int(seconds * 1e6), 0), self._max_value)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += seconds
+
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "Histogram") -> None:
+        """Adds the values recorded by a histogram with the same configuration"""
+        if len(other.counts) != len(self.counts):
+            raise ValueError("histograms must share the same configuration")
+
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+
+        self.count += other.count
+        self.total += other.total
+
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, quantile: float) -> float:
+        """Returns the latency in seconds below which a share of the values fall
+
+        Args:
+            quantile: The share of values between 0 and 1 e.g. 0.99
+        """
+        if not self.count:
+            return 0.0
+
+        target = max(math.ceil(quantile * self.count), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._value(index) / 1e6, self.max)
+
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def snapshot(self, quantiles: Iterable[float] = QUANTILES) -> Dict:
+        """Returns the count, min, max, mean and the given quantiles in seconds"""
+        stats = {
+            "count": self.count,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+            "mean": self.mean,
+        }
+        for quantile in quantiles:
+            stats[f"p{quantile * 100:g}"] = self.percentile(quantile)
+
+        return stats
+
+
+class RequestTiming:
+    """The timing of a single http request broken down by phase
+
+    Phases are measured back to back with mark(), each phase covers the time
+    since the previous mark. In order a request may spend time in the wait (rate
+    limiter), queue (connection pool), dns, connect (including TLS), server (until
+    the response headers arrive), read and decode phases. Not every client reports
+    every phase, the twisted client for example includes connecting in server.
+    The endpoint is the path template of the suffix e.g. orders/{order_id}.
+
+    Args:
+        method: The http verb i.e. get, post, put, delete
+        suffix: The uri suffix
+    """
+
+    __slots__ = (
+        "method",
+        "endpoint",
+        "status",
+        "bytes",
+        "error",
+        "phases",
+        "started",
+        "_mark",
+    )
+
+    def __init__(self, method: str, suffix: str) -> None:
+        self.method = method
+        self.endpoint = template(suffix)
+        self.status = None
+        self.bytes = 0
+        self.error = None
+        self.phases = {}
+        self.started = time.time()
+        self._mark = time.perf_counter()
+
+    def lap(self) -> float:
+        """Returns the seconds since the previous mark and starts a new phase"""
+        now = time.perf_counter()
+        elapsed = now - self._mark
+        self._mark = now
+        return elapsed
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Adds time to a phase"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def mark(self, phase: str) -> None:
+        """Ends a phase, the phase covers the time since the previous mark"""
+        self.add(phase, self.lap())
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def __repr__(self) -> str:
+        phases = " ".join(f"{k}={v * 1000:.3f}ms" for k, v in self.phases.items())
+        return (
+            f"<RequestTiming {self.method} {self.endpoint} status={self.status} "
+            f"bytes={self.bytes} {phases}>"
+        )
+
+
+Observer = Callable[[RequestTiming], None]
+
+
+class Instrumentation:
+    """Collects the timings of the requests made by one or more clients
+
+    Every request produces a RequestTiming which is passed to each observer and
+    recorded in a latency histogram per endpoint. Clients created without
+    instrumentation skip timing entirely.
+
+    Args:
+        observers: Callables which receive the RequestTiming of every request
+        significant_figures: The precision of the latency histograms
+    """
+
+    def __init__(
+        self, observers: Iterable[Observer] = (), significant_figures: int = 2
+    ) -> None:
+        self.observers = list(observers)
+        self.significant_figures = significant_figures
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Removes all recorded timings"""
+        with self._lock:
+            self.started = time.monotonic()
+            self._endpoints = {}
+
+    def subscribe(self, observer: Observer) -> None:
+        """Adds an observer which receives the RequestTiming of every request"""
+        self.observers.append(observer)
+
+    def begin(self, method: str, suffix: str) -> RequestTiming:
+        """Starts timing a request"""
+        return RequestTiming(method, suffix)
+
+    def finish(self, timing: RequestTiming, error: BaseException = None) -> None:
+        """Records a finished request and notifies the observers
+
+        Args:
+            timing: The timing returned by begin()
+            error: The exception the request failed with, if any
+        """
+        if error is not None:
+            timing.error = type(error).__name__
+
+        with self._lock:
+            stats = self._endpoints.get(timing.endpoint)
+            if stats is None:
+                stats = self._endpoints[timing.endpoint] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "bytes": 0,
+                    "statuses": {},
+                    "phases": {},
+                    "latency": Histogram(self.significant_figures),
+                }
+
+            stats["requests"] += 1
+            stats["bytes"] += timing.bytes
+            if timing.error is not None or (timing.status or 0) >= 400:
+                stats["errors"] += 1
+
+            status = timing.status or timing.error
+            stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+
+            phases = stats["phases"]
+            for phase, seconds in timing.phases.items():
+                phases[phase] = phases.get(phase, 0.0) + seconds
+
+            stats["latency"].record(timing.total)
+
+        for observer in self.observers:
+            observer(timing)
+
+    def histogram(self, endpoint: str) -> Histogram:
+        """Returns a copy of the latency histogram of an endpoint"""
+        histogram = Histogram(self.significant_figures)
+        with self._lock:
+            if endpoint in self._endpoints:
+                histogram.merge(self._endpoints[endpoint]["latency"])
+
+        return histogram
+
+    def stats(self) -> Dict[str, Dict]:
+        """Returns the requests, errors, bytes, throughput, phase totals and latency per endpoint"""
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            return {
+                endpoint: {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "bytes": stats["bytes"],
+                    "rate": stats["requests"] / elapsed,
+                    "statuses": dict(stats["statuses"]),
+                    "phases": dict(stats["phases"]),
+                    "latency": stats["latency"].snapshot(),
+                }
+                for endpoint, stats in self._endpoints.items()
+            }
+
+    def prometheus(self, prefix: str = "luno") -> str:
+        """Returns the collected metrics in the Prometheus text exposition format"""
+        lines = []
+        stats = self.stats()
+
+        def metric(name: str, kind: str, samples: List) -> None:
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{prefix}_{name}{suffix}{{{label}}} {value}")
+
+        metric(
+            "requests_total",
+            "counter",
+            [
+                ("", {"endpoint": endpoint, "status": status}, count)
+                for endpoint, s in stats.items()
+                for status, count in s["statuses"].items()
+            ],
+        )
+        metric(
+            "response_bytes_total",
+            "counter",
+            [("", {"endpoint": endpoint}, s["bytes"]) for endpoint, s in stats.items()],
+        )
+        metric(
+            "request_phase_seconds_total",
+            "counter",
+            [
+                ("", {"endpoint": endpoint, "phase": phase}, seconds)
+                for endpoint, s in stats.items()
+                for phase, seconds in s["phases"].items()
+            ],
+        )
+
+        samples = []
+        for endpoint, s in stats.items():
+            latency = s["latency"]
+            for quantile in QUANTILES:
+                labels = {"endpoint": endpoint, "quantile": quantile}
+                samples.append(("", labels, latency[f"p{quantile * 100:g}"]))
+
+            samples.append(
+                ("_sum", {"endpoint": endpoint}, latency["mean"] * latency["count"])
+            )
+            samples.append(("_count", {"endpoint": endpoint}, latency["count"]))
+
+        metric("request_duration_seconds", "summary", samples)
+        return "\n".join(lines) + "\n"
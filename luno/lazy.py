@@ -0,0 +1,60 @@
+import importlib
+import importlib.util
+import sys
+import threading
+
+from types import ModuleType
+from typing import Any
+from typing import Optional
+
+_lock = threading.RLock()
+
+
+class LazyModule(ModuleType):
+    """A proxy which imports its module when an attribute is first accessed
+
+    The proxy is only held by the modules which asked for it and is never
+    registered in sys.modules, so other code importing or probing the module
+    e.g. with importlib.util.find_spec() sees the import system's own state.
+    Importing is serialised so threads racing on first use never see a partially
+    executed module. Once imported the attributes of the module are copied onto
+    the proxy.
+    """
+
+    def __getattr__(self, attr: str) -> Any:
+        with _lock:
+            module = self.__dict__.get("_module")
+            if module is None:
+                module = importlib.import_module(self.__name__)
+                self.__dict__.update(module.__dict__)
+                self.__dict__["_module"] = module
+
+        return getattr(module, attr)
+
+
+def lazy_import(name: str, optional: bool = False) -> Optional[ModuleType]:
+    """Returns a module which is only executed when one of its attributes is first accessed
+
+    Args:
+        name: The absolute name of the module e.g. numpy
+        optional: Return None instead of raising ImportError if the module is not installed
+
+    Returns:
+        The module, or None if an optional module is not installed
+    """
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+
+        spec = importlib.util.find_spec(name)
+
+    if spec is None:
+        if optional:
+            return None
+
+        raise ImportError(f"No module named {name!r}", name=name)
+
+    module = LazyModule(name)
+    module.__spec__ = spec
+    module.__loader__ = spec.loader
+    return module
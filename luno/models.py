@@ -0,0 +1,208 @@
+from decimal import Decimal
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Type
+from typing import TypeVar
+
+M = TypeVar("M", bound="Model")
+
+
+class Amount:
+    """A model field holding an amount which is parsed to a Decimal on first access
+
+    The raw value from the response is kept in a private slot named after the
+    field and replaced by the parsed Decimal the first time it is read.
+    """
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.slot = f"_{name}"
+
+    def __get__(self, instance: "Model", owner: type = None) -> Any:
+        if instance is None:
+            return self
+
+        value = getattr(instance, self.slot)
+        if value is None or type(value) is Decimal:
+            return value
+
+        # amounts are strings in most responses but numbers in transactions()
+        value = Decimal(value if isinstance(value, str) else str(value))
+        setattr(instance, self.slot, value)
+        return value
+
+
+class Model:
+    """Base class of the typed response models
+
+    Each model declares the fields it keeps in __slots__, plain fields are stored
+    as returned by the API and amounts are declared as Amount fields backed by a
+    slot with a leading underscore. Fields missing from a response are None.
+
+    Args:
+        data: A python dict as returned by the API
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(
+            (slot.lstrip("_"), slot)
+            for klass in cls.__mro__
+            for slot in klass.__dict__.get("__slots__", ())
+        )
+
+    def __init__(self, data: Dict) -> None:
+        for key, slot in self._fields:
+            setattr(self, slot, data.get(key))
+
+    @classmethod
+    def from_response(cls: Type[M], response: Dict, key: str) -> List[M]:
+        """Creates a model for each row of a response
+
+        Args:
+            response: A python dict as returned by the API
+            key: The key of the rows in the response e.g. trades
+
+        Returns:
+            A list of models, empty if the response holds no rows
+        """
+        return [cls(row) for row in response.get(key) or []]
+
+    def to_dict(self) -> Dict:
+        """Returns the fields of the model as a python dict with amounts parsed"""
+        return {key: getattr(self, key) for key, _ in self._fields}
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.to_dict().items())
+        return f"{type(self).__name__}({fields})"
+
+
+class Ticker(Model):
+    """A ticker() response"""
+
+    __slots__ = (
+        "pair",
+        "timestamp",
+        "_bid",
+        "_ask",
+        "_last_trade",
+        "_rolling_24_hour_volume",
+    )
+
+    bid = Amount()
+    ask = Amount()
+    last_trade = Amount()
+    rolling_24_hour_volume = Amount()
+
+
+class Trade(Model):
+    """A trade returned by trades() or list_trades()
+
+    Public trades only carry the timestamp, price, volume and is_buy fields, the
+    remaining fields are set for the trades of the authenticated user.
+    """
+
+    __slots__ = (
+        "timestamp",
+        "is_buy",
+        "pair",
+        "order_id",
+        "type",
+        "sequence",
+        "_price",
+        "_volume",
+        "_base",
+        "_counter",
+        "_fee_base",
+        "_fee_counter",
+    )
+
+    price = Amount()
+    volume = Amount()
+    base = Amount()
+    counter = Amount()
+    fee_base = Amount()
+    fee_counter = Amount()
+
+
+class Order(Model):
+    """An order returned by list_orders()"""
+
+    __slots__ = (
+        "order_id",
+        "pair",
+        "type",
+        "state",
+        "creation_timestamp",
+        "expiration_timestamp",
+        "completed_timestamp",
+        "_limit_price",
+        "_limit_volume",
+        "_base",
+        "_counter",
+        "_fee_base",
+        "_fee_counter",
+    )
+
+    limit_price = Amount()
+    limit_volume = Amount()
+    base = Amount()
+    counter = Amount()
+    fee_base = Amount()
+    fee_counter = Amount()
+
+
+class Transaction(Model):
+    """A transaction returned by transactions()"""
+
+    __slots__ = (
+        "row_index",
+        "timestamp",
+        "currency",
+        "description",
+        "_balance",
+        "_available",
+        "_balance_delta",
+        "_available_delta",
+    )
+
+    balance = Amount()
+    available = Amount()
+    balance_delta = Amount()
+    available_delta = Amount()
+
+
+class Balance(Model):
+    """An account balance returned by balance()"""
+
+    __slots__ = ("account_id", "asset", "_balance", "_reserved", "_unconfirmed")
+
+    balance = Amount()
+    reserved = Amount()
+    unconfirmed = Amount()
+
+
+def parse_response(response: Dict, model: Type[M], key: str = None) -> Any:
+    """Converts a response into typed models
+
+    Args:
+        response: A python dict as returned by the API
+        model: The model class e.g. Trade
+        key: The key of the rows in the response, a single model is returned if omitted
+
+    Returns:
+        A model or a list of models
+    """
+    if key is None:
+        return model(response)
+
+    return model.from_response(response, key)
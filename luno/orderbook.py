@@ -0,0 +1,436 @@
+import bisect
+import itertools
+import math
+
+from array import array
+from decimal import Decimal
+from luno.lazy import lazy_import
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+BID = "BID"
+ASK = "ASK"
+
+Number = Union[str, int, float, Decimal]
+Level = Tuple[Decimal, Decimal]
+
+np = lazy_import("numpy", optional=True)
+
+
+class LocalOrderBook:
+    """A local replica of a Luno order book which is maintained incrementally.
+
+    Price levels are stored in a dict keyed by price along with a sorted list of
+    price keys per side. Both key lists are kept in ascending order with the best
+    level last (ask keys are negated prices) so that the top of the book is read
+    in O(1), levels are located with a binary search and levels removed at the
+    touch are popped from the end of the list.
+
+    Multiple orders at the same price are conflated into a single level.
+
+    Args:
+        pair: Currency pair e.g. XBTZAR
+    """
+
+    def __init__(self, pair: str = None) -> None:
+        self.pair = pair
+        self.timestamp = None
+        self._levels = {BID: {}, ASK: {}}
+        self._keys = {BID: [], ASK: []}
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict, pair: str = None) -> "LocalOrderBook":
+        """Creates a local order book from the response of order_book()
+
+        Args:
+            snapshot: A python dict as returned by order_book()
+            pair: Currency pair e.g. XBTZAR
+
+        Returns:
+            A LocalOrderBook instance
+        """
+        book = cls(pair=pair)
+        book.load_snapshot(snapshot)
+        return book
+
+    def load_snapshot(self, snapshot: Dict) -> None:
+        """Replaces the contents of the book with an order_book() snapshot
+
+        Args:
+            snapshot: A python dict as returned by order_book()
+        """
+        self.clear()
+        self.timestamp = snapshot.get("timestamp")
+
+        for side, key in ((BID, "bids"), (ASK, "asks")):
+            levels = self._levels[side]
+            for order in snapshot.get(key) or []:
+                price = Decimal(order["price"])
+                levels[price] = levels.get(price, 0) + Decimal(order["volume"])
+
+            keys = [self._key(side, price) for price in levels]
+            keys.sort()
+            self._keys[side] = keys
+
+    def clear(self) -> None:
+        """Removes all price levels from the book"""
+        self.timestamp = None
+        self._levels = {BID: {}, ASK: {}}
+        self._keys = {BID: [], ASK: []}
+
+    @staticmethod
+    def _key(side: str, price: Decimal) -> Decimal:
+        return price if side == BID else -price
+
+    def _side(self, side: str) -> str:
+        side = side.upper()
+        if side not in self._levels:
+            raise ValueError(f"side must be one of '{BID}' or '{ASK}', got '{side}'")
+
+        return side
+
+    def set_level(self, side: str, price: Number, volume: Number) -> None:
+        """Sets the total volume at a price level, a zero volume removes the level
+
+        Args:
+            side: "BID" or "ASK"
+            price: The price of the level
+            volume: The total volume resting at the price
+        """
+        side = self._side(side)
+        price = Decimal(price)
+        volume = Decimal(volume)
+        levels = self._levels[side]
+
+        if volume <= 0:
+            if price in levels:
+                del levels[price]
+                self._remove_key(side, price)
+            return
+
+        if price not in levels:
+            bisect.insort(self._keys[side], self._key(side, price))
+
+        levels[price] = volume
+
+    def add(self, side: str, price: Number, volume: Number) -> None:
+        """Adds volume to a price level, creating the level if required
+
+        Args:
+            side: "BID" or "ASK"
+            price: The price of the level
+            volume: The volume to add
+        """
+        side = self._side(side)
+        price = Decimal(price)
+        self.set_level(side, price, self._levels[side].get(price, 0) + Decimal(volume))
+
+    def remove(self, side: str, price: Number, volume: Number) -> None:
+        """Removes volume from a price level, the level is dropped once it is empty
+
+        Args:
+            side: "BID" or "ASK"
+            price: The price of the level
+            volume: The volume to remove
+        """
+        side = self._side(side)
+        price = Decimal(price)
+        self.set_level(side, price, self._levels[side].get(price, 0) - Decimal(volume))
+
+    def _remove_key(self, side: str, price: Decimal) -> None:
+        keys = self._keys[side]
+        key = self._key(side, price)
+
+        if keys[-1] == key:
+            keys.pop()
+            return
+
+        index = bisect.bisect_left(keys, key)
+        del keys[index]
+
+    def _best(self, side: str) -> Optional[Level]:
+        keys = self._keys[side]
+        if not keys:
+            return None
+
+        price = self._key(side, keys[-1])
+        return price, self._levels[side][price]
+
+    def best_bid(self) -> Optional[Level]:
+        """Returns the best bid as a (price, volume) tuple or None if there are no bids"""
+        return self._best(BID)
+
+    def best_ask(self) -> Optional[Level]:
+        """Returns the best ask as a (price, volume) tuple or None if there are no asks"""
+        return self._best(ASK)
+
+    def spread(self) -> Optional[Decimal]:
+        """Returns the difference between the best ask and best bid prices"""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+
+        return ask[0] - bid[0]
+
+    def mid_price(self) -> Optional[Decimal]:
+        """Returns the price halfway between the best bid and best ask"""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+
+        return (ask[0] + bid[0]) / 2
+
+    def volume_at(self, side: str, price: Number) -> Decimal:
+        """Returns the volume resting at a price level
+
+        Args:
+            side: "BID" or "ASK"
+            price: The price of the level
+
+        Returns:
+            The volume at the price or zero if the level does not exist
+        """
+        return self._levels[self._side(side)].get(Decimal(price), Decimal(0))
+
+    def depth(self, side: str, levels: int = None) -> List[Level]:
+        """Returns price levels ordered from the best price outwards
+
+        Args:
+            side: "BID" or "ASK"
+            levels: The maximum number of levels to return, all levels are returned by default
+
+        Returns:
+            A list of (price, volume) tuples
+        """
+        side = self._side(side)
+        keys = self._keys[side]
+        book = self._levels[side]
+
+        start = 0 if levels is None else max(len(keys) - levels, 0)
+        prices = [self._key(side, key) for key in reversed(keys[start:])]
+        return [(price, book[price]) for price in prices]
+
+    def bids(self, levels: int = None) -> List[Level]:
+        """Returns bid levels ordered by price descending"""
+        return self.depth(BID, levels)
+
+    def asks(self, levels: int = None) -> List[Level]:
+        """Returns ask levels ordered by price ascending"""
+        return self.depth(ASK, levels)
+
+    def __len__(self) -> int:
+        return len(self._keys[BID]) + len(self._keys[ASK])
+
+    def __repr__(self) -> str:
+        return (
+            f"<LocalOrderBook pair={self.pair} bid={self.best_bid()} "
+            f"ask={self.best_ask()}>"
+        )
+
+
+class ColumnarOrderBook:
+    """An order_book() snapshot held as contiguous price and volume arrays
+
+    The arrays are NumPy float64 arrays when NumPy is installed and array("d")
+    arrays otherwise. Bids are ordered by price descending and asks by price
+    ascending as returned by the API, orders at the same price are not conflated.
+
+    Args:
+        bid_prices: Bid prices ordered by price descending
+        bid_volumes: The volume of each bid
+        ask_prices: Ask prices ordered by price ascending
+        ask_volumes: The volume of each ask
+        pair: Currency pair e.g. XBTZAR
+        timestamp: The timestamp of the snapshot in milliseconds
+    """
+
+    __slots__ = (
+        "pair",
+        "timestamp",
+        "bid_prices",
+        "bid_volumes",
+        "ask_prices",
+        "ask_volumes",
+    )
+
+    def __init__(
+        self,
+        bid_prices,
+        bid_volumes,
+        ask_prices,
+        ask_volumes,
+        pair: str = None,
+        timestamp: int = None,
+    ) -> None:
+        self.pair = pair
+        self.timestamp = timestamp
+        self.bid_prices = bid_prices
+        self.bid_volumes = bid_volumes
+        self.ask_prices = ask_prices
+        self.ask_volumes = ask_volumes
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict, pair: str = None) -> "ColumnarOrderBook":
+        """Parses the response of order_book() into price and volume arrays
+
+        Args:
+            snapshot: A python dict as returned by order_book()
+            pair: Currency pair e.g. XBTZAR
+
+        Returns:
+            A ColumnarOrderBook instance
+        """
+        bids = snapshot.get("bids") or []
+        asks = snapshot.get("asks") or []
+
+        return cls(
+            _column(bids, "price"),
+            _column(bids, "volume"),
+            _column(asks, "price"),
+            _column(asks, "volume"),
+            pair=pair,
+            timestamp=snapshot.get("timestamp"),
+        )
+
+    def _side(self, side: str) -> Tuple:
+        side = side.upper()
+        if side == BID:
+            return self.bid_prices, self.bid_volumes
+
+        if side == ASK:
+            return self.ask_prices, self.ask_volumes
+
+        raise ValueError(f"side must be one of '{BID}' or '{ASK}', got '{side}'")
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        """Returns the best bid as a (price, volume) tuple or None if there are no bids"""
+        if not len(self.bid_prices):
+            return None
+
+        return float(self.bid_prices[0]), float(self.bid_volumes[0])
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        """Returns the best ask as a (price, volume) tuple or None if there are no asks"""
+        if not len(self.ask_prices):
+            return None
+
+        return float(self.ask_prices[0]), float(self.ask_volumes[0])
+
+    def spread(self) -> Optional[float]:
+        """Returns the difference between the best ask and best bid prices"""
+        if not len(self.bid_prices) or not len(self.ask_prices):
+            return None
+
+        return float(self.ask_prices[0] - self.bid_prices[0])
+
+    def mid_price(self) -> Optional[float]:
+        """Returns the price halfway between the best bid and best ask"""
+        if not len(self.bid_prices) or not len(self.ask_prices):
+            return None
+
+        return float(self.ask_prices[0] + self.bid_prices[0]) / 2
+
+    def cumulative_volume(self, side: str):
+        """Returns the running total of volume from the best price outwards
+
+        Args:
+            side: "BID" or "ASK"
+        """
+        _, volumes = self._side(side)
+        if np is not None:
+            return np.cumsum(volumes)
+
+        return array("d", itertools.accumulate(volumes))
+
+    def depth(self, side: str, price: float) -> float:
+        """Returns the total volume at prices as good as or better than a price
+
+        Args:
+            side: "BID" or "ASK"
+            price: Bids at or above the price or asks at or below the price are included
+        """
+        prices, volumes = self._side(side)
+        count = _count_through(prices, price, side.upper() == BID)
+
+        if np is not None:
+            return float(volumes[:count].sum())
+
+        return math.fsum(volumes[:count])
+
+    def vwap(self, side: str, volume: float) -> Optional[float]:
+        """Returns the volume weighted average price of filling a volume against a side
+
+        Args:
+            side: "ASK" to buy from the asks or "BID" to sell to the bids
+            volume: The base volume to fill, the best price is returned for 0
+
+        Returns:
+            The average price or None if the side does not hold enough volume
+        """
+        if volume < 0:
+            raise ValueError(f"volume must not be negative, got {volume}")
+
+        prices, volumes = self._side(side)
+        if volume == 0:
+            return float(prices[0]) if len(prices) else None
+
+        cumulative = self.cumulative_volume(side)
+
+        if not len(cumulative) or cumulative[-1] < volume:
+            return None
+
+        if np is not None:
+            index = int(np.searchsorted(cumulative, volume, side="left"))
+        else:
+            index = bisect.bisect_left(cumulative, volume)
+
+        filled = cumulative[index - 1] if index else 0.0
+
+        if np is not None:
+            notional = float(np.dot(prices[:index], volumes[:index]))
+        else:
+            notional = math.fsum(p * v for p, v in zip(prices[:index], volumes[:index]))
+
+        notional += float(prices[index]) * (volume - filled)
+        return notional / volume
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the price and volume arrays"""
+        columns = (self.bid_prices, self.bid_volumes, self.ask_prices, self.ask_volumes)
+        if np is not None:
+            return sum(column.nbytes for column in columns)
+
+        return sum(len(column) * column.itemsize for column in columns)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ColumnarOrderBook pair={self.pair} bid={self.best_bid()} "
+            f"ask={self.best_ask()}>"
+        )
+
+
+def _column(orders: List[Dict], field: str):
+    values = (float(order[field]) for order in orders)
+
+    if np is not None:
+        return np.fromiter(values, dtype=np.float64, count=len(orders))
+
+    return array("d", values)
+
+
+def _count_through(prices, price: float, descending: bool) -> int:
+    """Returns the number of leading prices at least as good as price"""
+    if np is not None:
+        if descending:
+            return int(np.searchsorted(-prices, -price, side="right"))
+
+        return int(np.searchsorted(prices, price, side="right"))
+
+    if descending:
+        return bisect.bisect_right([-p for p in prices], -price)
+
+    return bisect.bisect_right(prices, price)
@@ -0,0 +1,142 @@
+from typing import Dict
+from typing import Hashable
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+
+def trade_key(trade: Dict) -> Hashable:
+    """Returns a key which identifies a trade
+
+    Trades carry a sequence number when the exchange provides one, otherwise the
+    timestamp, price, volume and side are used.
+    """
+    if "sequence" in trade:
+        return trade["sequence"]
+
+    return (
+        trade.get("timestamp"),
+        trade.get("price"),
+        trade.get("volume"),
+        trade.get("is_buy"),
+    )
+
+
+class TradePager:
+    """Walks the trade history returned by trades() one page at a time
+
+    Each page is requested from the timestamp of the newest trade seen so far,
+    trades sharing that boundary timestamp may therefore be returned again and are
+    removed. Only the keys of trades at the boundary timestamp are kept so memory
+    use does not grow with the length of the history.
+
+    A page can not start within a millisecond, when more than a page of trades
+    share the boundary timestamp the pager moves on to the next millisecond and
+    the trades of the boundary timestamp beyond the first page are not returned.
+
+    Args:
+        pair: Currency pair e.g. XBTZAR
+        since: Unix timestamp in milliseconds to start from
+        until: Stop after this Unix timestamp in milliseconds
+    """
+
+    PAGE_SIZE = 100
+
+    def __init__(self, pair: str, since: int, until: int = None) -> None:
+        self.pair = pair
+        self.since = since
+        self.until = until
+        self.done = False
+        self.pages = 0
+        self._boundary = set()
+
+    def params(self) -> Dict:
+        """Returns the query params of the next page"""
+        return {"pair": self.pair, "since": self.since}
+
+    def page(self, response: Dict) -> List[Dict]:
+        """Processes a trades() response and advances the pager
+
+        Args:
+            response: A python dict as returned by trades()
+
+        Returns:
+            The new trades in the page sorted by timestamp ascending, done is set
+            once the page is short or no new trades are returned
+        """
+        trades = response.get("trades") or []
+        full = len(trades) >= self.PAGE_SIZE
+        if not full:
+            self.done = True
+
+        # trades are returned newest first, reversing before the stable sort keeps
+        # trades which share a timestamp in the order they were executed
+        trades = sorted(reversed(trades), key=lambda t: t["timestamp"])
+        trades = [
+            trade
+            for trade in trades
+            if trade["timestamp"] > self.since
+            or (
+                trade["timestamp"] == self.since
+                and trade_key(trade) not in self._boundary
+            )
+        ]
+
+        if self.until is not None:
+            within = [trade for trade in trades if trade["timestamp"] <= self.until]
+            if len(within) < len(trades):
+                self.done = True
+            trades = within
+
+        if not trades:
+            # a full page of trades already seen at the boundary timestamp
+            if full and (self.until is None or self.since < self.until):
+                self.since += 1
+                self._boundary = set()
+            else:
+                self.done = True
+
+            return trades
+
+        newest = trades[-1]["timestamp"]
+        if newest != self.since:
+            self._boundary = set()
+
+        self._boundary.update(
+            trade_key(trade) for trade in trades if trade["timestamp"] == newest
+        )
+        self.since = newest
+        self.pages += 1
+
+        return trades
+
+
+TRANSACTIONS_PAGE_SIZE = 1000
+
+
+def row_windows(
+    min_row: int, max_row: int, size: int = TRANSACTIONS_PAGE_SIZE
+) -> Iterator[Tuple[int, int]]:
+    """Partitions a range of transaction rows into windows accepted by transactions()
+
+    Args:
+        min_row: The first row (inclusive)
+        max_row: The last row (exclusive)
+        size: The maximum number of rows per window
+
+    Returns:
+        A generator of (min_row, max_row) tuples
+    """
+    for start in range(min_row, max_row, size):
+        yield start, min(start + size, max_row)
+
+
+def window_rows(response: Dict) -> List[Dict]:
+    """Returns the rows of a transactions() response sorted by row index"""
+    return sorted(response.get("transactions") or [], key=lambda t: t["row_index"])
+
+
+def next_row(response: Dict) -> int:
+    """Returns the row following the newest row of a transactions() response, 1 if there are no rows"""
+    rows = response.get("transactions") or []
+    return max((row["row_index"] for row in rows), default=0) + 1
@@ -0,0 +1,150 @@
+import threading
+import time
+
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+
+PUBLIC = "public"
+PRIVATE = "private"
+RECEIVE_ADDRESS = "receive_address"
+
+PUBLIC_ENDPOINTS = frozenset(
+    ["ticker", "tickers", "orderbook", "orderbook_top", "trades"]
+)
+
+
+class TokenBucket:
+    """A token bucket which queues callers instead of rejecting them
+
+    Tokens are reserved up front, when the bucket is empty the balance goes
+    negative and the caller is told how long to wait before its token becomes
+    available. Callers are therefore served in the order they reserved tokens.
+
+    Args:
+        rate: The number of tokens added per second
+        burst: The maximum number of tokens the bucket holds
+        clock: A function returning monotonic time in seconds
+    """
+
+    def __init__(
+        self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 1) -> float:
+        """Reserves tokens from the bucket
+
+        Args:
+            tokens: The number of tokens to reserve
+
+        Returns:
+            The number of seconds to wait before the tokens may be used
+        """
+        with self._lock:
+            now = self.clock()
+            elapsed = max(now - self.updated, 0)
+            self.tokens = min(self.tokens + elapsed * self.rate, self.burst)
+            self.updated = now
+            self.tokens -= tokens
+
+            if self.tokens >= 0:
+                return 0.0
+
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Paces requests using a token bucket per endpoint group
+
+    Public market data and private endpoints have separate budgets, while
+    create_receive_address() additionally draws from its own bucket of 1 address
+    per hour with bursts of up to 10. A single limiter may be shared by several
+    clients, the sync, async and asyncio clients wait for the time returned by
+    reserve() before sending a request.
+
+    Args:
+        budgets: A dict mapping a group to a (rate per second, burst) tuple which overrides the defaults
+        clock: A function returning monotonic time in seconds
+    """
+
+    DEFAULT_BUDGETS = {
+        PUBLIC: (5.0, 10),
+        PRIVATE: (5.0, 10),
+        RECEIVE_ADDRESS: (1 / 3600.0, 10),
+    }
+
+    def __init__(
+        self,
+        budgets: Dict[str, Tuple[float, int]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        config = dict(self.DEFAULT_BUDGETS)
+        config.update(budgets or {})
+
+        self.buckets = {
+            group: TokenBucket(rate, burst, clock=clock)
+            for group, (rate, burst) in config.items()
+        }
+        self._stats = {
+            group: {"requests": 0, "delayed": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for group in self.buckets
+        }
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def groups(method: str, suffix: str) -> Tuple[str, ...]:
+        """Returns the groups whose budget is consumed by a request
+
+        Args:
+            method: The http verb i.e. get, post, put, delete
+            suffix: The uri suffix
+        """
+        name = suffix.split("/", 1)[0]
+
+        if name in PUBLIC_ENDPOINTS:
+            return (PUBLIC,)
+
+        if method == "post" and name == "funding_address":
+            return (PRIVATE, RECEIVE_ADDRESS)
+
+        return (PRIVATE,)
+
+    def reserve(self, method: str, suffix: str) -> float:
+        """Reserves a token for a request
+
+        Args:
+            method: The http verb i.e. get, post, put, delete
+            suffix: The uri suffix
+
+        Returns:
+            The number of seconds to wait before sending the request
+        """
+        wait = 0.0
+
+        for group in self.groups(method, suffix):
+            delay = self.buckets[group].reserve()
+            wait = max(wait, delay)
+
+            with self._lock:
+                stats = self._stats[group]
+                stats["requests"] += 1
+                stats["wait_total"] += delay
+                stats["wait_max"] = max(stats["wait_max"], delay)
+                if delay > 0:
+                    stats["delayed"] += 1
+
+        return wait
+
+    def stats(self) -> Dict[str, Dict]:
+        """Returns the number of requests, delayed requests and wait times in seconds per group"""
+        with self._lock:
+            return {group: dict(stats) for group, stats in self._stats.items()}
@@ -0,0 +1,216 @@
+import email.utils
+import random
+import threading
+import time
+
+from luno.endpoints import template
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+def parse_retry_after(
+    value: Optional[str], now: Callable[[], float] = time.time
+) -> Optional[float]:
+    """Parses a Retry-After header given either in seconds or as an http date
+
+    Args:
+        value: The value of the header
+        now: A function returning wall clock time in seconds
+
+    Returns:
+        The number of seconds to wait or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if date is None or date.tzinfo is None:
+        return None
+
+    return max(date.timestamp() - now(), 0.0)
+
+
+class Retry:
+    """Tracks the attempts made for a single request, created by RetryPolicy.begin()
+
+    Args:
+        policy: The policy the request is retried under
+        retryable: False if the request may not be retried at all
+    """
+
+    def __init__(self, policy: "RetryPolicy", retryable: bool) -> None:
+        self.policy = policy
+        self.retryable = retryable
+        self.attempts = 1
+        self.started = policy.clock()
+
+    def timeout(self) -> Optional[float]:
+        """Returns the seconds left before the deadline, used as the timeout of an attempt
+
+        Returns:
+            The remaining time or None if the policy has no deadline
+        """
+        if self.policy.deadline is None:
+            return None
+
+        # http libraries reject a timeout of zero, an attempt started right at the
+        # deadline is given a millisecond so it fails with a timeout
+        remaining = self.policy.deadline - (self.policy.clock() - self.started)
+        return max(remaining, 0.001)
+
+    def next_delay(
+        self, status: int = None, retry_after: str = None
+    ) -> Optional[float]:
+        """Returns the seconds to wait before retrying a failed attempt
+
+        Args:
+            status: The status code of the response, None if the request failed to connect
+            retry_after: The value of the Retry-After header of the response
+
+        Returns:
+            The delay or None if the request should not be retried
+        """
+        policy = self.policy
+
+        if status is not None and status not in policy.statuses:
+            return None
+
+        if not self.retryable or self.attempts >= policy.attempts:
+            return policy._give_up()
+
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = policy.backoff(self.attempts)
+        elif delay > policy.max_retry_after:
+            return policy._give_up()
+
+        elapsed = policy.clock() - self.started
+        if policy.deadline is not None and elapsed + delay > policy.deadline:
+            return policy._give_up()
+
+        self.attempts += 1
+        policy._record(delay)
+        return delay
+
+
+class RetryPolicy:
+    """Decides whether and when failed requests are retried
+
+    Requests which fail to connect or receive one of the retryable status codes
+    are retried with exponential backoff and full jitter, the Retry-After header
+    is honored when present. GET requests are retried automatically, other verbs
+    are only retried for the (method, endpoint) pairs listed in safe_endpoints
+    since repeating e.g. a postorder request which reached the exchange places a
+    second order. No retry is made which would end after the deadline of the
+    request and the time left before the deadline is the timeout of each attempt.
+
+    A single policy may be shared by the sync, async and asyncio clients, each
+    client sleeps for the delay returned by Retry.next_delay().
+
+    Args:
+        attempts: The maximum number of attempts per request including the first
+        backoff: The delay in seconds before the first retry, doubled for every further retry
+        max_backoff: The maximum backoff delay in seconds
+        deadline: The maximum number of seconds spent on a request including retries, None to disable
+        max_retry_after: Give up instead of waiting for a Retry-After longer than this many seconds
+        statuses: The status codes which are retried
+        safe_endpoints: Pairs of a verb and a path template e.g. ("delete", "quotes/{quote_id}") which may be retried
+        clock: A function returning monotonic time in seconds
+        jitter: A function returning a random float in [0, 1) which scales the backoff
+    """
+
+    def __init__(
+        self,
+        attempts: int = 4,
+        backoff: float = 0.1,
+        max_backoff: float = 5.0,
+        deadline: Optional[float] = 10.0,
+        max_retry_after: float = 30.0,
+        statuses: Iterable[int] = RETRY_STATUSES,
+        safe_endpoints: Iterable[Tuple[str, str]] = (),
+        clock: Callable[[], float] = time.monotonic,
+        jitter: Callable[[], float] = random.random,
+    ) -> None:
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+
+        self.attempts = attempts
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.max_retry_after = max_retry_after
+        self.statuses = frozenset(statuses)
+        self.safe_endpoints = frozenset(
+            (method, endpoint) for method, endpoint in safe_endpoints
+        )
+        self.clock = clock
+        self.jitter = jitter
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.wait_total = 0.0
+        self._lock = threading.Lock()
+
+    def retryable(self, method: str, suffix: str) -> bool:
+        """Returns True if a request may be retried
+
+        Args:
+            method: The http verb i.e. get, post, put, delete
+            suffix: The uri suffix
+        """
+        return method == "get" or (method, template(suffix)) in self.safe_endpoints
+
+    def begin(self, method: str, suffix: str) -> Retry:
+        """Starts tracking the attempts of a request
+
+        Args:
+            method: The http verb i.e. get, post, put, delete
+            suffix: The uri suffix
+        """
+        with self._lock:
+            self.requests += 1
+
+        return Retry(self, self.retryable(method, suffix))
+
+    def backoff(self, retry: int) -> float:
+        """Returns the jittered backoff before a retry
+
+        Args:
+            retry: The number of the retry starting from 1
+        """
+        ceiling = min(self.max_backoff, self.base_backoff * 2 ** (retry - 1))
+        return ceiling * self.jitter()
+
+    def _record(self, delay: float) -> None:
+        with self._lock:
+            self.retries += 1
+            self.wait_total += delay
+
+    def _give_up(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def stats(self) -> Dict:
+        """Returns the number of requests, retries, requests given up on and the total delay"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "wait_total": self.wait_total,
+            }
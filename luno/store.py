@@ -0,0 +1,489 @@
+import bisect
+import collections
+import mmap
+import os
+import struct
+import threading
+
+from luno.endpoints import Routine
+from luno.endpoints import drive
+from luno.lazy import lazy_import
+from luno.pagination import TradePager
+from typing import Any
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+np = lazy_import("numpy", optional=True)
+
+# timestamp (ms), sequence, price, volume, is_buy packed without padding
+RECORD = struct.Struct("<qqdd?")
+TIMESTAMP = struct.Struct("<q")
+FIELDS = ("timestamp", "sequence", "price", "volume", "is_buy")
+
+SUFFIX = ".trades"
+SEGMENT_RECORDS = 1 << 20
+INDEX_INTERVAL = 256
+
+Record = Tuple[int, int, float, float, bool]
+
+
+def record_dtype():
+    """Returns the NumPy dtype of a record, requires NumPy"""
+    return np.dtype(
+        [
+            ("timestamp", "<i8"),
+            ("sequence", "<i8"),
+            ("price", "<f8"),
+            ("volume", "<f8"),
+            ("is_buy", "?"),
+        ]
+    )
+
+
+def as_record(trade: Dict) -> Record:
+    """Returns the record of a trades() or list_trades() row"""
+    volume = trade["volume"] if "volume" in trade else trade["base"]
+    is_buy = trade["is_buy"] if "is_buy" in trade else trade.get("type") == "BID"
+    return (
+        int(trade["timestamp"]),
+        int(trade.get("sequence") or 0),
+        float(trade["price"]),
+        float(volume),
+        bool(is_buy),
+    )
+
+
+def record_key(record: Record) -> Hashable:
+    """Returns a key which identifies the trade of a record, see pagination.trade_key
+
+    list_trades() rows carry no sequence, fills of the same price, volume and side
+    within a millisecond share a key and are told apart by counting them.
+    """
+    if record[1]:
+        return record[1]
+
+    return record[2:]
+
+
+def _close(data: mmap.mmap) -> bool:
+    """Closes a memory map, returns False if it is still viewed e.g. by an array"""
+    try:
+        data.close()
+    except BufferError:
+        return False
+
+    return True
+
+
+class Segment:
+    """A file of fixed width trade records in timestamp order
+
+    The timestamp of every INDEX_INTERVAL-th record is kept in a sparse index, a
+    timestamp is located by bisecting the index and then the records of a single
+    block of the memory mapped file. The file is mapped again once records were
+    appended, maps which are no longer viewed are closed when it is.
+
+    Args:
+        path: The path of the segment file
+    """
+
+    __slots__ = ("path", "count", "first", "last", "index", "maps")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.count = 0
+        self.first = None
+        self.last = None
+        self.index = []
+        self.maps = []
+
+    def load(self) -> None:
+        """Reads the size of an existing segment and rebuilds its index"""
+        size = os.path.getsize(self.path)
+        count = size // RECORD.size
+        if size % RECORD.size:
+            # a record torn by an interrupted write is dropped
+            os.truncate(self.path, count * RECORD.size)
+
+        self.count = count
+        data = self.map()
+        if data is None:
+            return
+
+        self.index = [
+            self.timestamp(data, position)
+            for position in range(0, count, INDEX_INTERVAL)
+        ]
+        self.first = self.index[0]
+        self.last = self.timestamp(data, count - 1)
+
+    def map(self, count: int = None) -> Optional[mmap.mmap]:
+        """Returns a read only memory map of the first count records, None if there are none"""
+        count = self.count if count is None else count
+        if not count:
+            return None
+
+        if self.maps and len(self.maps[-1]) >= count * RECORD.size:
+            return self.maps[-1]
+
+        self.close()
+        with open(self.path, "rb") as f:
+            data = mmap.mmap(f.fileno(), count * RECORD.size, access=mmap.ACCESS_READ)
+
+        self.maps.append(data)
+        return data
+
+    def close(self) -> None:
+        """Closes the memory maps of the segment which are no longer viewed"""
+        self.maps = [data for data in self.maps if not _close(data)]
+
+    @staticmethod
+    def timestamp(data: mmap.mmap, position: int) -> int:
+        return TIMESTAMP.unpack_from(data, position * RECORD.size)[0]
+
+    def added(self, timestamps: Iterable[int]) -> None:
+        """Updates the count and index after records were written"""
+        for timestamp in timestamps:
+            if self.count % INDEX_INTERVAL == 0:
+                self.index.append(timestamp)
+
+            if self.first is None:
+                self.first = timestamp
+
+            self.last = timestamp
+            self.count += 1
+
+    def search(self, data: mmap.mmap, timestamp: int, right: bool = False) -> int:
+        """Returns the position of the first record at or, when right is True, after a timestamp"""
+        find = bisect.bisect_right if right else bisect.bisect_left
+        block = max(find(self.index, timestamp) - 1, 0)
+        low = block * INDEX_INTERVAL
+        high = min(low + INDEX_INTERVAL, self.count)
+
+        while low < high:
+            middle = (low + high) // 2
+            found = self.timestamp(data, middle)
+            if found < timestamp or (right and found == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+
+class TradeStore:
+    """An append only store of trade history on disk
+
+    Trades are appended to a directory per pair as fixed width binary records
+    (see RECORD) in files of at most segment_records records. Reads memory map
+    the segments, a range query bisects the first and last timestamps of the
+    segments and then the sparse index of a segment so only the records in range
+    are touched. With NumPy the records are returned as structured arrays which
+    are views of the mapped files.
+
+    Prices and volumes are stored as float64. Trades older than the newest
+    stored trade, or already stored at its timestamp, are skipped on append so
+    pages repeated by pagination may be appended again safely. Trades without a
+    sequence which are alike in every field are each kept, a repeated page only
+    adds those of them beyond the number already stored.
+
+    The store should be closed, or used as a context manager, to unmap the
+    segments. Arrays returned by read() keep their segment mapped until they are
+    released.
+
+    Example:
+        with TradeStore("trades") as store:
+            sync_trades(client, store, "XBTZAR", since=1530000000000)
+            trades = store.read("XBTZAR", since=1535000000000)
+
+    Args:
+        path: The directory holding the store, created if missing
+        segment_records: The maximum number of records per segment file
+    """
+
+    def __init__(self, path: str, segment_records: int = SEGMENT_RECORDS) -> None:
+        if segment_records < 1:
+            raise ValueError("segment_records must be at least 1")
+
+        self.path = path
+        self.segment_records = segment_records
+        self._segments = {}
+        self._tails = {}
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+    def __enter__(self) -> "TradeStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the segments, the store is reopened when it is used again"""
+        with self._lock:
+            for segments in self._segments.values():
+                for segment in segments:
+                    segment.close()
+
+            self._segments.clear()
+            self._tails.clear()
+
+    def pairs(self) -> List[str]:
+        """Returns the pairs with trades in the store"""
+        return sorted(
+            name
+            for name in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, name))
+        )
+
+    def segments(self, pair: str) -> List[Segment]:
+        """Returns the segments of a pair oldest first"""
+        with self._lock:
+            segments = self._segments.get(pair)
+            if segments is None:
+                directory = os.path.join(self.path, pair)
+                names = (
+                    sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+                )
+                segments = [
+                    Segment(os.path.join(directory, name))
+                    for name in names
+                    if name.endswith(SUFFIX)
+                ]
+                for segment in segments:
+                    segment.load()
+
+                self._segments[pair] = segments
+
+            return segments
+
+    def count(self, pair: str) -> int:
+        """Returns the number of trades stored for a pair"""
+        with self._lock:
+            return sum(segment.count for segment in self.segments(pair))
+
+    def last_timestamp(self, pair: str) -> Optional[int]:
+        """Returns the timestamp of the newest trade stored for a pair, None if there are none"""
+        with self._lock:
+            for segment in reversed(self.segments(pair)):
+                if segment.count:
+                    return segment.last
+
+            return None
+
+    def append(self, pair: str, trades: Iterable[Dict]) -> int:
+        """Appends trades sorted by timestamp ascending
+
+        Args:
+            pair: Currency pair e.g. XBTZAR
+            trades: trades() or list_trades() rows e.g. a page returned by TradePager
+
+        Returns:
+            The number of trades appended
+        """
+        with self._lock:
+            last, keys = self._tail(pair)
+            seen = collections.Counter()
+            records = []
+
+            for trade in trades:
+                record = as_record(trade)
+                timestamp = record[0]
+                if last is not None and timestamp < last:
+                    continue
+
+                if timestamp != last:
+                    last, keys = timestamp, collections.Counter()
+                    seen.clear()
+
+                # a trade is new once it occurs more often than it is stored
+                key = record_key(record)
+                seen[key] += 1
+                if seen[key] <= keys[key]:
+                    continue
+
+                keys[key] += 1
+                records.append(record)
+
+            self._tails[pair] = last, keys
+            self._write(pair, records)
+            return len(records)
+
+    def pager(self, pair: str, since: int = None, until: int = None) -> TradePager:
+        """Returns a TradePager which fetches only the trades missing from the tail of the store
+
+        Args:
+            pair: Currency pair e.g. XBTZAR
+            since: Unix timestamp in milliseconds to start from while the store holds no trades of the pair
+            until: Stop after this Unix timestamp in milliseconds
+        """
+        last = self.last_timestamp(pair)
+        if last is None:
+            if since is None:
+                raise ValueError(f"since is required, no {pair} trades are stored")
+
+            last = since
+
+        return TradePager(pair, max(last, since or last), until)
+
+    def chunks(self, pair: str, since: int = None, until: int = None) -> Iterator:
+        """Yields the records in a time range a segment at a time
+
+        Args:
+            pair: Currency pair e.g. XBTZAR
+            since: Unix timestamp in milliseconds of the first trade (inclusive)
+            until: Unix timestamp in milliseconds of the last trade (inclusive)
+
+        Returns:
+            A generator of structured NumPy arrays which are views of the mapped
+            segments, or of memoryviews of packed records without NumPy
+        """
+        for view in self._views(pair, since, until):
+            if np is not None:
+                yield np.frombuffer(view, dtype=record_dtype())
+            else:
+                yield view
+
+    def read(self, pair: str, since: int = None, until: int = None):
+        """Returns the records in a time range
+
+        Args:
+            pair: Currency pair e.g. XBTZAR
+            since: Unix timestamp in milliseconds of the first trade (inclusive)
+            until: Unix timestamp in milliseconds of the last trade (inclusive)
+
+        Returns:
+            A structured NumPy array with the FIELDS columns, a view of the mapped
+            file when the range lies within one segment, or a list of record
+            tuples without NumPy
+        """
+        chunks = list(self.chunks(pair, since, until))
+        if np is not None:
+            if len(chunks) == 1:
+                return chunks[0]
+
+            return np.concatenate(chunks) if chunks else np.empty(0, record_dtype())
+
+        return [record for chunk in chunks for record in RECORD.iter_unpack(chunk)]
+
+    def iter_trades(
+        self, pair: str, since: int = None, until: int = None
+    ) -> Iterator[Dict]:
+        """Iterates over the trades in a time range as dicts of the FIELDS
+
+        Args:
+            pair: Currency pair e.g. XBTZAR
+            since: Unix timestamp in milliseconds of the first trade (inclusive)
+            until: Unix timestamp in milliseconds of the last trade (inclusive)
+
+        Returns:
+            A generator of trade dicts sorted by timestamp ascending
+        """
+        for view in self._views(pair, since, until):
+            for record in RECORD.iter_unpack(view):
+                yield dict(zip(FIELDS, record))
+
+    def _views(self, pair: str, since: int = None, until: int = None) -> Iterator:
+        """Yields a memoryview of the packed records in range of each segment"""
+        # the maps are viewed while the lock is held so a concurrent append which
+        # maps a segment again does not close them
+        with self._lock:
+            segments = [
+                (segment, segment.count, memoryview(segment.map()))
+                for segment in self.segments(pair)
+                if segment.count
+                and (since is None or segment.last >= since)
+                and (until is None or segment.first <= until)
+            ]
+
+        for segment, count, data in segments:
+            start = 0 if since is None else segment.search(data, since)
+            stop = count if until is None else segment.search(data, until, right=True)
+            if start < stop:
+                yield data[start * RECORD.size : stop * RECORD.size]
+
+    def _tail(self, pair: str) -> Tuple[Optional[int], collections.Counter]:
+        """Returns the newest timestamp of a pair and the count of each key at it"""
+        tail = self._tails.get(pair)
+        if tail is not None:
+            return tail
+
+        last = self.last_timestamp(pair)
+        keys = collections.Counter()
+        if last is not None:
+            for segment in reversed(self.segments(pair)):
+                if not segment.count or segment.last != last:
+                    break
+
+                data = segment.map()
+                start = segment.search(data, last)
+                for position in range(start, segment.count):
+                    record = RECORD.unpack_from(data, position * RECORD.size)
+                    keys[record_key(record)] += 1
+
+                if start:
+                    break
+
+        self._tails[pair] = last, keys
+        return last, keys
+
+    def _write(self, pair: str, records: List[Record]) -> None:
+        segments = self.segments(pair)
+        directory = os.path.join(self.path, pair)
+        os.makedirs(directory, exist_ok=True)
+
+        while records:
+            if not segments or segments[-1].count >= self.segment_records:
+                name = f"{len(segments):06d}{SUFFIX}"
+                segments.append(Segment(os.path.join(directory, name)))
+
+            segment = segments[-1]
+            batch = records[: self.segment_records - segment.count]
+            records = records[len(batch) :]
+
+            with open(segment.path, "ab") as f:
+                f.write(b"".join(RECORD.pack(*record) for record in batch))
+
+            segment.added(record[0] for record in batch)
+
+
+def sync_trades(
+    client: Any, store: TradeStore, pair: str, since: int = None, until: int = None
+) -> Any:
+    """Appends the trades missing from the tail of a store, fetching a page of at most 100 trades at a time
+
+    Only trades after the newest stored trade are requested, so the history is
+    downloaded once.
+
+    Example:
+        sync_trades(client, store, "XBTZAR", since=1530000000000)
+        await sync_trades(asyncio_client, store, "XBTZAR")
+
+    Args:
+        client: A sync, twisted or asyncio client
+        store: The TradeStore to append to
+        pair: Currency pair e.g. XBTZAR
+        since: Unix timestamp in milliseconds to start from while the store holds no trades of the pair
+        until: Stop after this Unix timestamp in milliseconds
+
+    Returns:
+        The number of trades appended, a twisted deferred which will eventually
+        return it for the twisted client or a coroutine for the asyncio client
+    """
+    return drive(client, _sync_trades(store, pair, since, until))
+
+
+def _sync_trades(store: TradeStore, pair: str, since: int, until: int) -> Routine:
+    pager = store.pager(pair, since, until)
+    added = 0
+
+    while not pager.done:
+        response = yield "get", "trades", pager.params()
+        added += store.append(pair, pager.page(response))
+
+    return added
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import aiohttp
+
+from luno.exceptions import SequenceGapException
+from luno.streams.base import LunoStreamBase
+
+
+class LunoAsyncioStreamClient(LunoStreamBase):
+    """Streaming market data client for asyncio built on aiohttp
+
+    Example:
+        client = LunoAsyncioStreamClient("XBTZAR", api_key, secret)
+        task = asyncio.ensure_future(client.run())
+        await client.wait_synced()
+        client.book.best_bid()
+    """
+
+    reconnect_delay = 1.0
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._stopped = False
+        self._synced = None
+        self._ws = None
+
+    async def wait_synced(self) -> None:
+        """Waits until the initial order book snapshot has been applied"""
+        if self._synced is None:
+            self._synced = asyncio.Event()
+
+        if self.synced:
+            return
+
+        await self._synced.wait()
+
+    async def run(self) -> None:
+        """Consumes the stream until stop() is called, reconnecting on errors and gaps"""
+        self._stopped = False
+
+        async with aiohttp.ClientSession() as session:
+            while not self._stopped:
+                try:
+                    await self._consume(session)
+                except SequenceGapException:
+                    self.resyncs += 1
+                    continue
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    pass
+
+                self.reset()
+                if not self._stopped:
+                    await asyncio.sleep(self.reconnect_delay)
+
+    async def _consume(self, session: aiohttp.ClientSession) -> None:
+        async with session.ws_connect(self.url) as ws:
+            self._ws = ws
+            try:
+                await ws.send_json(self.credentials())
+
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+
+                    self.handle_message(json.loads(msg.data) if msg.data else None)
+                    if self.synced and self._synced is not None:
+                        self._synced.set()
+            finally:
+                self._ws = None
+                if self._synced is not None:
+                    self._synced.clear()
+
+    async def stop(self) -> None:
+        """Stops consuming the stream and closes the websocket"""
+        self._stopped = True
+        if self._ws is not None:
+            await self._ws.close()
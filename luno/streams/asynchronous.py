@@ -0,0 +1,101 @@
+import json
+
+from autobahn.twisted.websocket import connectWS
+from autobahn.twisted.websocket import WebSocketClientFactory
+from autobahn.twisted.websocket import WebSocketClientProtocol
+from luno.exceptions import SequenceGapException
+from luno.streams.base import LunoStreamBase
+from twisted.internet.defer import Deferred
+from twisted.internet.defer import succeed
+from twisted.internet.protocol import ReconnectingClientFactory
+
+
+class _StreamProtocol(WebSocketClientProtocol):
+    def onOpen(self) -> None:
+        self.factory.resetDelay()
+        self.factory.client._protocol = self
+        self.sendMessage(json.dumps(self.factory.client.credentials()).encode())
+
+    def onMessage(self, payload: bytes, isBinary: bool) -> None:
+        client = self.factory.client
+
+        try:
+            client.handle_message(json.loads(payload) if payload else None)
+        except SequenceGapException:
+            client.resyncs += 1
+            self.sendClose()
+            return
+
+        client._notify_synced()
+
+    def onClose(self, wasClean: bool, code: int, reason: str) -> None:
+        client = self.factory.client
+        client._protocol = None
+        client.reset()
+
+
+class _StreamFactory(WebSocketClientFactory, ReconnectingClientFactory):
+    protocol = _StreamProtocol
+    maxDelay = 30
+
+    def clientConnectionFailed(self, connector, reason) -> None:
+        self.retry(connector)
+
+    def clientConnectionLost(self, connector, reason) -> None:
+        self.retry(connector)
+
+
+class LunoAsyncStreamClient(LunoStreamBase):
+    """Streaming market data client for twisted built on autobahn
+
+    Example:
+        client = LunoAsyncStreamClient("XBTZAR", api_key, secret)
+        d = client.start()
+        d.addCallback(lambda book: print(book.best_bid()))
+    """
+
+    def __init__(self, *args, reactor=None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.reactor = reactor
+        self._factory = None
+        self._protocol = None
+        self._waiting = []
+
+    def start(self) -> Deferred:
+        """Connects to the stream
+
+        Returns:
+            A twisted deferred which fires with the order book once it is synced
+        """
+        kwargs = {} if self.reactor is None else {"reactor": self.reactor}
+        self._factory = _StreamFactory(self.url, **kwargs)
+        self._factory.client = self
+        self._factory.initialDelay = 0.1
+        connectWS(self._factory)
+
+        return self.wait_synced()
+
+    def wait_synced(self) -> Deferred:
+        """Returns a twisted deferred which fires with the order book once it is synced"""
+        if self.synced:
+            return succeed(self.book)
+
+        d = Deferred()
+        self._waiting.append(d)
+        return d
+
+    def _notify_synced(self) -> None:
+        if not self.synced:
+            return
+
+        waiting, self._waiting = self._waiting, []
+        for d in waiting:
+            d.callback(self.book)
+
+    def stop(self) -> None:
+        """Stops reconnecting and closes the websocket"""
+        if self._factory is not None:
+            self._factory.stopTrying()
+
+        if self._protocol is not None:
+            self._protocol.sendClose()
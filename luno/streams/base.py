@@ -0,0 +1,153 @@
+from decimal import Decimal
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from luno.exceptions import SequenceGapException
+from luno.orderbook import LocalOrderBook
+
+
+class LunoStreamBase:
+    """Shared behaviour of the streaming market data clients
+
+    The Luno websocket stream sends an initial message containing every order in
+    the book followed by a numbered sequence of create, delete and trade updates.
+    Updates are applied to a LocalOrderBook replica while an index of the
+    individual orders is kept so that deletes and trades can be mapped back to
+    their price level. A gap in the sequence raises SequenceGapException, the
+    transport is expected to reconnect which delivers a fresh snapshot.
+
+    Args:
+        pair: Currency pair e.g. XBTZAR
+        api_key: A Luno api key
+        secret: A Luno api secret
+        uri: The base uri of the stream, the pair is appended to it
+        on_update: Called with the order book after every applied message
+        on_trade: Called with each trade update dict
+    """
+
+    STREAM_URI = "wss://ws.luno.com/api/1/stream/"
+
+    def __init__(
+        self,
+        pair: str,
+        api_key: str = None,
+        secret: str = None,
+        uri: str = None,
+        on_update: Callable[[LocalOrderBook], None] = None,
+        on_trade: Callable[[Dict], None] = None,
+    ) -> None:
+        self.pair = pair
+        self.api_key = api_key
+        self.secret = secret
+        self.uri = uri or self.STREAM_URI
+        self.on_update = on_update
+        self.on_trade = on_trade
+
+        self.book = LocalOrderBook(pair=pair)
+        self.orders = {}
+        self.sequence = None
+        self.status = None
+        self.resyncs = 0
+
+    @property
+    def url(self) -> str:
+        return f"{self.uri}{self.pair}"
+
+    @property
+    def synced(self) -> bool:
+        return self.sequence is not None
+
+    def credentials(self) -> Dict:
+        """Returns the credentials message which must be sent once connected"""
+        return {"api_key_id": self.api_key, "api_key_secret": self.secret}
+
+    def reset(self) -> None:
+        """Discards local state, called when the connection is lost"""
+        self.book.clear()
+        self.orders = {}
+        self.sequence = None
+
+    def handle_message(self, message: Optional[Dict]) -> None:
+        """Applies a decoded stream message to the local order book
+
+        Args:
+            message: A decoded stream message, empty keep alive messages are ignored
+
+        Raises:
+            SequenceGapException: If an update is missing from the stream
+        """
+        if not message:
+            return
+
+        if "asks" in message or "bids" in message:
+            self._apply_snapshot(message)
+        else:
+            self._apply_update(message)
+
+        if self.on_update is not None:
+            self.on_update(self.book)
+
+    def _apply_snapshot(self, message: Dict) -> None:
+        self.reset()
+
+        for side, key in (("BID", "bids"), ("ASK", "asks")):
+            for order in message.get(key) or []:
+                price, volume = Decimal(order["price"]), Decimal(order["volume"])
+                self.orders[order["id"]] = [side, price, volume]
+                self.book.add(side, price, volume)
+
+        self.sequence = int(message["sequence"])
+        self.status = message.get("status", self.status)
+        self.book.timestamp = message.get("timestamp")
+
+    def _apply_update(self, message: Dict) -> None:
+        if self.sequence is None:
+            return
+
+        sequence = int(message["sequence"])
+        if sequence <= self.sequence:
+            return
+
+        if sequence != self.sequence + 1:
+            expected = self.sequence + 1
+            self.reset()
+            raise SequenceGapException(
+                f"expected sequence {expected}, received {sequence}"
+            )
+
+        for trade in message.get("trade_updates") or []:
+            self._apply_trade(trade)
+
+        create = message.get("create_update")
+        if create:
+            side, price = create["type"], Decimal(create["price"])
+            volume = Decimal(create["volume"])
+            self.orders[create["order_id"]] = [side, price, volume]
+            self.book.add(side, price, volume)
+
+        delete = message.get("delete_update")
+        if delete:
+            order = self.orders.pop(delete["order_id"], None)
+            if order is not None:
+                self.book.remove(*order)
+
+        status = message.get("status_update")
+        if status:
+            self.status = status.get("status", self.status)
+
+        self.sequence = sequence
+        self.book.timestamp = message.get("timestamp", self.book.timestamp)
+
+    def _apply_trade(self, trade: Dict) -> None:
+        order = self.orders.get(trade["maker_order_id"])
+        if order is not None:
+            side, price, volume = order
+            base = min(Decimal(trade["base"]), volume)
+            self.book.remove(side, price, base)
+            order[2] = volume - base
+
+            if order[2] <= 0:
+                del self.orders[trade["maker_order_id"]]
+
+        if self.on_trade is not None:
+            self.on_trade(trade)
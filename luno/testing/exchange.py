@@ -0,0 +1,494 @@
+import base64
+import json
+import random
+import threading
+import time
+
+from collections import Counter
+from decimal import Decimal
+from luno.ratelimit import PUBLIC_ENDPOINTS
+from luno.ratelimit import RateLimiter
+from luno.testing.server import Handler
+from luno.testing.server import PayloadServer
+from luno.testing.server import endpoint
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+from urllib.parse import parse_qsl
+from urllib.parse import urlsplit
+
+ERROR_STATUSES = (500, 502, 503, 504)
+PRICE = Decimal("100000.00")
+
+
+class Faults:
+    """The faults a FakeExchange injects into its responses
+
+    Rates are the share of requests, between 0 and 1, which are answered with a
+    fault. A request is dropped, throttled or failed before any other work is
+    done, so a failed order placement never creates an order. A truncated
+    response is cut off part way through its body after the request was handled.
+
+    Args:
+        latency: Seconds every response is delayed by
+        jitter: Up to this many seconds are added to the latency at random
+        throttle_rate: The share of requests answered with 429 Too Many Requests
+        error_rate: The share of requests answered with a 5xx status
+        drop_rate: The share of requests whose connection is closed without a response
+        truncate_rate: The share of requests whose connection is closed part way through the response body
+        slow_body: Seconds over which each response body is trickled out
+        retry_after: The Retry-After header sent with 429 responses
+        rate_limits: A dict mapping a rate limiter group to requests per second, requests above the limit are answered with 429
+        endpoints: Only inject faults into these endpoints, all endpoints by default
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        truncate_rate: float = 0.0,
+        slow_body: float = 0.0,
+        retry_after: str = "1",
+        rate_limits: Dict[str, float] = None,
+        endpoints: Iterable[str] = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.truncate_rate = truncate_rate
+        self.slow_body = slow_body
+        self.retry_after = retry_after
+        self.rate_limits = dict(rate_limits or {})
+        self.endpoints = None if endpoints is None else frozenset(endpoints)
+
+    def applies(self, name: str) -> bool:
+        return self.endpoints is None or name in self.endpoints
+
+
+class FakeExchange(PayloadServer):
+    """A local stand-in for the Luno api with fault injection
+
+    Public endpoints answer with recorded payloads while orders and balances are
+    kept in memory, so orders placed with postorder or marketorder are returned
+    by listorders and orders, may be stopped with stoporder and move the balance.
+    Limit orders stay pending until fill() is called, fills are returned by
+    listtrades. Private endpoints require
+    the configured credentials. Faults may be replaced while the exchange runs.
+
+    Example:
+        with FakeExchange(faults=Faults(latency=0.05, error_rate=0.1)) as exchange:
+            client = LunoSyncClient("key", "secret", base_uri=exchange.uri)
+            client.post_limit_order("XBTZAR", "BID", "0.01", "100000")
+
+    Args:
+        host: The interface to bind to
+        port: The port to bind to, a free port is picked by default
+        faults: The faults to inject, none by default
+        api_key: The api key private endpoints require, None accepts any request
+        secret: The api secret private endpoints require
+        balances: A dict mapping an asset to its starting balance
+        seed: Seeds the random faults so runs may be repeated
+        clock: A function returning monotonic time in seconds, used for the rate limits
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        faults: Faults = None,
+        api_key: str = "key",
+        secret: str = "secret",
+        balances: Dict[str, str] = None,
+        seed: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(host, port)
+        self.faults = faults or Faults()
+        self.injected = Counter()
+        self.orders = {}
+        self.trades = []
+        self.balances = {}
+        self.clock = clock
+        self._random = random.Random(seed)
+        self._sequence = 0
+        self._windows = {}
+        self._state_lock = threading.Lock()
+
+        self.authorization = None
+        if api_key is not None and secret is not None:
+            token = base64.b64encode(f"{api_key}:{secret}".encode()).decode()
+            self.authorization = f"Basic {token}"
+
+        starting = {"XBT": "10.00", "ETH": "100.00", "ZAR": "1000000.00"}
+        starting.update(balances or {})
+        for index, (asset, amount) in enumerate(starting.items()):
+            self.balances[asset] = {
+                "account_id": str(1000 + index),
+                "asset": asset,
+                "balance": Decimal(amount),
+                "reserved": Decimal(0),
+                "unconfirmed": Decimal(0),
+            }
+
+    def handle(self, handler: Handler) -> None:
+        method = handler.command.lower()
+        url = urlsplit(handler.path)
+        suffix = url.path.split("/api/1/", 1)[-1].strip("/")
+        name = endpoint(handler.path)
+        with self._lock:
+            self.requests[name] += 1
+
+        faults = self.faults
+        fault = None
+        if faults.applies(name):
+            fault = self._fault(faults, method, suffix)
+            if fault is not None:
+                with self._lock:
+                    self.injected[fault] += 1
+
+            if fault == "drop":
+                handler.close_connection = True
+                return
+
+            delay = faults.latency + faults.jitter * self._uniform()
+            if delay > 0:
+                time.sleep(delay)
+
+            if fault == "throttle":
+                status, body = _error(429, "Too many requests", "ErrTooManyRequests")
+                return handler.write(status, body, {"Retry-After": faults.retry_after})
+
+            if fault == "error":
+                status = self._choice(ERROR_STATUSES)
+                return handler.write(*_error(status, "Internal error", "ErrInternal"))
+
+        status, body = self._dispatch(method, suffix, name, url.query, handler)
+
+        if fault == "truncate":
+            return self._truncate(handler, status, body)
+
+        if faults.slow_body > 0 and faults.applies(name):
+            with self._lock:
+                self.injected["slow"] += 1
+
+            return self._trickle(handler, status, body, faults.slow_body)
+
+        handler.write(status, body)
+
+    def _uniform(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def _choice(self, values: Tuple) -> int:
+        with self._lock:
+            return self._random.choice(values)
+
+    def _fault(self, faults: Faults, method: str, suffix: str) -> str:
+        """Returns the fault to inject into a request, if any"""
+        if faults.drop_rate and self._uniform() < faults.drop_rate:
+            return "drop"
+
+        if self._limited(faults, method, suffix):
+            return "throttle"
+
+        if faults.throttle_rate and self._uniform() < faults.throttle_rate:
+            return "throttle"
+
+        if faults.error_rate and self._uniform() < faults.error_rate:
+            return "error"
+
+        if faults.truncate_rate and self._uniform() < faults.truncate_rate:
+            return "truncate"
+
+        return None
+
+    def _limited(self, faults: Faults, method: str, suffix: str) -> bool:
+        """Counts a request against one second windows per rate limiter group"""
+        limited = False
+        now = int(self.clock())
+
+        with self._lock:
+            for group in RateLimiter.groups(method, suffix):
+                limit = faults.rate_limits.get(group)
+                if limit is None:
+                    continue
+
+                second, count = self._windows.get(group, (now, 0))
+                if second != now:
+                    second, count = now, 0
+
+                self._windows[group] = (second, count + 1)
+                limited = limited or count >= limit
+
+        return limited
+
+    def _truncate(self, handler: Handler, status: int, body: bytes) -> None:
+        """Writes the headers and half of a response body, then closes the connection"""
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body[: len(body) // 2])
+        handler.close_connection = True
+
+    def _trickle(self, handler: Handler, status: int, body: bytes, seconds: float):
+        """Writes a response body in chunks spread over a number of seconds"""
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+
+        chunks = 10
+        size = max(len(body) // chunks, 1)
+        for start in range(0, len(body), size):
+            time.sleep(seconds / chunks)
+            handler.wfile.write(body[start : start + size])
+
+    def _dispatch(
+        self, method: str, suffix: str, name: str, query: str, handler: Handler
+    ) -> Tuple[int, bytes]:
+        if name in PUBLIC_ENDPOINTS:
+            return self.recorded(method, name)
+
+        if self.authorization is not None:
+            if handler.headers.get("Authorization") != self.authorization:
+                return _error(401, "Unauthorized", "ErrUnauthorised")
+
+        params = dict(parse_qsl(query))
+        params.update(parse_qsl(handler.body.decode()))
+
+        with self._state_lock:
+            if (method, name) == ("post", "postorder"):
+                return self._post_limit_order(params)
+
+            if (method, name) == ("post", "marketorder"):
+                return self._post_market_order(params)
+
+            if (method, name) == ("post", "stoporder"):
+                return self._stop_order(params.get("order_id"))
+
+            if (method, name) == ("get", "orders"):
+                order = self.orders.get(suffix.split("/", 1)[-1])
+                if order is None:
+                    return _error(404, "Order not found", "ErrOrderNotFound")
+
+                return 200, _encode(order)
+
+            if (method, name) == ("get", "listorders"):
+                return 200, _encode({"orders": self._list_orders(params)})
+
+            if (method, name) == ("get", "listtrades"):
+                return 200, _encode({"trades": self._list_trades(params)})
+
+            if (method, name) == ("get", "balance"):
+                return 200, _encode({"balance": list(self.balances.values())})
+
+        return self.recorded(method, name)
+
+    def _account(self, asset: str) -> Dict:
+        return self.balances.setdefault(
+            asset,
+            {
+                "account_id": str(1000 + len(self.balances)),
+                "asset": asset,
+                "balance": Decimal(0),
+                "reserved": Decimal(0),
+                "unconfirmed": Decimal(0),
+            },
+        )
+
+    def _create_order(self, pair: str, kind: str, state: str, **amounts) -> Dict:
+        self._sequence += 1
+        now = int(time.time() * 1000)
+        order = {
+            "order_id": f"BXFAKE{self._sequence:010d}",
+            "creation_timestamp": now,
+            "expiration_timestamp": 0,
+            "completed_timestamp": now if state == "COMPLETE" else 0,
+            "type": kind,
+            "state": state,
+            "limit_price": Decimal(0),
+            "limit_volume": Decimal(0),
+            "base": Decimal(0),
+            "counter": Decimal(0),
+            "fee_base": Decimal(0),
+            "fee_counter": Decimal(0),
+            "pair": pair,
+        }
+        order.update(amounts)
+        self.orders[order["order_id"]] = order
+        return order
+
+    def _post_limit_order(self, params: Dict) -> Tuple[int, bytes]:
+        try:
+            pair = params["pair"]
+            kind = params["type"]
+            volume = Decimal(params["volume"])
+            price = Decimal(params["price"])
+        except (KeyError, ArithmeticError):
+            return _error(400, "Invalid order", "ErrInvalidArguments")
+
+        if kind not in ("BID", "ASK") or volume <= 0 or price <= 0:
+            return _error(400, "Invalid order", "ErrInvalidArguments")
+
+        base, counter = pair[:3], pair[3:]
+        account, amount = (
+            (self._account(counter), volume * price)
+            if kind == "BID"
+            else (self._account(base), volume)
+        )
+        if account["balance"] - account["reserved"] < amount:
+            return _error(400, "Insufficient balance", "ErrInsufficientBalance")
+
+        account["reserved"] += amount
+        order = self._create_order(
+            pair, kind, "PENDING", limit_price=price, limit_volume=volume
+        )
+        return 200, _encode({"order_id": order["order_id"]})
+
+    def _post_market_order(self, params: Dict) -> Tuple[int, bytes]:
+        pair, kind = params.get("pair", ""), params.get("type")
+        base, counter = self._account(pair[:3]), self._account(pair[3:])
+
+        try:
+            if kind == "BUY":
+                spend = Decimal(params["counter_volume"])
+                volume = (spend / PRICE).quantize(Decimal("0.000001"))
+            elif kind == "SELL":
+                volume = Decimal(params["base_volume"])
+                spend = volume * PRICE
+            else:
+                raise KeyError(kind)
+        except (KeyError, ArithmeticError):
+            return _error(400, "Invalid order", "ErrInvalidArguments")
+
+        paying, amount = (counter, spend) if kind == "BUY" else (base, volume)
+        if paying["balance"] - paying["reserved"] < amount:
+            return _error(400, "Insufficient balance", "ErrInsufficientBalance")
+
+        sign = 1 if kind == "BUY" else -1
+        base["balance"] += sign * volume
+        counter["balance"] -= sign * spend
+
+        order = self._create_order(
+            pair,
+            "BID" if kind == "BUY" else "ASK",
+            "COMPLETE",
+            base=volume,
+            counter=spend,
+        )
+        self._trade(order, volume, spend)
+        return 200, _encode({"order_id": order["order_id"]})
+
+    def _release(self, order: Dict) -> None:
+        """Releases the funds an order still has reserved"""
+        pair = order["pair"]
+        remaining = order["limit_volume"] - order["base"]
+        if order["type"] == "BID":
+            self._account(pair[3:])["reserved"] -= remaining * order["limit_price"]
+        else:
+            self._account(pair[:3])["reserved"] -= remaining
+
+    def _stop_order(self, order_id: str) -> Tuple[int, bytes]:
+        order = self.orders.get(order_id)
+        if order is None:
+            return _error(404, "Order not found", "ErrOrderNotFound")
+
+        if order["state"] != "PENDING":
+            return 200, _encode({"success": False})
+
+        self._release(order)
+        order["state"] = "COMPLETE"
+        order["completed_timestamp"] = int(time.time() * 1000)
+        return 200, _encode({"success": True})
+
+    def _list_orders(self, params: Dict) -> List[Dict]:
+        return [
+            order
+            for order in self.orders.values()
+            if params.get("state") in (None, order["state"])
+            and params.get("pair") in (None, order["pair"])
+        ]
+
+    def _trade(self, order: Dict, base: Decimal, counter: Decimal) -> None:
+        """Records a trade of an order which listtrades returns"""
+        self.trades.append(
+            {
+                "pair": order["pair"],
+                "sequence": len(self.trades) + 1,
+                "order_id": order["order_id"],
+                "type": order["type"],
+                "timestamp": int(time.time() * 1000),
+                "price": counter / base,
+                "volume": base,
+                "base": base,
+                "counter": counter,
+                "fee_base": Decimal(0),
+                "fee_counter": Decimal(0),
+                "is_buy": order["type"] == "BID",
+            }
+        )
+
+    def _list_trades(self, params: Dict) -> List[Dict]:
+        since = int(params.get("since", 0))
+        trades = [
+            trade
+            for trade in self.trades
+            if trade["pair"] == params.get("pair") and trade["timestamp"] >= since
+        ]
+        return trades[: int(params.get("limit", 100))]
+
+    def fill(self, order_id: str, volume: str = None) -> Dict:
+        """Fills a pending limit order at its limit price
+
+        Args:
+            order_id: The id of an order placed with postorder
+            volume: The base volume to fill, the remaining volume by default
+
+        Returns:
+            A copy of the order once filled
+        """
+        with self._state_lock:
+            order = self.orders[order_id]
+            if order["state"] != "PENDING":
+                raise ValueError(f"order {order_id} is not pending")
+
+            remaining = order["limit_volume"] - order["base"]
+            volume = remaining if volume is None else min(Decimal(volume), remaining)
+            counter = volume * order["limit_price"]
+            pair = order["pair"]
+            base_account = self._account(pair[:3])
+            counter_account = self._account(pair[3:])
+
+            if order["type"] == "BID":
+                counter_account["reserved"] -= counter
+                counter_account["balance"] -= counter
+                base_account["balance"] += volume
+            else:
+                base_account["reserved"] -= volume
+                base_account["balance"] -= volume
+                counter_account["balance"] += counter
+
+            order["base"] += volume
+            order["counter"] += counter
+            self._trade(order, volume, counter)
+            if order["base"] >= order["limit_volume"]:
+                order["state"] = "COMPLETE"
+                order["completed_timestamp"] = int(time.time() * 1000)
+
+            return dict(order)
+
+
+def _encode(data: Dict) -> bytes:
+    return json.dumps(data, default=str).encode()
+
+
+def _error(status: int, message: str, code: str) -> Tuple[int, bytes]:
+    return status, _encode({"error": message, "error_code": code})
@@ -0,0 +1,193 @@
+import random
+
+from typing import Dict
+
+PAIR = "XBTZAR"
+TIMESTAMP = 1530000000000
+
+
+def _amount(value: float, places: int) -> str:
+    return f"{value:.{places}f}"
+
+
+def ticker(pair: str = PAIR, seed: int = 0) -> Dict:
+    """Returns a ticker() response"""
+    rng = random.Random(seed)
+    bid = 100000 + rng.randint(0, 5000)
+
+    return {
+        "pair": pair,
+        "timestamp": TIMESTAMP,
+        "bid": _amount(bid, 2),
+        "ask": _amount(bid + rng.randint(1, 50), 2),
+        "last_trade": _amount(bid, 2),
+        "rolling_24_hour_volume": _amount(rng.uniform(10, 500), 6),
+    }
+
+
+def tickers(count: int = 20, seed: int = 0) -> Dict:
+    """Returns a tickers() response"""
+    pairs = [PAIR] + [f"P{index:02d}ZAR" for index in range(1, count)]
+    return {"tickers": [ticker(pair, seed + index) for index, pair in enumerate(pairs)]}
+
+
+def order_book(levels: int = 1000, seed: int = 0) -> Dict:
+    """Returns an order_book() response with the given number of orders per side"""
+    rng = random.Random(seed)
+    mid = 100000.0
+    bids, asks = [], []
+
+    for index in range(levels):
+        bids.append(
+            {
+                "price": _amount(mid - 1 - index * rng.uniform(0.5, 2), 2),
+                "volume": _amount(rng.uniform(0.0005, 2), 6),
+            }
+        )
+        asks.append(
+            {
+                "price": _amount(mid + 1 + index * rng.uniform(0.5, 2), 2),
+                "volume": _amount(rng.uniform(0.0005, 2), 6),
+            }
+        )
+
+    bids.sort(key=lambda order: -float(order["price"]))
+    asks.sort(key=lambda order: float(order["price"]))
+
+    return {"timestamp": TIMESTAMP, "bids": bids, "asks": asks}
+
+
+def trades(count: int = 100, since: int = TIMESTAMP, seed: int = 0) -> Dict:
+    """Returns a trades() response, newest trade first"""
+    rng = random.Random(seed)
+    rows = []
+    timestamp = since
+
+    for _ in range(count):
+        timestamp += rng.randint(0, 2000)
+        rows.append(
+            {
+                "timestamp": timestamp,
+                "price": _amount(100000 + rng.uniform(-500, 500), 2),
+                "volume": _amount(rng.uniform(0.0001, 1), 6),
+                "is_buy": rng.random() < 0.5,
+            }
+        )
+
+    rows.reverse()
+    return {"trades": rows}
+
+
+def transactions(
+    min_row: int = 1, max_row: int = 1001, account_id: str = "1", seed: int = 0
+) -> Dict:
+    """Returns a transactions() response for a range of rows"""
+    rng = random.Random(seed + min_row)
+    rows = []
+    balance = 10.0
+
+    for row_index in range(min_row, max_row):
+        delta = rng.uniform(-0.1, 0.1)
+        balance += delta
+        rows.append(
+            {
+                "row_index": row_index,
+                "timestamp": TIMESTAMP + row_index * 1000,
+                "balance": balance,
+                "available": balance,
+                "balance_delta": delta,
+                "available_delta": delta,
+                "currency": "XBT",
+                "description": "Bought BTC 0.01 for R 1,000.00",
+            }
+        )
+
+    return {"id": account_id, "transactions": rows}
+
+
+def orders(count: int = 50, pair: str = PAIR, seed: int = 0) -> Dict:
+    """Returns a list_orders() response"""
+    rng = random.Random(seed)
+    rows = []
+
+    for index in range(count):
+        volume = rng.uniform(0.001, 1)
+        rows.append(
+            {
+                "order_id": f"BXMC2CJ7HNB88U{index:04d}",
+                "creation_timestamp": TIMESTAMP + index,
+                "expiration_timestamp": 0,
+                "completed_timestamp": 0,
+                "type": "BID" if index % 2 else "ASK",
+                "state": "PENDING",
+                "limit_price": _amount(100000 + rng.uniform(-1000, 1000), 2),
+                "limit_volume": _amount(volume, 6),
+                "base": "0.00",
+                "counter": "0.00",
+                "fee_base": "0.00",
+                "fee_counter": "0.00",
+                "pair": pair,
+            }
+        )
+
+    return {"orders": rows}
+
+
+def balance(assets=("XBT", "ETH", "ZAR"), seed: int = 0) -> Dict:
+    """Returns a balance() response"""
+    rng = random.Random(seed)
+    return {
+        "balance": [
+            {
+                "account_id": str(1000 + index),
+                "asset": asset,
+                "balance": _amount(rng.uniform(0, 100), 6),
+                "reserved": _amount(rng.uniform(0, 1), 6),
+                "unconfirmed": "0.00",
+            }
+            for index, asset in enumerate(assets)
+        ]
+    }
+
+
+def fee_info() -> Dict:
+    """Returns a fee_info() response"""
+    return {"maker_fee": "0.00%", "taker_fee": "0.10%", "thirty_day_volume": "0.894"}
+
+
+def receive_address(asset: str = "XBT") -> Dict:
+    """Returns a receive_addresses() response"""
+    return {
+        "asset": asset,
+        "address": "E9Cmm5wnt5BQbN6BNqPoLJpgjeRyaWKhRT",
+        "total_received": "1.00",
+        "total_unconfirmed": "0.00",
+    }
+
+
+def withdrawal(withdrawal_id: int = 1139) -> Dict:
+    """Returns a withdrawal_request_status() response"""
+    return {
+        "id": str(withdrawal_id),
+        "status": "PENDING",
+        "created_at": TIMESTAMP,
+        "type": "ZAR_EFT",
+        "currency": "ZAR",
+        "amount": "1000.00",
+        "fee": "0.00",
+    }
+
+
+def quote(quote_id: int = 1324) -> Dict:
+    """Returns a create_quote() response"""
+    return {
+        "id": str(quote_id),
+        "type": "BUY",
+        "pair": PAIR,
+        "base_amount": "0.1",
+        "counter_amount": "10000.00",
+        "created_at": TIMESTAMP,
+        "expires_at": TIMESTAMP + 30000,
+        "discarded": False,
+        "exercised": False,
+    }
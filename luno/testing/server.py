@@ -0,0 +1,194 @@
+import json
+import threading
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from luno.testing import payloads
+from typing import Dict
+from typing import Tuple
+from urllib.parse import urlsplit
+
+
+def recorded_responses() -> Dict[Tuple[str, str], Dict]:
+    """Returns a response for every endpoint the clients call keyed by (method, endpoint)"""
+    order = payloads.orders(count=1)["orders"][0]
+    order_id = {"order_id": order["order_id"]}
+
+    return {
+        ("get", "ticker"): payloads.ticker(),
+        ("get", "tickers"): payloads.tickers(),
+        ("get", "orderbook"): payloads.order_book(levels=1000),
+        ("get", "orderbook_top"): payloads.order_book(levels=100),
+        ("get", "trades"): payloads.trades(),
+        ("post", "accounts"): {"id": "1000", "currency": "XBT", "name": "Trading"},
+        ("get", "balance"): payloads.balance(),
+        ("get", "transactions"): payloads.transactions(1, 101),
+        ("get", "listorders"): payloads.orders(),
+        ("post", "postorder"): order_id,
+        ("post", "marketorder"): order_id,
+        ("post", "stoporder"): {"success": True},
+        ("get", "orders"): order,
+        ("get", "listtrades"): payloads.trades(),
+        ("get", "fee_info"): payloads.fee_info(),
+        ("get", "funding_address"): payloads.receive_address(),
+        ("post", "funding_address"): payloads.receive_address(),
+        ("get", "withdrawals"): {"withdrawals": [payloads.withdrawal()]},
+        ("post", "withdrawals"): payloads.withdrawal(),
+        ("delete", "withdrawals"): payloads.withdrawal(),
+        ("post", "send"): {"success": True, "withdrawal_id": "1139"},
+        ("post", "quotes"): payloads.quote(),
+        ("get", "quotes"): payloads.quote(),
+        ("put", "quotes"): payloads.quote(),
+        ("delete", "quotes"): payloads.quote(),
+    }
+
+
+def endpoint(path: str) -> str:
+    """Returns the endpoint name of a request path e.g. orders for /api/1/orders/BXMC2CJ7HNB88U4"""
+    parts = urlsplit(path).path.split("/api/1/", 1)[-1].strip("/").split("/")
+    if parts[0] == "accounts" and parts[-1] == "transactions":
+        return "transactions"
+
+    return parts[0]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # the headers and body are written separately, without TCP_NODELAY every
+    # response waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def _respond(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        self.server.owner.handle(self)
+
+    def write(self, status: int, body: bytes, headers: Dict[str, str] = None) -> None:
+        """Writes a json response"""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    # the default backlog of 5 drops connections opened at once by a pool of
+    # clients, which then wait a second for the SYN to be retransmitted
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class PayloadServer:
+    """A local http server which answers every Luno endpoint with a recorded payload
+
+    Response bodies are encoded once up front so the server adds as little work
+    as possible to each request, which makes it suitable for benchmarking the
+    clients. Connections are kept alive and each one is served by a thread.
+
+    Example:
+        with PayloadServer() as server:
+            client = LunoSyncClient(base_uri=server.uri)
+            client.ticker("XBTZAR")
+
+    Args:
+        host: The interface to bind to
+        port: The port to bind to, a free port is picked by default
+        responses: A dict mapping (method, endpoint) to a response which overrides the recorded responses
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        responses: Dict[Tuple[str, str], Dict] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.requests = Counter()
+        self.bodies = {}
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+        data = recorded_responses()
+        data.update(responses or {})
+        for key, response in data.items():
+            self.set_response(*key, response)
+
+    @property
+    def uri(self) -> str:
+        return f"http://{self.host}:{self.port}/api/1/"
+
+    def set_response(self, method: str, name: str, response: Dict) -> None:
+        """Replaces the response of an endpoint
+
+        Args:
+            method: The http verb i.e. get, post, put, delete
+            name: The endpoint name e.g. orderbook
+            response: The python dict to respond with
+        """
+        self.bodies[(method, name)] = json.dumps(response).encode()
+
+    def respond(self, method: str, path: str) -> Tuple[int, bytes]:
+        """Returns the status and body of the response to a request"""
+        name = endpoint(path)
+        with self._lock:
+            self.requests[name] += 1
+
+        return self.recorded(method, name)
+
+    def recorded(self, method: str, name: str) -> Tuple[int, bytes]:
+        """Returns the status and recorded body of an endpoint without counting a request"""
+        body = self.bodies.get((method, name))
+        if body is None:
+            error = {"error": f"{method} {name} not found", "error_code": "ErrNotFound"}
+            return 404, json.dumps(error).encode()
+
+        return 200, body
+
+    def handle(self, handler: Handler) -> None:
+        """Answers a request, subclasses may override it to change how it is answered"""
+        handler.write(*self.respond(handler.command.lower(), handler.path))
+
+    def start(self) -> str:
+        """Starts the server on a background thread
+
+        Returns:
+            The base uri which may be passed to a client as base_uri
+        """
+        self._httpd = Server((self.host, self.port), Handler)
+        self._httpd.owner = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+
+        return self.uri
+
+    def stop(self) -> None:
+        """Stops the server"""
+        if self._httpd is None:
+            return
+
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+        self._httpd = None
+
+    def __enter__(self) -> "PayloadServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,238 @@
+import asyncio
+import itertools
+import threading
+import time
+
+from aiohttp import web
+from decimal import Decimal
+from typing import Dict
+from typing import List
+
+
+class FakeStreamServer:
+    """A local stand-in for the Luno websocket market data stream
+
+    The server runs its own event loop on a background thread so it can be used
+    from sync, asyncio and twisted code alike. It keeps an order book per pair,
+    sends it to every client that connects and broadcasts updates as orders are
+    created, deleted or traded against. The methods which mutate the book are
+    thread safe.
+
+    Example:
+        server = FakeStreamServer()
+        uri = server.start()
+        server.create_order("XBTZAR", "BID", "1000", "0.5")
+        server.stop()
+
+    Args:
+        host: The interface to bind to
+        port: The port to bind to, a free port is picked by default
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.host = host
+        self.port = port
+        self.credentials = []
+        self._books = {}
+        self._sequences = {}
+        self._clients = {}
+        self._ids = itertools.count(1)
+        self._loop = None
+        self._thread = None
+        self._runner = None
+
+    @property
+    def uri(self) -> str:
+        return f"ws://{self.host}:{self.port}/api/1/stream/"
+
+    def start(self) -> str:
+        """Starts the server on a background thread
+
+        Returns:
+            The base uri of the stream which may be passed to the stream clients
+        """
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._serve, args=(started,), daemon=True
+        )
+        self._thread.start()
+        started.wait()
+
+        return self.uri
+
+    def stop(self) -> None:
+        """Closes all connections and stops the server"""
+        if self._loop is None:
+            return
+
+        self._call(self._shutdown())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def _serve(self, started: threading.Event) -> None:
+        asyncio.set_event_loop(self._loop)
+
+        app = web.Application()
+        app.router.add_get("/api/1/stream/{pair}", self._handle)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+
+        started.set()
+        self._loop.run_forever()
+
+    async def _shutdown(self) -> None:
+        for clients in self._clients.values():
+            for ws in list(clients.values()):
+                await ws.close()
+
+        await self._runner.cleanup()
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _state(self, pair: str) -> Dict:
+        if pair not in self._books:
+            self._books[pair] = {}
+            self._sequences[pair] = 0
+            self._clients[pair] = {}
+
+        return self._books[pair]
+
+    def snapshot(self, pair: str) -> Dict:
+        """Returns the initial message sent to clients subscribing to a pair"""
+        orders = self._state(pair)
+        message = {
+            "sequence": str(self._sequences[pair]),
+            "asks": [],
+            "bids": [],
+            "status": "ACTIVE",
+            "timestamp": int(time.time() * 1000),
+        }
+
+        for order_id, (side, price, volume) in orders.items():
+            key = "bids" if side == "BID" else "asks"
+            message[key].append({"id": order_id, "price": price, "volume": volume})
+
+        return message
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        pair = request.match_info["pair"]
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.credentials.append(await ws.receive_json())
+
+        # messages are queued per connection so the snapshot is always sent
+        # before any update broadcast after it was taken
+        queue = asyncio.Queue()
+        queue.put_nowait(self.snapshot(pair))
+        self._clients[pair][queue] = ws
+        writer = asyncio.ensure_future(self._write(ws, queue))
+
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self._clients[pair].pop(queue, None)
+            writer.cancel()
+
+        return ws
+
+    async def _write(self, ws: web.WebSocketResponse, queue: asyncio.Queue) -> None:
+        while True:
+            await ws.send_json(await queue.get())
+
+    async def _broadcast(self, pair: str, update: Dict, skip: int = 0) -> None:
+        self._state(pair)
+        self._sequences[pair] += 1 + skip
+
+        message = {
+            "sequence": str(self._sequences[pair]),
+            "trade_updates": None,
+            "create_update": None,
+            "delete_update": None,
+            "status_update": None,
+            "timestamp": int(time.time() * 1000),
+        }
+        message.update(update)
+
+        for queue in self._clients[pair]:
+            queue.put_nowait(message)
+
+    def set_orders(self, pair: str, bids: List = (), asks: List = ()) -> None:
+        """Replaces the resting orders of a pair, intended to be used before clients connect
+
+        Args:
+            pair: Currency pair e.g. XBTZAR
+            bids: A list of (price, volume) tuples
+            asks: A list of (price, volume) tuples
+        """
+        orders = self._state(pair)
+        orders.clear()
+
+        for side, levels in (("BID", bids), ("ASK", asks)):
+            for price, volume in levels:
+                orders[f"O{next(self._ids)}"] = (side, str(price), str(volume))
+
+    def create_order(self, pair: str, side: str, price: str, volume: str) -> str:
+        """Adds an order to the book and broadcasts a create update
+
+        Returns:
+            The id of the new order
+        """
+        order_id = f"O{next(self._ids)}"
+
+        async def create():
+            self._state(pair)[order_id] = (side, str(price), str(volume))
+            update = {
+                "order_id": order_id,
+                "type": side,
+                "price": str(price),
+                "volume": str(volume),
+            }
+            await self._broadcast(pair, {"create_update": update})
+
+        self._call(create())
+        return order_id
+
+    def delete_order(self, pair: str, order_id: str) -> None:
+        """Removes an order from the book and broadcasts a delete update"""
+
+        async def delete():
+            self._state(pair).pop(order_id, None)
+            await self._broadcast(pair, {"delete_update": {"order_id": order_id}})
+
+        self._call(delete())
+
+    def trade(self, pair: str, maker_order_id: str, base: str, counter: str) -> None:
+        """Fills part of a resting order and broadcasts a trade update"""
+
+        async def trade():
+            orders = self._state(pair)
+            side, price, volume = orders[maker_order_id]
+            remaining = Decimal(volume) - Decimal(base)
+
+            if remaining > 0:
+                orders[maker_order_id] = (side, price, str(remaining))
+            else:
+                del orders[maker_order_id]
+
+            update = {
+                "base": str(base),
+                "counter": str(counter),
+                "maker_order_id": maker_order_id,
+                "taker_order_id": f"T{next(self._ids)}",
+            }
+            await self._broadcast(pair, {"trade_updates": [update]})
+
+        self._call(trade())
+
+    def skip_sequence(self, pair: str, count: int = 1) -> None:
+        """Broadcasts an empty update after skipping sequence numbers to simulate a gap"""
+        self._call(self._broadcast(pair, {}, skip=count))
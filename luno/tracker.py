@@ -0,0 +1,375 @@
+import threading
+import time
+
+from decimal import Decimal
+from luno.pagination import trade_key
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+
+NEW = "new"
+FILL = "fill"
+FILLED = "filled"
+CANCELLED = "cancelled"
+
+
+class TrackedOrder:
+    """The last known state of an order
+
+    Args:
+        order_id: The order reference e.g. BXMC2CJ7HNB88U4
+        pair: The currency pair of the order
+    """
+
+    __slots__ = (
+        "order_id",
+        "pair",
+        "type",
+        "state",
+        "limit_price",
+        "limit_volume",
+        "base",
+        "counter",
+        "creation_timestamp",
+        "seen",
+    )
+
+    def __init__(self, order_id: str, pair: str = None) -> None:
+        self.order_id = order_id
+        self.pair = pair
+        self.type = None
+        self.state = "PENDING"
+        self.limit_price = None
+        self.limit_volume = None
+        self.base = Decimal(0)
+        self.counter = Decimal(0)
+        self.creation_timestamp = None
+        self.seen = False
+
+    def update(self, order: Dict) -> None:
+        """Updates the order from a list_orders() row"""
+        self.pair = order.get("pair", self.pair)
+        self.type = order.get("type")
+        self.state = order.get("state", self.state)
+        self.limit_price = Decimal(order["limit_price"])
+        self.limit_volume = Decimal(order["limit_volume"])
+        self.base = Decimal(order.get("base") or 0)
+        self.counter = Decimal(order.get("counter") or 0)
+        self.creation_timestamp = order.get(
+            "creation_timestamp", self.creation_timestamp
+        )
+        self.seen = True
+
+    def __repr__(self) -> str:
+        return (
+            f"<TrackedOrder {self.order_id} {self.type} {self.pair} {self.state} "
+            f"{self.base}/{self.limit_volume}>"
+        )
+
+
+class OrderEvent:
+    """A change to a tracked order
+
+    Args:
+        kind: One of new, fill, filled or cancelled
+        order: The tracked order after the change
+        base: The base volume filled by the change, for fill and filled events
+        counter: The counter volume filled by the change, for fill and filled events
+    """
+
+    __slots__ = ("kind", "order", "base", "counter")
+
+    def __init__(
+        self,
+        kind: str,
+        order: TrackedOrder,
+        base: Decimal = Decimal(0),
+        counter: Decimal = Decimal(0),
+    ) -> None:
+        self.kind = kind
+        self.order = order
+        self.base = base
+        self.counter = counter
+
+    @property
+    def order_id(self) -> str:
+        return self.order.order_id
+
+    def __repr__(self) -> str:
+        return f"<OrderEvent {self.kind} {self.order_id} base={self.base}>"
+
+
+Observer = Callable[[OrderEvent], None]
+
+
+class OrderTracker:
+    """Keeps an index of open orders up to date from list_orders() and list_trades()
+
+    Each refresh lists the pending orders with a single request, whatever the
+    number of orders. Growth in the filled volume of a listed order is reported
+    as a fill. Orders which leave the pending list are resolved as filled from
+    list_trades() since their creation, paging while the orders of a pair are not
+    all accounted for. Orders the trades do not show as filled, because they were
+    cancelled or list_trades() lags, are confirmed with a single get_order() each,
+    so get_order() is never polled.
+
+    Refreshes are scheduled adaptively by delay(), every fast seconds while an
+    order was tracked or changed within the last settle seconds and every slow
+    seconds otherwise. The sync, async and asyncio clients drive the tracker with
+    refresh_orders() and watch_orders().
+
+    Args:
+        fast: Seconds between refreshes shortly after an order was placed or changed
+        slow: Seconds between refreshes while every order is resting
+        settle: Seconds after a change during which refreshes are fast
+        observers: Callables which receive every OrderEvent
+        clock: A function returning monotonic time in seconds
+    """
+
+    PAGE_SIZE = 100
+
+    def __init__(
+        self,
+        fast: float = 0.5,
+        slow: float = 5.0,
+        settle: float = 10.0,
+        observers: Iterable[Observer] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.fast = fast
+        self.slow = slow
+        self.settle = settle
+        self.observers = list(observers)
+        self.clock = clock
+        self.orders = {}
+        self.refreshes = 0
+        self._changed = None
+        self._resolving = {}
+        self._cursors = {}
+        self._fills = {}
+        self._confirming = {}
+        self._lock = threading.RLock()
+
+    def subscribe(self, observer: Observer) -> None:
+        """Adds an observer which receives every OrderEvent"""
+        self.observers.append(observer)
+
+    def track(self, order_id: str, pair: str, since: int = None) -> TrackedOrder:
+        """Tracks an order which was just placed and refreshes fast for a while
+
+        Args:
+            order_id: The id returned by post_limit_order()
+            pair: The currency pair of the order
+            since: Unix timestamp in milliseconds at or before which the order was placed, a minute ago by default to allow for clock skew
+        """
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                order = self.orders[order_id] = TrackedOrder(order_id, pair)
+                if since is None:
+                    since = int(time.time() * 1000) - 60000
+
+                order.creation_timestamp = since
+
+            self._changed = self.clock()
+            return order
+
+    def open_orders(self) -> List[TrackedOrder]:
+        with self._lock:
+            return list(self.orders.values())
+
+    def delay(self) -> float:
+        """Returns the seconds to wait before the next refresh"""
+        with self._lock:
+            if self._changed is not None and self.clock() - self._changed < self.settle:
+                return self.fast
+
+            return self.slow
+
+    def params(self) -> Dict:
+        """Returns the listorders query params of a refresh"""
+        return {"state": "PENDING"}
+
+    def update(self, response: Dict) -> List[OrderEvent]:
+        """Applies a list_orders() response of pending orders
+
+        Args:
+            response: A python dict as returned by list_orders()
+
+        Returns:
+            The new and fill events, orders no longer listed are resolved by resolve()
+        """
+        events = []
+        listed = set()
+
+        with self._lock:
+            self.refreshes += 1
+            # trades are paged afresh each refresh
+            self._cursors.clear()
+            self._fills.clear()
+
+            for row in response.get("orders") or []:
+                if row.get("state", "PENDING") != "PENDING":
+                    continue
+
+                order_id = row["order_id"]
+                listed.add(order_id)
+                order = self.orders.get(order_id)
+                if order is None:
+                    order = self.orders[order_id] = TrackedOrder(order_id)
+
+                seen, base, counter = order.seen, order.base, order.counter
+                order.update(row)
+
+                if not seen:
+                    events.append(OrderEvent(NEW, order))
+
+                if order.base > base:
+                    events.append(
+                        OrderEvent(
+                            FILL, order, order.base - base, order.counter - counter
+                        )
+                    )
+
+            for order_id, order in list(self.orders.items()):
+                if order_id not in listed:
+                    del self.orders[order_id]
+                    self._resolving[order_id] = order
+
+            if events or self._resolving:
+                self._changed = self.clock()
+
+        self._emit(events)
+        return events
+
+    def trade_queries(self) -> List[Dict]:
+        """Returns the listtrades query params of the next page needed to resolve orders no longer listed"""
+        with self._lock:
+            since = {}
+            for order in self._resolving.values():
+                timestamp = order.creation_timestamp
+                since[order.pair] = min(since.get(order.pair, timestamp), timestamp)
+
+            for pair in since:
+                if pair in self._cursors:
+                    since[pair] = self._cursors[pair][0]
+
+        return [{"pair": pair, "since": ts} for pair, ts in since.items()]
+
+    def resolve(self, pair: str, response: Dict) -> List[OrderEvent]:
+        """Resolves the orders of a pair which left the pending list from a page of their trades
+
+        Orders whose trades add up to their limit volume are filled. While orders
+        remain and the page is full the next page is requested by trade_queries(),
+        once the trades are exhausted the remaining orders are confirmed with
+        get_order() as requested by order_queries(), since list_trades() may lag
+        or hold more trades than a refresh pages through.
+
+        Args:
+            pair: The currency pair the response was requested for
+            response: A python dict as returned by list_trades()
+
+        Returns:
+            A filled event per order resolved by the page
+        """
+        trades = response.get("trades") or []
+        events = []
+
+        with self._lock:
+            cursor, seen = self._cursors.pop(pair, (None, set()))
+            fresh = [trade for trade in trades if trade_key(trade) not in seen]
+            for trade in fresh:
+                order_id = trade.get("order_id")
+                if order_id in self._resolving:
+                    base, counter = self._fills.get(order_id, (Decimal(0), Decimal(0)))
+                    self._fills[order_id] = (
+                        base + Decimal(trade["base"]),
+                        counter + Decimal(trade["counter"]),
+                    )
+
+            remaining = []
+            for order_id, order in list(self._resolving.items()):
+                if order.pair != pair:
+                    continue
+
+                base, counter = self._fills.get(order_id, (order.base, order.counter))
+                base, counter = max(base, order.base), max(counter, order.counter)
+                if order.limit_volume is not None and base >= order.limit_volume:
+                    del self._resolving[order_id]
+                    events.append(self._resolved(order, base, counter, True))
+                else:
+                    remaining.append((order, base, counter))
+
+            if remaining and fresh and len(trades) >= self.PAGE_SIZE:
+                newest = trades[-1]["timestamp"]
+                boundary = seen if newest == cursor else set()
+                boundary.update(
+                    trade_key(trade) for trade in trades if trade["timestamp"] == newest
+                )
+                self._cursors[pair] = newest, boundary
+            else:
+                for order, base, counter in remaining:
+                    del self._resolving[order.order_id]
+                    # an order which filled before it was ever listed has no known volume
+                    if order.limit_volume is None and base > 0:
+                        events.append(self._resolved(order, base, counter, True))
+                    else:
+                        self._confirming[order.order_id] = order
+
+        self._emit(events)
+        return events
+
+    def order_queries(self) -> List[str]:
+        """Returns the ids of the orders to confirm with get_order() once their trades are exhausted"""
+        with self._lock:
+            return list(self._confirming)
+
+    def confirm(self, response: Dict) -> List[OrderEvent]:
+        """Resolves an order which left the pending list as filled or cancelled
+
+        Args:
+            response: A python dict as returned by get_order()
+
+        Returns:
+            A filled or cancelled event, or no event when the order is still pending
+        """
+        events = []
+        with self._lock:
+            order = self._confirming.pop(response["order_id"], None)
+            if order is None:
+                return events
+
+            if response.get("state", "PENDING") == "PENDING":
+                self.orders[order.order_id] = order
+                return events
+
+            base, counter = order.base, order.counter
+            order.update(response)
+            order.base, order.counter = base, counter
+            base = max(base, Decimal(response.get("base") or 0))
+            counter = max(counter, Decimal(response.get("counter") or 0))
+
+            # market orders have no limit volume
+            if order.limit_volume:
+                complete = base >= order.limit_volume
+            else:
+                complete = base > 0
+
+            events.append(self._resolved(order, base, counter, complete))
+
+        self._emit(events)
+        return events
+
+    @staticmethod
+    def _resolved(
+        order: TrackedOrder, base: Decimal, counter: Decimal, complete: bool
+    ) -> OrderEvent:
+        delta = base - order.base, counter - order.counter
+        order.base, order.counter, order.state = base, counter, "COMPLETE"
+        return OrderEvent(FILLED if complete else CANCELLED, order, *delta)
+
+    def _emit(self, events: List[OrderEvent]) -> None:
+        for event in events:
+            for observer in self.observers:
+                observer(event)
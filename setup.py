@@ -62,6 +62,8 @@ if __name__ == "__main__":
         extras_require={
             "dev": [
                 "treq",
+                "aiohttp",
+                "autobahn",
                 "pytest_twisted",
                 "bumpversion",
                 "pytest",
@@ -72,5 +74,9 @@ if __name__ == "__main__":
                 "twine",
             ],
             "async": ["treq"],
+            "aio": ["aiohttp"],
+            "speedups": ["orjson"],
+            "numpy": ["numpy"],
+            "stream": ["aiohttp", "autobahn"],
         },
     )
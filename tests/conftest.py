@@ -0,0 +1,17 @@
+import pytest
+
+from helpers import Clock
+from luno.testing.exchange import FakeExchange
+
+
+@pytest.fixture
+def clock():
+    """Provides a manually advanced clock as a fixture"""
+    return Clock()
+
+
+@pytest.fixture
+def exchange():
+    """Provides a running fake exchange as a fixture"""
+    with FakeExchange() as exchange:
+        yield exchange
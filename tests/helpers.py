@@ -0,0 +1,59 @@
+import json
+
+import requests
+
+
+class Clock:
+    """A monotonic clock which only moves when now is set"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Headers(dict):
+    def getRawHeaders(self, name, default=None):
+        return [self[name]] if name in self else default
+
+
+class Response:
+    """A canned json response of the requests and aiohttp clients
+
+    Args:
+        data: The json body, a ticker by default
+        status: The http status code
+        retry_after: The Retry-After header
+    """
+
+    def __init__(self, data=None, status: int = 200, retry_after: str = None) -> None:
+        self.status = self.status_code = self.code = status
+        self.data = {"pair": "XBTZAR"} if data is None else data
+        self.headers = Headers()
+        if retry_after is not None:
+            self.headers["Retry-After"] = retry_after
+
+    @property
+    def content(self) -> bytes:
+        return json.dumps(self.data).encode()
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise requests.HTTPError(f"{self.status}")
+
+    async def read(self) -> bytes:
+        return self.content
+
+    def release(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TwistedResponse(Response):
+    """A canned json response of treq"""
+
+    def content(self) -> bytes:
+        return json.dumps(self.data).encode()
@@ -0,0 +1,502 @@
+import asyncio
+import pytest
+
+from decimal import Decimal
+
+from unittest.mock import AsyncMock
+
+pytest.importorskip("aiohttp")
+
+from helpers import Response
+from luno.clients.aio import LunoAsyncioClient
+from luno.exceptions import UnauthorisedResourceException
+from luno.models import Ticker
+from luno.orderbook import ColumnarOrderBook
+
+
+def run(client, coro):
+    """Runs a client coroutine on a new event loop and closes the client"""
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def response():
+    """Provides a response object as a fixture"""
+    return Response({})
+
+
+@pytest.fixture
+def client():
+    """Provides an authorized client as a fixture"""
+    return LunoAsyncioClient()
+
+
+@pytest.fixture
+def uclient():
+    """Provides an unauthorized client as a fixture"""
+    return LunoAsyncioClient("api_key", "secret")
+
+
+def test_ticker(mocker, response, client) -> None:
+    """Test the ticker method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}ticker"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(client, client.ticker(pair="XBTZAR"))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_tickers(mocker, response, client) -> None:
+    """Test the test_tickers method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}tickers"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(client, client.tickers())
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_order_book(mocker, response, client) -> None:
+    """Test the test_order_book method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}orderbook"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(client, client.order_book(pair="XBTZAR"))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_order_book_columnar(mocker, response, client) -> None:
+    """Test that the order_book method of the asyncio client returns a columnar book"""
+    body = b'{"bids": [{"price": "100.00", "volume": "1.5"}], "asks": []}'
+    mocker.patch.object(response, "read", new=AsyncMock(return_value=body))
+
+    mocker.patch("aiohttp.ClientSession.request", new=AsyncMock(return_value=response))
+    book = run(client, client.order_book(pair="XBTZAR", columnar=True))
+
+    message = f"expected a columnar book, received {book}"
+    assert isinstance(book, ColumnarOrderBook), message
+    assert book.best_bid() == (100.0, 1.5)
+
+
+def test_trades(mocker, response, client) -> None:
+    """Test the test_trades method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}trades"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(client, client.trades(pair="XBTZAR", since=100))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_ticker_typed(mocker, response) -> None:
+    """Test that the ticker method of a typed asyncio client returns a ticker model"""
+    client = LunoAsyncioClient(typed=True)
+    body = b'{"pair": "XBTZAR", "bid": "1000.00"}'
+    mocker.patch.object(response, "read", new=AsyncMock(return_value=body))
+
+    mocker.patch("aiohttp.ClientSession.request", new=AsyncMock(return_value=response))
+    ticker = run(client, client.ticker(pair="XBTZAR"))
+
+    message = f"expected a ticker model, received {ticker}"
+    assert isinstance(ticker, Ticker), message
+    assert ticker.bid == Decimal("1000.00")
+
+
+def test_private_resource_raises(mocker, response, client) -> None:
+    """Tests that accessing a private resource raises the UnauthorisedResourceException
+    exception when accessing it with an unathenticated client"""
+    url = f"{LunoAsyncioClient.BASE_URI}accounts"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    with pytest.raises(UnauthorisedResourceException):
+        client.accounts(currency="ZAR", name="testing")
+
+
+def test_accounts(mocker, response, uclient) -> None:
+    """Test the test_accounts method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}accounts"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(uclient, uclient.accounts(currency="ZAR", name="testing"))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_balance(mocker, response, uclient) -> None:
+    """Test the test_balance method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}balance"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(uclient, uclient.balance())
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_transactions(mocker, response, uclient) -> None:
+    """Test the test_transactions method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}accounts/1/transactions"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(uclient, uclient.transactions(1, 1, 1))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_list_orders(mocker, response, uclient) -> None:
+    """Test the test_list_orders method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}listorders"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(uclient, uclient.list_orders())
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_post_limit_order(mocker, response, uclient) -> None:
+    """Test the test_post_limit_order method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}postorder"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    kwargs = {
+        "pair": "test",
+        "kind": "test",
+        "volume": "test",
+        "price": "test",
+        "base_account_id": "test",
+        "counter_account_id": "test",
+    }
+
+    response = run(uclient, uclient.post_limit_order(**kwargs))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_post_market_order(mocker, response, uclient) -> None:
+    """Test the test_post_market_order method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}marketorder"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    kwargs = {
+        "pair": "test",
+        "kind": "test",
+        "counter_volume": "test",
+        "base_volume": "test",
+        "base_account_id": "test",
+        "counter_account_id": "test",
+    }
+
+    response = run(uclient, uclient.post_market_order(**kwargs))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_cancel_order(mocker, response, uclient) -> None:
+    """Test the test_cancel_order method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}stoporder"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    response = run(uclient, uclient.cancel_order(order_id="1234"))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_get_order(mocker, response, uclient) -> None:
+    """Test the test_get_order method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}orders/1234"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    response = run(uclient, uclient.get_order(order_id="1234"))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_list_trades(mocker, response, uclient) -> None:
+    """Test the test_list_trades method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}listtrades"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    kwargs = {"pair": "test", "since": "test", "limit": "test"}
+
+    response = run(uclient, uclient.list_trades(**kwargs))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_fee_info(mocker, response, uclient) -> None:
+    """Test the test_fee_info method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}fee_info"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(uclient, uclient.fee_info(pair="XBTZAR"))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_receive_addresses(mocker, response, uclient) -> None:
+    """Test the test_receive_addresses method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}funding_address"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    response = run(uclient, uclient.receive_addresses(asset="test", address="test"))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_create_receive_address(mocker, response, uclient) -> None:
+    """Test the test_create_receive_address method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}funding_address"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(uclient, uclient.create_receive_address(asset="test"))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_withdrawals(mocker, response, uclient) -> None:
+    """Test the test_withdrawals method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}withdrawals"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    response = run(uclient, uclient.withdrawals())
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_create_withdrawal_request(mocker, response, uclient) -> None:
+    """Test the test_create_withdrawal_request method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}withdrawals"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    kwargs = {"kind": "test", "amount": "test", "beneficiary_id": "test"}
+
+    response = run(uclient, uclient.create_withdrawal_request(**kwargs))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_withdrawal_request_status(mocker, response, uclient) -> None:
+    """Test the test_withdrawal_request_status method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}withdrawals/1234"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    response = run(uclient, uclient.withdrawal_request_status(withdrawal_id="1234"))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_cancel_withdrawal_request(mocker, response, uclient) -> None:
+    """Test the test_cancel_withdrawal_request method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}withdrawals/1234"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    response = run(uclient, uclient.cancel_withdrawal_request(withdrawal_id="1234"))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_send(mocker, response, uclient) -> None:
+    """Test the (client method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}send"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    kwargs = {
+        "amount": "test",
+        "currency": "test",
+        "address": "test",
+        "description": "test",
+        "message": "test",
+    }
+
+    response = run(uclient, uclient.send(**kwargs))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_create_quote(mocker, response, uclient) -> None:
+    """Test the test_create_quote method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}quotes"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+    kwargs = {"kind": "test", "base_amount": "test", "pair": "test"}
+
+    response = run(uclient, uclient.create_quote(**kwargs))
+
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_get_quote(mocker, response, uclient) -> None:
+    """Test the test_get_quote method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}quotes/1"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    response = run(uclient, uclient.get_quote(quote_id=1))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_exercise_quote(mocker, response, uclient) -> None:
+    """Test the test_exercise_quote method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}quotes/1"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    response = run(uclient, uclient.exercise_quote(quote_id=1))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_discard_quote(mocker, response, uclient) -> None:
+    """Test the test_discard_quote method of the asyncio client"""
+    url = f"{LunoAsyncioClient.BASE_URI}quotes/1"
+    data = {}
+
+    request = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    response = run(uclient, uclient.discard_quote(quote_id=1))
+    message = f"expected response {data}, received {response}"
+    assert data == response, message
+    assert request.call_args[0][1] == url
+
+
+def test_context_manager_closes_session() -> None:
+    """Tests that leaving the context manager closes the connection pool"""
+
+    async def main():
+        async with LunoAsyncioClient(limit=5, keepalive_timeout=30) as client:
+            session = client.session
+            assert session.connector.limit == 5
+
+        return session
+
+    session = asyncio.run(main())
+    assert session.closed
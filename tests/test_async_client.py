@@ -1,22 +1,18 @@
+from decimal import Decimal
+from helpers import TwistedResponse
 from luno.clients.asynchronous import LunoAsyncClient
 from luno.exceptions import UnauthorisedResourceException
+from luno.models import Balance
+from luno.orderbook import ColumnarOrderBook
 
 import pytest
 import pytest_twisted
 
 
-class Response:
-    def raise_for_status(self) -> None:
-        pass
-
-    def json(self):
-        return {}
-
-
 @pytest.fixture
 def response():
     """Provides a response object as a fixture"""
-    return Response()
+    return TwistedResponse({})
 
 
 @pytest.fixture
@@ -70,6 +66,20 @@ def test_order_book(mocker, response, client) -> None:
     assert data == response, message
 
 
+@pytest_twisted.inlineCallbacks
+def test_order_book_columnar(mocker, response, client) -> None:
+    """Test that the order_book method of the async client returns a columnar book"""
+    body = b'{"bids": [{"price": "100.00", "volume": "1.5"}], "asks": []}'
+    mocker.patch.object(response, "content", return_value=body)
+
+    mocker.patch("treq.request", return_value=response)
+    book = yield client.order_book(pair="XBTZAR", columnar=True)
+
+    message = f"expected a columnar book, received {book}"
+    assert isinstance(book, ColumnarOrderBook), message
+    assert book.best_bid() == (100.0, 1.5)
+
+
 @pytest_twisted.inlineCallbacks
 def test_trades(mocker, response, client) -> None:
     """Test the test_trades method of the sync client"""
@@ -83,6 +93,21 @@ def test_trades(mocker, response, client) -> None:
     assert data == response, message
 
 
+@pytest_twisted.inlineCallbacks
+def test_balance_typed(mocker, response) -> None:
+    """Test that the balance method of a typed async client returns balance models"""
+    client = LunoAsyncClient("api_key", "secret", typed=True)
+    body = b'{"balance": [{"account_id": "1", "asset": "XBT", "balance": "0.5"}]}'
+    mocker.patch.object(response, "content", return_value=body)
+
+    mocker.patch("treq.request", return_value=response)
+    balances = yield client.balance()
+
+    message = f"expected a list of balances, received {balances}"
+    assert [balance.balance for balance in balances] == [Decimal("0.5")], message
+    assert isinstance(balances[0], Balance)
+
+
 @pytest_twisted.inlineCallbacks
 def test_private_resource_raises(mocker, response, client) -> None:
     """Tests that accessing a private resource raises the UnauthorisedResourceException
@@ -196,11 +221,12 @@ def test_cancel_order(mocker, response, uclient) -> None:
     url = f"{LunoAsyncClient.BASE_URI}stoporder"
     data = {}
 
-    mocker.patch("treq.request", return_value=response)
+    request = mocker.patch("treq.request", return_value=response)
 
     response = yield uclient.cancel_order(order_id="1234")
     message = f"expected response {data}, received {response}"
     assert data == response, message
+    assert request.call_args[0][1] == url
 
 
 @pytest_twisted.inlineCallbacks
@@ -395,3 +421,50 @@ def test_discard_quote(mocker, response, uclient) -> None:
     response = yield uclient.discard_quote(quote_id=1)
     message = f"expected response {data}, received {response}"
     assert data == response, message
+
+
+@pytest_twisted.inlineCallbacks
+def test_requests_use_client_pool(mocker, response) -> None:
+    """Tests that requests are made through the connection pool owned by the client"""
+    client = LunoAsyncClient(max_persistent_per_host=4, cached_connection_timeout=30)
+    request = mocker.patch("treq.request", return_value=response)
+
+    yield client.ticker(pair="XBTZAR")
+
+    pool = request.call_args[1]["pool"]
+    assert pool is client.pool
+    assert pool.persistent
+    assert pool.maxPersistentPerHost == 4
+    assert pool.cachedConnectionTimeout == 30
+
+
+@pytest_twisted.inlineCallbacks
+def test_close_drains_pool(mocker) -> None:
+    """Tests that closing the client closes the cached connections"""
+    client = LunoAsyncClient()
+    close = mocker.spy(client.pool, "closeCachedConnections")
+
+    yield client.close()
+
+    assert close.call_count == 1
+    assert client.pool._connections == {}
+
+
+def test_rate_limiter_delays_request(mocker, response) -> None:
+    """Tests that a request is delayed by the wait time reserved from the rate limiter"""
+    from luno.ratelimit import PUBLIC, RateLimiter
+    from twisted.internet.task import Clock
+
+    clock = Clock()
+    limiter = RateLimiter(budgets={PUBLIC: (1, 1)}, clock=clock.seconds)
+    client = LunoAsyncClient(rate_limiter=limiter, reactor=clock)
+    request = mocker.patch("treq.request", return_value=response)
+
+    client.ticker(pair="XBTZAR")
+    d = client.ticker(pair="XBTZAR")
+    assert request.call_count == 1
+    assert not d.called
+
+    clock.advance(1)
+    assert request.call_count == 2
+    assert d.called
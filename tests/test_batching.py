@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+import pytest
+import pytest_twisted
+
+from helpers import Response
+from helpers import TwistedResponse
+from luno.batching import TickerBatcher
+from luno.batching import index_tickers
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from twisted.internet.task import Clock
+from unittest.mock import AsyncMock
+
+TICKERS = {
+    "tickers": [
+        {"pair": "XBTZAR", "bid": "100", "ask": "101"},
+        {"pair": "ETHZAR", "bid": "10", "ask": "11"},
+    ]
+}
+
+
+def respond(method, url, *args, response=Response, **kwargs):
+    """Responds to tickers and ticker requests"""
+    if url.endswith("tickers"):
+        return response(TICKERS)
+
+    return response({"pair": kwargs["params"]["pair"]})
+
+
+def test_index_tickers() -> None:
+    """Tests that the tickers response is indexed by pair"""
+    index = index_tickers(TICKERS)
+
+    assert sorted(index) == ["ETHZAR", "XBTZAR"]
+    assert index_tickers({"tickers": None}) == {}
+
+
+def test_join_and_close() -> None:
+    """Tests that callers join the open batch until it is closed"""
+    batcher = TickerBatcher()
+
+    leader, batch = batcher.join(list)
+    assert leader
+    assert batcher.join(list) == (False, batch)
+
+    batcher.close(batch)
+    assert batcher.join(list)[0]
+    assert batcher.stats() == {"requests": 3, "batches": 2}
+
+
+def test_sync_client_batches_tickers(mocker) -> None:
+    """Tests that concurrent sync ticker calls share a single tickers request"""
+    client = LunoSyncClient(ticker_batcher=TickerBatcher(window=0.2))
+    send = mocker.patch("requests.Session.request", side_effect=respond)
+
+    results = {}
+
+    def ticker(pair):
+        results[pair] = client.ticker(pair)
+
+    threads = [
+        threading.Thread(target=ticker, args=(pair,))
+        for pair in ("XBTZAR", "ETHZAR", "LTCZAR")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    urls = sorted(call[0][1].rsplit("/", 1)[1] for call in send.call_args_list)
+    message = f"expected a tickers request and a ticker fallback, received {urls}"
+    assert urls == ["ticker", "tickers"], message
+    assert results["XBTZAR"]["bid"] == "100"
+    assert results["ETHZAR"]["bid"] == "10"
+    assert results["LTCZAR"] == {"pair": "LTCZAR"}
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_client_batches_tickers(mocker) -> None:
+    """Tests that twisted ticker calls within the window share a tickers request"""
+    clock = Clock()
+    client = LunoAsyncClient(ticker_batcher=TickerBatcher(window=0.1), reactor=clock)
+    send = mocker.patch(
+        "treq.request",
+        side_effect=lambda *args, **kwargs: respond(
+            *args, response=TwistedResponse, **kwargs
+        ),
+    )
+
+    first = client.ticker("XBTZAR")
+    second = client.ticker("ETHZAR")
+    assert send.call_count == 0
+
+    clock.advance(0.1)
+    results = [(yield first), (yield second)]
+
+    assert send.call_count == 1
+    assert [ticker["pair"] for ticker in results] == ["XBTZAR", "ETHZAR"]
+
+
+def test_aio_client_batches_tickers(mocker) -> None:
+    """Tests that concurrent asyncio ticker calls share a single tickers request"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    response = Response(TICKERS)
+    send = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    async def main():
+        batcher = TickerBatcher(window=0.01)
+        async with LunoAsyncioClient(ticker_batcher=batcher) as client:
+            return await asyncio.gather(
+                client.ticker("XBTZAR"), client.ticker("ETHZAR")
+            )
+
+    results = asyncio.run(main())
+    assert send.call_count == 1
+    assert [ticker["bid"] for ticker in results] == ["100", "10"]
@@ -0,0 +1,300 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import pytest_twisted
+
+from helpers import TwistedResponse
+from luno.bulk import Batch
+from luno.bulk import LimitOrder
+from luno.bulk import MarketOrder
+from luno.bulk import OrderFilter
+from luno.bulk import as_order
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from luno.exceptions import HttpStatusException
+from luno.testing.exchange import FakeExchange
+from luno.testing.exchange import Faults
+
+
+def ladder(count: int, kind: str = "BID") -> list:
+    """Returns a ladder of limit orders 100 apart"""
+    return [
+        {
+            "pair": "XBTZAR",
+            "kind": kind,
+            "volume": "0.01",
+            "price": str(90000 + i * 100),
+        }
+        for i in range(count)
+    ]
+
+
+def test_as_order() -> None:
+    """Tests that dict specs are converted to limit and market orders"""
+    limit = as_order({"pair": "XBTZAR", "kind": "BID", "volume": "1", "price": "2"})
+    market = as_order({"pair": "XBTZAR", "kind": "BUY", "counter_volume": "100"})
+
+    assert isinstance(limit, LimitOrder)
+    assert limit.kwargs()["price"] == "2"
+    assert isinstance(market, MarketOrder)
+    assert as_order(market) is market
+
+
+def test_batch_order_and_rate(clock) -> None:
+    """Tests that items are handed out in order and paced by the rate"""
+    progress = []
+    batch = Batch(
+        "abcd",
+        concurrency=2,
+        rate=1.0,
+        progress=lambda *args: progress.append(args),
+        clock=clock,
+    )
+
+    waits = [batch.take()[2] for _ in range(4)]
+    assert batch.take() is None
+    assert waits == [0.0, 0.0, 1.0, 2.0]
+    assert batch.workers == 2
+
+    batch.finish(1, "b")
+    batch.finish(0, error=ValueError())
+    assert [(r.index, done, total) for r, done, total in progress] == [
+        (1, 1, 4),
+        (0, 2, 4),
+    ]
+    assert batch.results[0].ok is False
+    assert batch.results[1].response == "b"
+    assert batch.errors == 1
+
+
+def test_sync_post_orders(exchange) -> None:
+    """Tests that the sync client places orders concurrently and in input order"""
+    client = LunoSyncClient("key", "secret", base_uri=exchange.uri)
+    orders = ladder(20)
+    orders[5]["volume"] = "1000"
+
+    started = time.perf_counter()
+    results = client.post_orders(orders, concurrency=10)
+    elapsed = time.perf_counter() - started
+
+    message = f"expected 2 rounds of 50ms, received {elapsed:.3f}s"
+    assert elapsed < 0.5, message
+    assert [r.index for r in results] == list(range(20))
+    failed = [r.index for r in results if not r.ok]
+    assert failed == [5], f"expected only order 5 to fail, received {failed}"
+    assert results[5].error.response.status_code == 400
+
+    placed = {o["order_id"]: o for o in client.list_orders()["orders"]}
+    assert placed[results[6].response["order_id"]]["limit_price"] == "90600"
+
+
+def test_post_orders_progress(exchange) -> None:
+    """Tests that post_orders reports each result with the number placed and the number of orders"""
+    client = LunoSyncClient("key", "secret", base_uri=exchange.uri)
+    progress = []
+
+    results = client.post_orders(
+        ladder(4), concurrency=2, progress=lambda *args: progress.append(args)
+    )
+
+    assert sorted(done for _, done, _ in progress) == [1, 2, 3, 4]
+    assert {total for _, _, total in progress} == {4}
+    assert sorted(r.index for r, _, _ in progress) == [r.index for r in results]
+
+
+def test_sync_post_orders_caps_concurrency(exchange) -> None:
+    """Tests that no more than concurrency orders are in flight at once"""
+    client = LunoSyncClient("key", "secret", base_uri=exchange.uri)
+    in_flight, peak = 0, 0
+    lock = threading.Lock()
+    post = client.post_limit_order
+
+    def tracked(**kwargs):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+
+        try:
+            return post(**kwargs)
+        finally:
+            with lock:
+                in_flight -= 1
+
+    client.post_limit_order = tracked
+    results = client.post_orders(ladder(12), concurrency=3)
+
+    assert all(r.ok for r in results)
+    assert peak == 3
+
+
+def test_aio_post_orders(exchange) -> None:
+    """Tests that the asyncio client places orders concurrently and in input order"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def main():
+        async with LunoAsyncioClient("key", "secret", base_uri=exchange.uri) as client:
+            orders = ladder(10) + [MarketOrder("XBTZAR", "BUY", counter_volume="500")]
+            return await client.post_orders(orders, concurrency=11)
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+
+    assert time.perf_counter() - started < 0.5
+    assert all(r.ok for r in results)
+    assert isinstance(results[-1].item, MarketOrder)
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_post_orders(mocker) -> None:
+    """Tests that the twisted client returns the result of every order"""
+    client = LunoAsyncClient("key", "secret")
+    mocker.patch(
+        "treq.request",
+        side_effect=[
+            TwistedResponse({"order_id": "1"}),
+            TwistedResponse({"error_code": "ErrInsufficientBalance"}, 400),
+            TwistedResponse({"order_id": "3"}),
+        ],
+    )
+
+    results = yield client.post_orders(ladder(3), concurrency=1)
+
+    assert [r.response for r in results] == [{"order_id": "1"}, None, {"order_id": "3"}]
+    assert isinstance(results[1].error, HttpStatusException)
+
+
+def test_order_filter() -> None:
+    """Tests that open orders are selected by pair, side and price band"""
+    orders = {
+        "orders": [
+            {
+                "order_id": "1",
+                "pair": "XBTZAR",
+                "type": "BID",
+                "state": "PENDING",
+                "limit_price": "99",
+            },
+            {
+                "order_id": "2",
+                "pair": "XBTZAR",
+                "type": "BID",
+                "state": "PENDING",
+                "limit_price": "100",
+            },
+            {
+                "order_id": "3",
+                "pair": "XBTZAR",
+                "type": "ASK",
+                "state": "PENDING",
+                "limit_price": "101",
+            },
+            {
+                "order_id": "4",
+                "pair": "ETHZAR",
+                "type": "BID",
+                "state": "PENDING",
+                "limit_price": "100",
+            },
+            {
+                "order_id": "5",
+                "pair": "XBTZAR",
+                "type": "BID",
+                "state": "COMPLETE",
+                "limit_price": "100",
+            },
+        ]
+    }
+
+    assert OrderFilter().select(orders) == ["1", "2", "3", "4"]
+    assert OrderFilter(pair="XBTZAR", side="BID").select(orders) == ["1", "2"]
+    assert OrderFilter(min_price="100", max_price=100.5).select(orders) == ["2", "4"]
+    assert OrderFilter(pair="XBTZAR").params() == {"state": "PENDING", "pair": "XBTZAR"}
+
+    with pytest.raises(ValueError):
+        OrderFilter(side="BUY")
+
+
+def test_sync_cancel_orders(exchange) -> None:
+    """Tests that the sync client stops the matching open orders concurrently"""
+    client = LunoSyncClient("key", "secret", base_uri=exchange.uri)
+    placed = client.post_orders(ladder(10) + ladder(5, "ASK"), concurrency=10)
+    progress = []
+
+    started = time.perf_counter()
+    results = client.cancel_orders(
+        side="BID", min_price="90500", progress=lambda *args: progress.append(args)
+    )
+    elapsed = time.perf_counter() - started
+
+    message = f"expected a listing and a round of stops, received {elapsed:.3f}s"
+    assert elapsed < 0.3, message
+    expected = {r.response["order_id"] for r in placed[5:10]}
+    assert {r.item for r in results} == expected
+    assert all(r.response == {"success": True} for r in results)
+    assert sorted(done for _, done, _ in progress) == [1, 2, 3, 4, 5]
+    assert {total for _, _, total in progress} == {5}
+
+    remaining = client.list_orders()["orders"]
+    pending = [o for o in remaining if o["state"] == "PENDING"]
+    assert len(pending) == 10
+
+
+def test_aio_cancel_orders(exchange) -> None:
+    """Tests that the asyncio client stops every open order"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def main():
+        async with LunoAsyncioClient("key", "secret", base_uri=exchange.uri) as client:
+            await client.post_orders(ladder(6), concurrency=6)
+            results = await client.cancel_orders()
+            return results, await client.cancel_orders()
+
+    results, again = asyncio.run(main())
+
+    assert len(results) == 6 and all(r.ok for r in results)
+    assert again == []
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_cancel_orders(mocker) -> None:
+    """Tests that the twisted client lists the open orders and stops the matching ones"""
+    client = LunoAsyncClient("key", "secret")
+    listed = {
+        "orders": [
+            {
+                "order_id": "1",
+                "pair": "XBTZAR",
+                "type": "BID",
+                "state": "PENDING",
+                "limit_price": "1",
+            },
+            {
+                "order_id": "2",
+                "pair": "XBTZAR",
+                "type": "ASK",
+                "state": "PENDING",
+                "limit_price": "2",
+            },
+        ]
+    }
+    request = mocker.patch(
+        "treq.request",
+        side_effect=[
+            TwistedResponse(listed),
+            TwistedResponse({"success": True}),
+        ],
+    )
+
+    results = yield client.cancel_orders(pair="XBTZAR", side="ASK")
+
+    assert [(r.item, r.response) for r in results] == [("2", {"success": True})]
+    assert request.call_args_list[0][1]["params"] == {
+        "state": "PENDING",
+        "pair": "XBTZAR",
+    }
+    assert request.call_args_list[1][0][1].endswith("stoporder")
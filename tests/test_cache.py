@@ -0,0 +1,142 @@
+import asyncio
+import threading
+
+import pytest
+import pytest_twisted
+
+from helpers import Response
+from helpers import TwistedResponse
+from luno.cache import FETCH
+from luno.cache import HIT
+from luno.cache import WAIT
+from luno.cache import ResponseCache
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from twisted.internet.defer import Deferred
+from unittest.mock import AsyncMock
+
+
+@pytest.fixture
+def cache(clock):
+    """Provides a response cache as a fixture"""
+    return ResponseCache(ttls={"ticker": 1.0}, maxsize=2, clock=clock)
+
+
+def test_key(cache) -> None:
+    """Tests that only public market data GET requests are cacheable"""
+    assert cache.key("get", "ticker", {"pair": "XBTZAR"}) is not None
+    assert cache.key("get", "balance", {}) is None
+    assert cache.key("post", "ticker", {}) is None
+
+
+def test_hit_and_expiry(cache, clock) -> None:
+    """Tests that a response is served from the cache until its TTL expires"""
+    key = cache.key("get", "ticker", {"pair": "XBTZAR"})
+
+    assert cache.begin(key, object)[0] == FETCH
+    cache.finish(key, {"bid": "1"})
+    assert cache.begin(key, object) == (HIT, {"bid": "1"})
+
+    clock.now = 1.0
+    assert cache.begin(key, object)[0] == FETCH
+
+
+def test_coalescing(cache) -> None:
+    """Tests that identical requests wait on the request in flight"""
+    key = cache.key("get", "ticker", {"pair": "XBTZAR"})
+
+    state, waiter = cache.begin(key, list)
+    assert state == FETCH
+    assert cache.begin(key, list) == (WAIT, waiter)
+
+    cache.finish(key, failed=True)
+    assert cache.begin(key, list)[0] == FETCH
+
+
+def test_lru_eviction(cache) -> None:
+    """Tests that the least recently used response is evicted"""
+    keys = [cache.key("get", "ticker", {"pair": pair}) for pair in "ABC"]
+
+    for key in keys[:2]:
+        cache.begin(key, object)
+        cache.finish(key, key)
+
+    cache.begin(keys[0], object)
+    cache.begin(keys[2], object)
+    cache.finish(keys[2], keys[2])
+
+    assert cache.begin(keys[1], object)[0] == FETCH
+    assert cache.begin(keys[0], object)[0] == HIT
+
+    stats = cache.stats()
+    message = f"expected a single eviction, received {stats}"
+    assert stats["evictions"] == 1, message
+    assert stats["size"] == 2
+
+
+def test_sync_client_coalesces_requests(mocker) -> None:
+    """Tests that concurrent sync requests share a single http request"""
+    release = threading.Event()
+
+    def request(*args, **kwargs):
+        release.wait(5)
+        return Response()
+
+    client = LunoSyncClient(cache=ResponseCache())
+    send = mocker.patch("requests.Session.request", side_effect=request)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(client.ticker("XBTZAR")))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+
+    while client.cache.stats()["coalesced"] < 4:
+        pass
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert send.call_count == 1
+    assert results == [{"pair": "XBTZAR"}] * 5
+    assert client.ticker("XBTZAR") == {"pair": "XBTZAR"}
+    assert send.call_count == 1
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_client_coalesces_requests(mocker) -> None:
+    """Tests that concurrent twisted requests share a single http request"""
+    d = Deferred()
+    client = LunoAsyncClient(cache=ResponseCache())
+    send = mocker.patch("treq.request", return_value=d)
+
+    first = client.order_book("XBTZAR")
+    second = client.order_book("XBTZAR")
+    d.callback(TwistedResponse({"bids": []}))
+
+    results = [(yield first), (yield second)]
+    assert results == [{"bids": []}, {"bids": []}]
+    assert send.call_count == 1
+
+
+def test_aio_client_coalesces_requests(mocker) -> None:
+    """Tests that concurrent asyncio requests share a single http request"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    response = Response({"trades": []})
+    send = mocker.patch(
+        "aiohttp.ClientSession.request", new=AsyncMock(return_value=response)
+    )
+
+    async def main():
+        async with LunoAsyncioClient(cache=ResponseCache()) as client:
+            return await asyncio.gather(
+                *[client.trades("XBTZAR", since=1) for _ in range(3)]
+            )
+
+    assert asyncio.run(main()) == [{"trades": []}] * 3
+    assert send.call_count == 1
@@ -0,0 +1,183 @@
+import asyncio
+import random
+
+import pytest
+import pytest_twisted
+
+from luno import candles as candles_module
+from luno.candles import Candle
+from luno.candles import CandleEngine
+from luno.candles import CandleSeries
+from luno.candles import interval_ms
+from luno.candles import refresh_candles
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from twisted.internet.defer import succeed
+
+TRADES = [
+    {"timestamp": 1000 * i // 3, "price": str(100 + i % 7), "volume": "0.5"}
+    for i in range(600)
+]
+
+
+def fetch(method, suffix, params):
+    """Serves pages of TRADES including trades at the since timestamp"""
+    trades = [trade for trade in TRADES if trade["timestamp"] >= params["since"]]
+    return {"trades": list(reversed(trades[:100]))}
+
+
+def expected(trades, interval) -> list:
+    """Builds candles from a sorted list of trades the slow way"""
+    candles = {}
+    for trade in trades:
+        start = trade["timestamp"] // interval * interval
+        price, volume = float(trade["price"]), float(trade["volume"])
+        candle = candles.get(start)
+        if candle is None:
+            candles[start] = Candle(
+                interval, start, price, price, price, price, volume, 1
+            )
+            continue
+
+        candle.high = max(candle.high, price)
+        candle.low = min(candle.low, price)
+        candle.close = price
+        candle.volume += volume
+        candle.count += 1
+
+    return [candles[start] for start in sorted(candles)]
+
+
+@pytest.fixture(params=["numpy", "array"])
+def numpy(request, monkeypatch):
+    """Runs a test with and without NumPy"""
+    if request.param == "numpy":
+        return pytest.importorskip("numpy")
+
+    monkeypatch.setattr(candles_module, "np", None)
+
+
+def test_interval_ms() -> None:
+    """Tests that intervals are parsed into milliseconds"""
+    assert interval_ms("1s") == 1000
+    assert interval_ms("5m") == 300000
+    assert interval_ms(250) == 250
+
+    with pytest.raises(ValueError):
+        interval_ms("1w")
+
+
+def test_update_closes_candles() -> None:
+    """Tests that trades are aggregated and a newer candle closes the previous one"""
+    engine = CandleEngine(["1s", "1m"])
+
+    closed = engine.add_trades(TRADES[:4])
+
+    assert closed == [expected(TRADES[:3], 1000)[0]]
+    assert engine["1m"].latest() == expected(TRADES[:4], 60000)[0]
+    assert engine["1s"].candles() == expected(TRADES[:4], 1000)
+
+
+def test_late_trades_correct_candles() -> None:
+    """Tests that trades applied out of order give the candles of the ordered trades"""
+    shuffled = list(TRADES)
+    random.Random(1).shuffle(shuffled)
+    series = CandleSeries("10s")
+
+    for trade in shuffled:
+        series.update(trade["timestamp"], float(trade["price"]), 0.5)
+
+    assert series.candles() == expected(TRADES, 10000)
+    assert series.late > 0
+
+
+def test_ring_buffer_drops_old_candles() -> None:
+    """Tests that only the newest capacity candles are kept"""
+    series = CandleSeries("1s", capacity=10)
+    for trade in TRADES:
+        series.update(trade["timestamp"], float(trade["price"]), 0.5)
+
+    assert len(series) == 10
+    assert series.candles() == expected(TRADES, 1000)[-10:]
+
+    series.update(0, 1.0, 1.0)
+    assert series.dropped == 1
+    assert series.candles()[0].start == 190000
+
+
+def test_backfill(numpy) -> None:
+    """Tests that a backfill rebuilds the candles of the intervals it covers"""
+    series = CandleSeries("1s", capacity=100)
+    for trade in TRADES[-30:]:
+        series.update(trade["timestamp"], 1.0, 1.0)
+
+    trades = TRADES[-60:]
+    series.backfill(
+        [trade["timestamp"] for trade in trades],
+        [float(trade["price"]) for trade in trades],
+        [float(trade["volume"]) for trade in trades],
+    )
+
+    assert series.candles() == expected(trades, 1000)
+
+    columns = series.columns()
+    assert list(columns["start"]) == [candle.start for candle in series.candles()]
+    assert list(columns["close"]) == [candle.close for candle in series.candles()]
+
+
+def test_sync_refresh_candles(mocker) -> None:
+    """Tests that refresh_candles with the sync client only feeds new trades to the engine"""
+    client = LunoSyncClient()
+    request = mocker.patch.object(client, "_fetch_resource", side_effect=fetch)
+    engine = CandleEngine(["1m"], pair="XBTZAR", since=0)
+
+    refresh_candles(client, engine)
+
+    assert request.call_count == 7
+    assert engine["1m"].candles() == expected(TRADES, 60000)
+
+    request.reset_mock()
+    TRADES.append({"timestamp": 600000, "price": "90", "volume": "1"})
+    try:
+        closed = refresh_candles(client, engine)
+    finally:
+        TRADES.pop()
+
+    message = "expected the 1m candle to close when a trade opens the next one"
+    assert closed == [expected(TRADES, 60000)[-1]], message
+    assert request.call_count == 1
+    assert engine["1m"].latest().count == 1
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_refresh_candles(mocker) -> None:
+    """Tests that the twisted client feeds trades to the engine"""
+    client = LunoAsyncClient()
+    mocker.patch.object(
+        client, "_fetch_resource", side_effect=lambda *args: succeed(fetch(*args))
+    )
+    engine = CandleEngine(["1m"], pair="XBTZAR", since=0)
+
+    closed = yield refresh_candles(client, engine)
+
+    assert closed == expected(TRADES, 60000)[:-1]
+    assert engine["1m"].candles() == expected(TRADES, 60000)
+
+
+def test_aio_refresh_candles(mocker) -> None:
+    """Tests that the asyncio client feeds trades to the engine"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def afetch(*args):
+        return fetch(*args)
+
+    async def main():
+        client = LunoAsyncioClient()
+        mocker.patch.object(client, "_fetch_resource", side_effect=afetch)
+        engine = CandleEngine(["1s"], pair="XBTZAR", since=0)
+        await refresh_candles(client, engine)
+        return engine
+
+    engine = asyncio.run(main())
+    assert engine["1s"].candles() == expected(TRADES, 1000)[-1440:]
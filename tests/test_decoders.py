@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from helpers import Response
+from luno.clients.sync import LunoSyncClient
+from luno.decoders import DECODERS
+from luno.decoders import get_decoder
+from luno.testing import payloads
+
+
+@pytest.fixture
+def body():
+    """Provides an encoded order book response as a fixture"""
+    return json.dumps(payloads.order_book(levels=50)).encode()
+
+
+@pytest.mark.parametrize("name", sorted(DECODERS))
+def test_decoders(name, body) -> None:
+    """Tests that every available decoder decodes the raw response body"""
+    decoder = get_decoder(name)
+
+    message = f"expected {name} to decode the order book"
+    assert decoder(body) == json.loads(body), message
+
+
+def test_default_decoder() -> None:
+    """Tests that the fastest installed decoder is the default"""
+    expected = next(n for n in ("orjson", "ujson", "json") if n in DECODERS)
+    assert get_decoder() is DECODERS[expected]
+
+
+def test_unknown_decoder_raises() -> None:
+    """Tests that requesting an unknown decoder raises a ValueError"""
+    with pytest.raises(ValueError):
+        get_decoder("simplejson")
+
+
+def test_client_uses_decoder(mocker) -> None:
+    """Tests that the client decodes the raw response body with its decoder"""
+
+    decoder = mocker.Mock(return_value={})
+    client = LunoSyncClient(decoder=decoder)
+    mocker.patch("requests.Session.request", return_value=Response())
+
+    client.ticker(pair="XBTZAR")
+    decoder.assert_called_once_with(b'{"pair": "XBTZAR"}')
@@ -0,0 +1,256 @@
+import asyncio
+import inspect
+
+import pytest
+import pytest_twisted
+
+from luno.clients.abc import HEADERS
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from luno.endpoints import ENDPOINTS
+from luno.endpoints import Endpoint
+from luno.endpoints import drive
+from luno.endpoints import endpoint_methods
+from luno.exceptions import UnauthorisedResourceException
+from luno.models import Trade
+from twisted.internet.defer import fail
+from twisted.internet.defer import succeed
+
+
+def arguments(endpoint: Endpoint, optional: bool = True) -> dict:
+    """Returns a value per argument of an endpoint, optional arguments only when optional is True"""
+    return {
+        name: f"{name}-value"
+        for name, is_optional in endpoint.arguments
+        if optional or not is_optional
+    }
+
+
+def expected(endpoint: Endpoint, kwargs: dict) -> tuple:
+    """Returns the (verb, suffix, params) an endpoint should be requested with"""
+    params = {
+        endpoint.rename.get(name, name): kwargs[name]
+        for name, _ in endpoint.params
+        if name in kwargs
+    }
+    return endpoint.verb, endpoint.path.format(**kwargs), params
+
+
+def requested(fetch) -> tuple:
+    """Returns the (verb, suffix, params) of the last request, methods without params pass none"""
+    verb, suffix, *params = fetch.call_args[0]
+    return verb, suffix, params[0] if params else {}
+
+
+def aio_client():
+    aio = pytest.importorskip("luno.clients.aio")
+    return aio.LunoAsyncioClient("key", "secret")
+
+
+@pytest.mark.parametrize("optional", [True, False])
+@pytest.mark.parametrize("endpoint", ENDPOINTS, ids=lambda e: e.name)
+def test_sync_endpoints(mocker, endpoint, optional) -> None:
+    """Tests that the sync client requests each endpoint with its verb, path and params"""
+    client = LunoSyncClient("key", "secret")
+    fetch = mocker.patch.object(client, "_fetch_resource", return_value={})
+    kwargs = arguments(endpoint, optional)
+
+    assert getattr(client, endpoint.name)(**kwargs) == {}
+
+    message = f"expected {endpoint} to be requested as {expected(endpoint, kwargs)}"
+    assert requested(fetch) == expected(endpoint, kwargs), message
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_endpoints(mocker) -> None:
+    """Tests that the twisted client requests each endpoint with its verb, path and params"""
+    client = LunoAsyncClient("key", "secret")
+    fetch = mocker.patch.object(
+        client, "_fetch_resource", side_effect=lambda *args: succeed({})
+    )
+
+    for endpoint in ENDPOINTS:
+        kwargs = arguments(endpoint)
+        response = yield getattr(client, endpoint.name)(**kwargs)
+
+        assert response == {}
+        assert requested(fetch) == expected(endpoint, kwargs), endpoint
+
+
+def test_aio_endpoints(mocker) -> None:
+    """Tests that the asyncio client requests each endpoint with its verb, path and params"""
+    client = aio_client()
+    fetch = mocker.patch.object(client, "_fetch_resource", return_value={})
+
+    async def main():
+        for endpoint in ENDPOINTS:
+            kwargs = arguments(endpoint)
+            assert await getattr(client, endpoint.name)(**kwargs) == {}
+            assert requested(fetch) == expected(endpoint, kwargs), endpoint
+
+    asyncio.run(main())
+
+
+@pytest_twisted.inlineCallbacks
+def test_headers_are_shared(mocker) -> None:
+    """Tests that every client sends the prepared headers of each verb"""
+    sync = LunoSyncClient("key", "secret")
+    send = mocker.patch.object(sync.session, "request")
+    send.return_value.status_code = 200
+    send.return_value.content = b"{}"
+
+    twisted = LunoAsyncClient("key", "secret")
+    response = mocker.Mock(code=200, content=lambda: succeed(b"{}"))
+    treq_request = mocker.patch(
+        "treq.request", side_effect=lambda *args, **kwargs: succeed(response)
+    )
+
+    aio = aio_client()
+    aio._session = mocker.Mock(closed=False)
+    read = mocker.AsyncMock(return_value=b"{}")
+    aio._session.request = mocker.AsyncMock(
+        return_value=mocker.Mock(status=200, read=read)
+    )
+
+    for verb in HEADERS:
+        sync._fetch_resource(verb, "tickers", {})
+        yield twisted._fetch_resource(verb, "tickers", {})
+        asyncio.run(aio._fetch_resource(verb, "tickers", {}))
+
+        for request in (send, treq_request, aio._session.request):
+            assert request.call_args[1]["headers"] is HEADERS[verb], (verb, request)
+
+
+def test_signatures_match() -> None:
+    """Tests that every client exposes the same signature per endpoint"""
+    clients = [LunoSyncClient, LunoAsyncClient, type(aio_client())]
+
+    for endpoint in ENDPOINTS:
+        signatures = {
+            str(
+                inspect.signature(getattr(client, endpoint.name)).replace(
+                    return_annotation=inspect.Signature.empty
+                )
+            )
+            for client in clients
+        }
+        assert len(signatures) == 1, signatures
+
+
+def test_generated_methods() -> None:
+    """Tests the docstrings, names and authentication of the generated methods"""
+    method = LunoAsyncClient.list_trades
+
+    assert method.__qualname__ == "LunoAsyncClient.list_trades"
+    assert method.__module__ == "luno.clients.asynchronous"
+    assert "pair: Filter to trades of this currency pair" in method.__doc__
+    assert "A twisted deferred which will eventually return a python dict" in (
+        method.__doc__
+    )
+
+    with pytest.raises(UnauthorisedResourceException):
+        LunoSyncClient().balance()
+
+
+def test_typed_endpoint(mocker) -> None:
+    """Tests that generated methods convert responses in typed mode"""
+    client = LunoSyncClient(typed=True)
+    trade = {"timestamp": 1, "price": "1", "volume": "1", "is_buy": True}
+    mocker.patch.object(client, "_fetch_resource", return_value={"trades": [trade]})
+
+    trades = client.trades("XBTZAR")
+
+    assert isinstance(trades[0], Trade)
+
+
+@pytest.mark.parametrize("kind,volume", [("BUY", "base"), ("SELL", "counter")])
+def test_checked_endpoint(mocker, kind, volume) -> None:
+    """Tests that a market order without the volume of its kind is not placed"""
+    client = LunoSyncClient("key", "secret")
+    fetch = mocker.patch.object(client, "_fetch_resource", return_value={})
+
+    with pytest.raises(ValueError):
+        client.post_market_order("XBTZAR", kind, **{f"{volume}_volume": "1"})
+
+    assert not fetch.called
+
+
+def test_source() -> None:
+    """Tests the source compiled for an endpoint"""
+    endpoint = Endpoint(
+        "get_order", "get", "orders/{order_id}", "order_id: str, limit: int = None"
+    )
+
+    assert endpoint.source() == (
+        "def get_order(self, order_id: str, limit: int = None) -> 'Dict':\n"
+        "    params = {}\n"
+        "    if limit is not None:\n"
+        "        params['limit'] = limit\n"
+        "    return self._fetch_resource('get', f'orders/{order_id}', params)\n"
+    )
+    assert "async def" in endpoint.source("asyncio")
+
+
+def test_invalid_endpoints() -> None:
+    """Tests that mistakes in the endpoint table are raised at import time"""
+    with pytest.raises(ValueError):
+        Endpoint("get_order", "get", "orders/{id}", "order_id: str")
+
+    with pytest.raises(ValueError):
+        Endpoint("trades", "get", "trades", "pair: str = 'XBTZAR'")
+
+    with pytest.raises(TypeError):
+
+        @endpoint_methods("sync")
+        class Client:
+            def balance(self):
+                pass
+
+
+def routine():
+    """A routine which retries a failed request once"""
+    try:
+        response = yield "get", "tickers", {}
+    except ValueError:
+        response = yield "get", "tickers", {"retry": 1}
+
+    return response["tickers"]
+
+
+def test_drive(mocker) -> None:
+    """Tests that routines are sent responses and have request errors raised in them"""
+    client = LunoSyncClient()
+    fetch = mocker.patch.object(
+        client, "_fetch_resource", side_effect=[ValueError(), {"tickers": []}]
+    )
+
+    assert drive(client, routine()) == []
+    assert fetch.call_args_list[1][0] == ("get", "tickers", {"retry": 1})
+
+
+@pytest_twisted.inlineCallbacks
+def test_drive_async(mocker) -> None:
+    """Tests that the twisted client runs routines as deferreds"""
+    client = LunoAsyncClient()
+    responses = iter([ValueError(), {"tickers": []}])
+
+    def fetch(*args):
+        response = next(responses)
+        return fail(response) if isinstance(response, Exception) else succeed(response)
+
+    mocker.patch.object(client, "_fetch_resource", side_effect=fetch)
+
+    assert (yield drive(client, routine())) == []
+
+
+def test_drive_aio(mocker) -> None:
+    """Tests that the asyncio client runs routines as coroutines"""
+    client = aio_client()
+    mocker.patch.object(
+        client,
+        "_fetch_resource",
+        side_effect=[ValueError(), {"tickers": []}],
+        new_callable=mocker.AsyncMock,
+    )
+
+    assert asyncio.run(drive(client, routine())) == []
@@ -0,0 +1,174 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from decimal import Decimal
+from luno.clients.sync import LunoSyncClient
+from luno.ratelimit import PUBLIC
+from luno.retry import RetryPolicy
+from luno.testing.exchange import FakeExchange
+from luno.testing.exchange import Faults
+
+
+@pytest.fixture
+def client(exchange):
+    """Provides an authenticated sync client of the fake exchange as a fixture"""
+    return LunoSyncClient("key", "secret", base_uri=exchange.uri)
+
+
+def balances(client) -> dict:
+    return {row["asset"]: row for row in client.balance()["balance"]}
+
+
+def test_base_uri(exchange) -> None:
+    """Tests that the base uri of a client may be configured"""
+    client = LunoSyncClient(base_uri=exchange.uri)
+
+    assert client.BASE_URI == exchange.uri
+    assert LunoSyncClient().BASE_URI == "https://api.mybitx.com/api/1/"
+    assert client.ticker("XBTZAR")["pair"] == "XBTZAR"
+
+
+def test_limit_orders(exchange, client) -> None:
+    """Tests that limit orders are kept, reserve funds and may be stopped"""
+    order_id = client.post_limit_order("XBTZAR", "BID", "0.5", "100000")["order_id"]
+
+    assert client.get_order(order_id)["state"] == "PENDING"
+    assert [o["order_id"] for o in client.list_orders()["orders"]] == [order_id]
+    assert Decimal(balances(client)["ZAR"]["reserved"]) == 50000
+
+    assert client.cancel_order(order_id) == {"success": True}
+    assert client.cancel_order(order_id) == {"success": False}
+    assert client.get_order(order_id)["state"] == "COMPLETE"
+    assert Decimal(balances(client)["ZAR"]["reserved"]) == 0
+
+
+def test_fill(exchange, client) -> None:
+    """Tests that filling a limit order moves the balances"""
+    order_id = client.post_limit_order("XBTZAR", "ASK", "1", "200000")["order_id"]
+    exchange.fill(order_id, "0.25")
+    order = exchange.fill(order_id)
+
+    assert order["state"] == "COMPLETE"
+    assert Decimal(balances(client)["XBT"]["balance"]) == 9
+    assert Decimal(balances(client)["ZAR"]["balance"]) == 1200000
+
+
+def test_insufficient_balance(client) -> None:
+    """Tests that orders larger than the available balance are rejected"""
+    with pytest.raises(requests.HTTPError) as e:
+        client.post_limit_order("XBTZAR", "ASK", "11", "100000")
+
+    assert e.value.response.status_code == 400
+    assert client.list_orders()["orders"] == []
+
+
+def test_authentication(exchange) -> None:
+    """Tests that private endpoints require the configured credentials"""
+    client = LunoSyncClient("key", "wrong", base_uri=exchange.uri)
+
+    with pytest.raises(requests.HTTPError) as e:
+        client.balance()
+
+    assert e.value.response.status_code == 401
+
+
+def test_errors_are_retried(exchange) -> None:
+    """Tests that injected server errors and throttling are retried by the client"""
+    exchange.faults = Faults(error_rate=0.3, throttle_rate=0.2, retry_after="0")
+    policy = RetryPolicy(attempts=10, jitter=lambda: 0.0)
+    client = LunoSyncClient(base_uri=exchange.uri, retry_policy=policy)
+
+    for _ in range(20):
+        assert client.ticker("XBTZAR")["pair"] == "XBTZAR"
+
+    injected = exchange.injected["error"] + exchange.injected["throttle"]
+    message = f"expected every injected fault to be retried, received {injected}"
+    assert policy.stats()["retries"] == injected > 0, message
+
+
+def test_dropped_connections(exchange) -> None:
+    """Tests that dropped connections surface as connection errors"""
+    exchange.faults = Faults(drop_rate=1.0)
+    client = LunoSyncClient(base_uri=exchange.uri)
+
+    with pytest.raises(requests.ConnectionError):
+        client.ticker("XBTZAR")
+
+
+def test_rate_limits(clock) -> None:
+    """Tests that requests above the per second limit of a group are throttled"""
+    with FakeExchange(faults=Faults(rate_limits={PUBLIC: 3}), clock=clock) as exchange:
+        client = LunoSyncClient(base_uri=exchange.uri)
+
+        def status() -> int:
+            try:
+                client.ticker("XBTZAR")
+            except requests.HTTPError as e:
+                return e.response.status_code
+
+            return 200
+
+        statuses = [status() for _ in range(5)]
+        clock.now = 1.0
+        statuses.append(status())
+
+    message = f"expected the 4th and 5th requests to be throttled, received {statuses}"
+    assert statuses == [200, 200, 200, 429, 429, 200], message
+
+
+def test_latency_and_slow_bodies(exchange) -> None:
+    """Tests that latency is added to and bodies are trickled out of matching endpoints"""
+    exchange.faults = Faults(latency=0.05, slow_body=0.05, endpoints=["orderbook"])
+    client = LunoSyncClient(base_uri=exchange.uri)
+
+    started = time.perf_counter()
+    assert len(client.order_book("XBTZAR")["bids"]) == 1000
+    elapsed = time.perf_counter() - started
+
+    assert elapsed >= 0.1
+    assert exchange.injected == {"slow": 1}
+    client.ticker("XBTZAR")
+    assert exchange.injected == {"slow": 1}
+
+
+def test_aio_client(exchange) -> None:
+    """Tests that the asyncio client may place orders on the fake exchange"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def main():
+        async with LunoAsyncioClient("key", "secret", base_uri=exchange.uri) as client:
+            placed = await client.post_market_order(
+                "XBTZAR", "BUY", counter_volume="1000"
+            )
+            return await client.get_order(placed["order_id"])
+
+    order = asyncio.run(main())
+    assert order["state"] == "COMPLETE"
+    assert order["base"] == "0.010000"
+
+
+def test_aio_truncated_bodies_are_retried(exchange) -> None:
+    """Tests that the asyncio client retries responses cut off part way through the body"""
+    aiohttp = pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def main(policy):
+        async with LunoAsyncioClient(
+            base_uri=exchange.uri, retry_policy=policy
+        ) as client:
+            return [(await client.ticker("XBTZAR"))["pair"] for _ in range(10)]
+
+    exchange.faults = Faults(truncate_rate=1.0)
+    with pytest.raises(aiohttp.ClientPayloadError):
+        asyncio.run(main(None))
+
+    exchange.faults = Faults(truncate_rate=0.5)
+    exchange.injected.clear()
+    policy = RetryPolicy(attempts=20, jitter=lambda: 0.0)
+
+    assert asyncio.run(main(policy)) == ["XBTZAR"] * 10
+    assert policy.stats()["retries"] == exchange.injected["truncate"] > 0
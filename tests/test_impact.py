@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from decimal import Decimal
+from luno import impact
+from luno import orderbook
+from luno.impact import MarketImpact
+from luno.testing import payloads
+
+SNAPSHOT = {
+    "timestamp": 1366305398592,
+    "bids": [
+        {"volume": "0.10", "price": "1100.00"},
+        {"volume": "0.20", "price": "1000.00"},
+        {"volume": "0.30", "price": "900.00"},
+    ],
+    "asks": [
+        {"volume": "0.30", "price": "1180.00"},
+        {"volume": "0.40", "price": "1200.00"},
+    ],
+}
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    """Runs a test with NumPy and with the array module"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(orderbook, "np", None)
+        monkeypatch.setattr(impact, "np", None)
+
+    return request.param
+
+
+def walk(levels, kind, volume) -> tuple:
+    """Fills an order by walking the levels, returns (base, counter, levels)"""
+    base = counter = 0.0
+    remaining = volume
+    for count, level in enumerate(levels, 1):
+        price, available = float(level["price"]), float(level["volume"])
+        if kind == "BUY":
+            take = min(available, remaining / price)
+            remaining -= take * price
+        else:
+            take = min(available, remaining)
+            remaining -= take
+
+        base += take
+        counter += take * price
+        if remaining <= 1e-9:
+            return base, counter, count
+
+    return base, counter, len(levels)
+
+
+def test_buy_spends_counter_volume(backend) -> None:
+    """Tests the fills of buying with counter volume against the asks"""
+    estimate = MarketImpact.from_snapshot(SNAPSHOT).buy([118, 354, 834, 1000])
+
+    assert list(estimate.levels) == [1, 1, 2, 2]
+    assert list(estimate.base) == pytest.approx([0.1, 0.3, 0.7, 0.7])
+    assert list(estimate.counter) == pytest.approx([118, 354, 834, 834])
+    assert list(estimate.price) == pytest.approx([1180, 1180, 834 / 0.7, 834 / 0.7])
+    assert list(estimate.worst_price) == [1180, 1180, 1200, 1200]
+    assert list(estimate.complete) == [True, True, True, False]
+    assert estimate[2]["slippage"] == pytest.approx(834 / 0.7 / 1180 - 1)
+
+
+def test_sell_base_volume(backend) -> None:
+    """Tests the fills of selling base volume against the bids"""
+    estimate = MarketImpact.from_snapshot(SNAPSHOT).sell([0, 0.05, 0.25])
+
+    assert list(estimate.levels) == [0, 1, 2]
+    assert list(estimate.price) == pytest.approx([1100, 1100, 1040])
+    assert list(estimate.slippage) == pytest.approx([0, 0, 60 / 1100])
+    assert estimate.rows()[2]["counter"] == pytest.approx(260)
+
+
+def test_empty_side(backend) -> None:
+    """Tests that orders against an empty side are incomplete"""
+    estimate = MarketImpact.from_snapshot({"bids": [], "asks": []}).estimate("SELL", 1)
+
+    assert len(estimate) == 1
+    assert not estimate.complete[0]
+    assert estimate.base[0] == 0
+
+
+def test_matches_walking_the_book(backend) -> None:
+    """Tests that the estimates of many sizes match walking a deep book"""
+    snapshot = payloads.order_book(levels=1000)
+    estimator = MarketImpact.from_snapshot(snapshot)
+    rng = random.Random(7)
+
+    for kind, levels in (("BUY", "asks"), ("SELL", "bids")):
+        # up to a fifth more than the side holds so some orders are incomplete
+        depth = walk(snapshot[levels], kind, float("inf"))[1 if kind == "BUY" else 0]
+        volumes = [rng.uniform(0, depth * 1.2) for _ in range(200)]
+        estimate = estimator.estimate(kind, volumes)
+        assert 0 < sum(estimate.complete) < len(volumes)
+
+        for row, volume in zip(estimate.rows(), volumes):
+            base, counter, count = walk(snapshot[levels], kind, volume)
+
+            message = f"expected {kind} {volume} to reach {count} levels"
+            assert row["levels"] == count, message
+            assert row["base"] == pytest.approx(base)
+            assert row["counter"] == pytest.approx(counter)
+
+
+def test_scalar_volume(backend) -> None:
+    """Tests that a single volume may be given as any number"""
+    estimator = MarketImpact.from_snapshot(SNAPSHOT)
+
+    for volume in (118, 118.0, Decimal("118"), "118"):
+        estimate = estimator.buy(volume)
+        assert list(estimate.base) == pytest.approx([0.1])
+
+
+@pytest.mark.parametrize("volumes", [-1, [100, -0.5], [float("nan")]])
+def test_invalid_volumes(backend, volumes) -> None:
+    """Tests that negative and missing volumes raise a ValueError"""
+    with pytest.raises(ValueError, match="must not be negative"):
+        MarketImpact.from_snapshot(SNAPSHOT).buy(volumes)
+
+
+def test_unknown_kind() -> None:
+    """Tests that an unknown order kind raises a ValueError"""
+    with pytest.raises(ValueError):
+        MarketImpact.from_snapshot(SNAPSHOT).estimate("BID", 1)
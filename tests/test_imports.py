@@ -0,0 +1,109 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ("twisted", "treq", "aiohttp", "autobahn", "numpy")
+
+
+def run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    """Runs python code in a fresh interpreter"""
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_clients_package_is_lazy() -> None:
+    """Tests that importing the clients package does not import any client"""
+    code = (
+        "import sys, luno.clients; "
+        "print([m for m in sys.modules if m.startswith(('luno.clients.', 'requests'))])"
+    )
+    assert run(code).stdout.strip() == "[]"
+
+
+def test_sync_client_does_not_import_heavy_dependencies() -> None:
+    """Tests that the sync client does not import the async dependencies"""
+    code = (
+        "import sys; from luno.clients import LunoSyncClient; "
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    assert run(code).stdout.strip() == "[]"
+
+
+def test_lazy_modules_leave_find_spec_working() -> None:
+    """Tests that lazily imported modules can still be probed by other libraries"""
+    code = (
+        "import importlib.util, luno.clients.sync, luno.orderbook, luno.decoders; "
+        "[importlib.util.find_spec(m) for m in ('numpy', 'orjson', 'ujson')]; "
+        "print(importlib.util.find_spec('concurrent.futures') is not None)"
+    )
+    assert run(code).stdout.strip() == "True"
+
+
+def test_async_client_is_loaded_on_access() -> None:
+    """Tests that the async client is imported when it is accessed"""
+    pytest.importorskip("treq")
+    code = (
+        "import sys, luno.clients; luno.clients.LunoAsyncClient; "
+        "print('twisted' in sys.modules)"
+    )
+    assert run(code).stdout.strip() == "True"
+
+
+def test_lazy_modules_do_not_shadow_imports() -> None:
+    """Tests that modules imported after the clients are the real modules, not lazy proxies"""
+    code = (
+        "import luno.clients.sync, asyncio; "
+        "print(type(asyncio).__name__, asyncio.FIRST_COMPLETED)"
+    )
+    assert run(code).stdout.strip() == "module FIRST_COMPLETED"
+
+
+def test_lazy_import_is_thread_safe() -> None:
+    """Tests that threads racing on the first use of a lazy module see it executed"""
+    code = (
+        "import threading; from luno.lazy import lazy_import; "
+        "json = lazy_import('json'); errors = []\n"
+        "def use():\n"
+        "    try: json.loads('1')\n"
+        "    except Exception as e: errors.append(e)\n"
+        "threads = [threading.Thread(target=use) for _ in range(16)]\n"
+        "[t.start() for t in threads]; [t.join() for t in threads]; print(errors)"
+    )
+    assert run(code).stdout.strip() == "[]"
+
+
+def test_unknown_attribute_raises() -> None:
+    """Tests that an unknown attribute of the clients package raises AttributeError"""
+    import luno.clients
+
+    with pytest.raises(AttributeError):
+        luno.clients.LunoClient
+
+
+def test_import_time() -> None:
+    """Benchmarks the time spent importing the luno modules used by the sync client"""
+    stderr = run("import luno.clients.sync", "-X", "importtime").stderr
+
+    luno_us = requests_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        name = name.strip()
+
+        if name == "luno" or name.startswith("luno."):
+            luno_us += int(self_us)
+
+        if name == "requests":
+            requests_us = int(cumulative_us)
+
+    print(f"luno modules: {luno_us / 1000:.1f}ms, requests: {requests_us / 1000:.1f}ms")
+
+    message = f"expected the luno modules to import in under 50ms, took {luno_us}us"
+    assert luno_us < 50000, message
@@ -0,0 +1,228 @@
+import asyncio
+import random
+import threading
+
+import pytest
+import pytest_twisted
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from helpers import TwistedResponse
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from luno.instrumentation import Histogram
+from luno.instrumentation import Instrumentation
+from luno.instrumentation import RequestTiming
+
+
+@pytest.fixture
+def server():
+    """Provides a local keep-alive http server which responds with a ticker"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = b'{"pair": "XBTZAR"}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/api/1/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_histogram_percentiles() -> None:
+    """Tests that percentiles are reported within the configured precision"""
+    rng = random.Random(0)
+    values = sorted(rng.expovariate(100) for _ in range(10000))
+
+    histogram = Histogram(significant_figures=2)
+    for value in values:
+        histogram.record(value)
+
+    for quantile in (0.5, 0.9, 0.99):
+        expected = values[int(quantile * len(values)) - 1]
+        received = histogram.percentile(quantile)
+
+        message = f"expected p{quantile} close to {expected}, received {received}"
+        assert received == pytest.approx(expected, rel=0.01, abs=2e-6), message
+
+    assert histogram.count == 10000
+    assert histogram.max == values[-1]
+
+
+def test_histogram_merge() -> None:
+    """Tests that merging histograms combines their values"""
+    first, second = Histogram(), Histogram()
+    first.record(0.001)
+    second.record(0.1)
+    first.merge(second)
+
+    snapshot = first.snapshot()
+    assert snapshot["count"] == 2
+    assert snapshot["min"] == 0.001
+    assert snapshot["max"] == 0.1
+
+    with pytest.raises(ValueError):
+        first.merge(Histogram(significant_figures=3))
+
+
+def test_histogram_clamps_large_values() -> None:
+    """Tests that values above the highest trackable value are clamped"""
+    histogram = Histogram(highest=1.0)
+    histogram.record(5.0)
+
+    assert histogram.percentile(0.5) == pytest.approx(1.0, rel=0.01)
+
+
+def test_instrumentation_stats() -> None:
+    """Tests that finished requests are recorded per endpoint and passed to observers"""
+    timings = []
+    instrumentation = Instrumentation(observers=[timings.append])
+
+    timing = instrumentation.begin("get", "orders/BXMC2CJ7HNB88U4")
+    timing.add("server", 0.02)
+    timing.status = 200
+    timing.bytes = 100
+    instrumentation.finish(timing)
+
+    failed = instrumentation.begin("get", "orders/1")
+    instrumentation.finish(failed, error=ConnectionResetError())
+
+    stats = instrumentation.stats()["orders/{order_id}"]
+    assert stats["requests"] == 2
+    assert stats["errors"] == 1
+    assert stats["bytes"] == 100
+    assert stats["statuses"] == {200: 1, "ConnectionResetError": 1}
+    assert stats["phases"] == {"server": 0.02}
+    assert timings == [timing, failed]
+
+
+@pytest.mark.parametrize(
+    "suffix,endpoint",
+    [
+        ("accounts/1224/transactions", "accounts/{account_id}/transactions"),
+        ("accounts", "accounts"),
+        ("orders/BXMC2CJ7HNB88U4", "orders/{order_id}"),
+        ("withdrawals/1212", "withdrawals/{withdrawal_id}"),
+        ("quotes/1324", "quotes/{quote_id}"),
+        ("listorders", "listorders"),
+        ("ticker", "ticker"),
+    ],
+)
+def test_request_timing_endpoint(suffix, endpoint) -> None:
+    """Tests that timings are named by the path template of their endpoint"""
+    assert RequestTiming("get", suffix).endpoint == endpoint
+
+
+def test_prometheus() -> None:
+    """Tests the Prometheus text exposition of the collected metrics"""
+    instrumentation = Instrumentation()
+    timing = instrumentation.begin("post", "postorder")
+    timing.add("server", 0.05)
+    timing.status = 200
+    instrumentation.finish(timing)
+
+    text = instrumentation.prometheus()
+
+    assert 'luno_requests_total{endpoint="postorder",status="200"} 1' in text
+    assert 'luno_request_duration_seconds_count{endpoint="postorder"} 1' in text
+    assert "# TYPE luno_request_duration_seconds summary" in text
+
+
+def test_sync_client_phases(server) -> None:
+    """Tests that the sync client reports the phases of each request"""
+    instrumentation = Instrumentation()
+    client = LunoSyncClient(instrumentation=instrumentation)
+    client.BASE_URI = server
+
+    timings = []
+    instrumentation.subscribe(timings.append)
+    client.ticker("XBTZAR")
+    client.ticker("XBTZAR")
+
+    first, second = timings
+    message = f"expected a connect phase on the first request, received {first}"
+    assert first.phases["connect"] > 0, message
+    assert second.phases["connect"] == 0
+    assert set(first.phases) == {"wait", "connect", "server", "read", "decode"}
+    assert first.status == 200
+    assert first.bytes == 18
+    assert instrumentation.stats()["ticker"]["latency"]["count"] == 2
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_client_phases(mocker) -> None:
+    """Tests that the twisted client reports the phases of each request"""
+    timings = []
+    client = LunoAsyncClient(instrumentation=Instrumentation([timings.append]))
+    mocker.patch("treq.request", return_value=TwistedResponse())
+
+    yield client.ticker("XBTZAR")
+
+    message = f"expected a single timing, received {timings}"
+    assert len(timings) == 1, message
+    assert set(timings[0].phases) == {"wait", "server", "read", "decode"}
+    assert timings[0].endpoint == "ticker"
+
+
+def test_aio_client_phases(server) -> None:
+    """Tests that the asyncio client reports the phases of each request"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    timings = []
+
+    async def main():
+        instrumentation = Instrumentation([timings.append])
+        async with LunoAsyncioClient(instrumentation=instrumentation) as client:
+            client.BASE_URI = server
+            await client.ticker("XBTZAR")
+            await client.ticker("XBTZAR")
+
+    asyncio.run(main())
+
+    first, second = timings
+    assert first.phases["connect"] > 0
+    assert "connect" not in second.phases
+    assert {"wait", "queue", "server", "read", "decode"} <= set(second.phases)
+    assert first.bytes == 18
+    assert isinstance(first, RequestTiming)
+
+
+def test_aio_client_phase_order(server) -> None:
+    """Tests that the asyncio client marks each phase once and in order"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    marks = []
+
+    class Timing(RequestTiming):
+        def mark(self, phase: str) -> None:
+            marks.append(phase)
+            super().mark(phase)
+
+    class Recording(Instrumentation):
+        def begin(self, method: str, suffix: str) -> RequestTiming:
+            return Timing(method, suffix)
+
+    async def main():
+        async with LunoAsyncioClient(instrumentation=Recording()) as client:
+            client.BASE_URI = server
+            await client.ticker("XBTZAR")
+            marks.clear()
+            await client.ticker("XBTZAR")
+
+    asyncio.run(main())
+
+    assert marks == ["wait", "queue", "server", "read", "decode"]
@@ -0,0 +1,83 @@
+import pytest
+
+from decimal import Decimal
+from luno.models import Balance
+from luno.models import Order
+from luno.models import Ticker
+from luno.models import Trade
+from luno.models import Transaction
+from luno.models import parse_response
+from luno.testing import payloads
+
+
+def test_ticker_fields() -> None:
+    """Tests that plain fields are kept as returned and amounts are parsed to Decimal"""
+    ticker = Ticker(
+        {"pair": "XBTZAR", "timestamp": 1, "bid": "1000.00", "ask": "1010.00"}
+    )
+
+    assert ticker.pair == "XBTZAR"
+    assert ticker.timestamp == 1
+    assert ticker.bid == Decimal("1000.00")
+    assert ticker.last_trade is None
+
+
+def test_amounts_are_parsed_once() -> None:
+    """Tests that an amount is parsed on first access and the parsed value is cached"""
+    trade = Trade({"timestamp": 1, "price": "100.50", "volume": "0.1", "is_buy": True})
+
+    message = f"expected the raw amount before access, received {trade._price!r}"
+    assert trade._price == "100.50", message
+
+    price = trade.price
+    assert price == Decimal("100.50")
+    assert trade._price is price
+    assert trade.price is price
+
+
+def test_numeric_amounts() -> None:
+    """Tests that amounts returned as json numbers are parsed without float noise"""
+    transaction = Transaction({"row_index": 1, "balance": 0.1, "balance_delta": -0.1})
+
+    assert transaction.balance == Decimal("0.1")
+    assert transaction.balance_delta == Decimal("-0.1")
+
+
+def test_models_are_slotted() -> None:
+    """Tests that models do not carry an instance dict"""
+    for model in (Ticker, Trade, Order, Transaction, Balance):
+        instance = model({})
+
+        message = f"expected {model.__name__} to be slotted"
+        assert not hasattr(instance, "__dict__"), message
+
+        with pytest.raises(AttributeError):
+            instance.unknown = 1
+
+
+def test_parse_response() -> None:
+    """Tests that the rows of a response are converted into models"""
+    orders = parse_response(payloads.orders(count=3), Order, "orders")
+
+    assert [order.order_id for order in orders] == [
+        "BXMC2CJ7HNB88U0000",
+        "BXMC2CJ7HNB88U0001",
+        "BXMC2CJ7HNB88U0002",
+    ]
+    assert isinstance(orders[0].limit_price, Decimal)
+    assert parse_response({"orders": None}, Order, "orders") == []
+
+
+def test_to_dict_and_equality() -> None:
+    """Tests that models compare equal by their fields"""
+    data = {"account_id": "1", "asset": "XBT", "balance": "1.5", "reserved": "0.5"}
+    balance = Balance(data)
+
+    assert balance == Balance(data)
+    assert balance.to_dict() == {
+        "account_id": "1",
+        "asset": "XBT",
+        "balance": Decimal("1.5"),
+        "reserved": Decimal("0.5"),
+        "unconfirmed": None,
+    }
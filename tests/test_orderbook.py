@@ -0,0 +1,181 @@
+import pytest
+
+from decimal import Decimal
+from luno import orderbook
+from luno.orderbook import ColumnarOrderBook
+from luno.orderbook import LocalOrderBook
+
+
+@pytest.fixture
+def snapshot():
+    """Provides an order_book() response as a fixture"""
+    return {
+        "timestamp": 1366305398592,
+        "bids": [
+            {"volume": "0.10", "price": "1100.00"},
+            {"volume": "0.20", "price": "1000.00"},
+            {"volume": "0.05", "price": "1100.00"},
+        ],
+        "asks": [
+            {"volume": "0.30", "price": "1180.00"},
+            {"volume": "0.40", "price": "1200.00"},
+        ],
+    }
+
+
+@pytest.fixture
+def book(snapshot):
+    """Provides a local order book seeded from a snapshot as a fixture"""
+    return LocalOrderBook.from_snapshot(snapshot, pair="XBTZAR")
+
+
+def test_from_snapshot(book) -> None:
+    """Tests that levels at the same price are conflated when loading a snapshot"""
+    expected = [
+        (Decimal("1100.00"), Decimal("0.15")),
+        (Decimal("1000.00"), Decimal("0.20")),
+    ]
+
+    message = f"expected bids {expected}, received {book.bids()}"
+    assert book.bids() == expected, message
+    assert book.timestamp == 1366305398592
+    assert len(book) == 4
+
+
+def test_best_bid_and_ask(book) -> None:
+    """Tests the top of book accessors"""
+    assert book.best_bid() == (Decimal("1100.00"), Decimal("0.15"))
+    assert book.best_ask() == (Decimal("1180.00"), Decimal("0.30"))
+    assert book.spread() == Decimal("80.00")
+    assert book.mid_price() == Decimal("1140.00")
+
+
+def test_set_level(book) -> None:
+    """Tests that setting a level inserts, updates and removes price levels"""
+    book.set_level("ASK", "1170", "1")
+    assert book.best_ask() == (Decimal("1170"), Decimal("1"))
+
+    book.set_level("ASK", "1170", "0")
+    assert book.best_ask() == (Decimal("1180.00"), Decimal("0.30"))
+
+    book.set_level("BID", "1050", "2")
+    expected = [Decimal("1100.00"), Decimal("1050"), Decimal("1000.00")]
+    assert [price for price, _ in book.bids()] == expected
+
+
+def test_add_and_remove(book) -> None:
+    """Tests that volume deltas are applied and empty levels are dropped"""
+    book.add("BID", "1100.00", "0.05")
+    assert book.volume_at("BID", "1100") == Decimal("0.20")
+
+    book.remove("BID", "1100.00", "0.20")
+    assert book.best_bid() == (Decimal("1000.00"), Decimal("0.20"))
+    assert book.volume_at("BID", "1100") == Decimal("0")
+
+
+def test_depth_limits_levels(book) -> None:
+    """Tests that depth returns the requested number of levels from the touch"""
+    asks = book.depth("ASK", levels=1)
+
+    message = f"expected a single level, received {asks}"
+    assert asks == [(Decimal("1180.00"), Decimal("0.30"))], message
+
+
+def test_empty_book() -> None:
+    """Tests the accessors on an empty book"""
+    book = LocalOrderBook()
+
+    assert book.best_bid() is None
+    assert book.best_ask() is None
+    assert book.spread() is None
+    assert book.bids() == []
+
+
+def test_invalid_side_raises(book) -> None:
+    """Tests that an unknown side raises a ValueError"""
+    with pytest.raises(ValueError):
+        book.add("BUY", "1", "1")
+
+
+@pytest.fixture(params=["numpy", "array"])
+def columnar(request, monkeypatch):
+    """Provides a columnar order book backed by NumPy and by the array module"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(orderbook, "np", None)
+
+    snapshot = {
+        "timestamp": 1366305398592,
+        "bids": [
+            {"volume": "0.10", "price": "1100.00"},
+            {"volume": "0.20", "price": "1000.00"},
+            {"volume": "0.30", "price": "900.00"},
+        ],
+        "asks": [
+            {"volume": "0.30", "price": "1180.00"},
+            {"volume": "0.40", "price": "1200.00"},
+        ],
+    }
+    return ColumnarOrderBook.from_snapshot(snapshot, pair="XBTZAR")
+
+
+def test_columnar_top_of_book(columnar) -> None:
+    """Tests the best prices, spread and mid price of a columnar book"""
+    assert columnar.best_bid() == (1100.0, 0.1)
+    assert columnar.best_ask() == (1180.0, 0.3)
+    assert columnar.spread() == 80.0
+    assert columnar.mid_price() == 1140.0
+    assert columnar.timestamp == 1366305398592
+
+
+def test_columnar_cumulative_volume(columnar) -> None:
+    """Tests the running volume totals of a columnar book"""
+    expected = [0.1, 0.3, 0.6]
+    received = [round(v, 10) for v in columnar.cumulative_volume("BID")]
+
+    message = f"expected cumulative volume {expected}, received {received}"
+    assert received == expected, message
+
+
+def test_columnar_depth(columnar) -> None:
+    """Tests the volume at prices as good as or better than a price"""
+    assert round(columnar.depth("BID", 1000), 10) == 0.3
+    assert round(columnar.depth("BID", 999), 10) == 0.3
+    assert round(columnar.depth("ASK", 1200), 10) == 0.7
+    assert columnar.depth("ASK", 1000) == 0
+
+
+def test_columnar_vwap(columnar) -> None:
+    """Tests the average price of filling a volume against each side"""
+    expected = (0.3 * 1180 + 0.2 * 1200) / 0.5
+
+    message = f"expected vwap {expected}, received {columnar.vwap('ASK', 0.5)}"
+    assert columnar.vwap("ASK", 0.5) == pytest.approx(expected), message
+    assert columnar.vwap("BID", 0.05) == pytest.approx(1100.0)
+    assert columnar.vwap("ASK", 1) is None
+
+
+def test_columnar_vwap_of_no_volume(columnar) -> None:
+    """Tests that filling no volume is priced at the best price and negative volumes are rejected"""
+    assert columnar.vwap("ASK", 0) == 1180.0
+    assert columnar.vwap("BID", 0) == 1100.0
+    assert (
+        ColumnarOrderBook.from_snapshot({"bids": [], "asks": []}).vwap("ASK", 0) is None
+    )
+
+    with pytest.raises(ValueError):
+        columnar.vwap("ASK", -1)
+
+
+def test_columnar_empty() -> None:
+    """Tests that an empty columnar book has no top of book"""
+    book = ColumnarOrderBook.from_snapshot({"bids": [], "asks": []})
+
+    assert book.best_bid() is None
+    assert book.spread() is None
+    assert book.vwap("ASK", 1) is None
+    assert book.nbytes == 0
+
+    with pytest.raises(ValueError):
+        book.depth("BUY", 1)
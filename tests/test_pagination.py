@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+import pytest_twisted
+
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from luno.pagination import TradePager
+from luno.pagination import row_windows
+from twisted.internet.defer import Deferred
+from twisted.internet.defer import succeed
+
+# three trades share every timestamp so page boundaries split equal timestamps
+HISTORY = [
+    {"timestamp": 1000 + i // 3, "price": str(100 + i), "volume": "1", "is_buy": True}
+    for i in range(250)
+]
+
+
+def fetch(method, suffix, params):
+    """Serves pages of the trade history including trades at the since timestamp"""
+    trades = [trade for trade in HISTORY if trade["timestamp"] >= params["since"]]
+    return {"trades": list(reversed(trades[:100]))}
+
+
+def test_pager_skips_boundary_duplicates() -> None:
+    """Tests that trades at the boundary timestamp are only returned once"""
+    pager = TradePager("XBTZAR", since=0)
+
+    first = pager.page(fetch("get", "trades", pager.params()))
+    assert len(first) == 100
+    assert pager.since == first[-1]["timestamp"]
+
+    second = pager.page(fetch("get", "trades", pager.params()))
+    assert second[0] == HISTORY[100]
+    assert not pager.done
+
+
+def test_pager_full_boundary_page() -> None:
+    """Tests that the pager moves past a full page of trades at the boundary timestamp"""
+    history = [
+        {"sequence": i, "timestamp": 1000 if i < 150 else 1001, "price": "1"}
+        for i in range(200)
+    ]
+
+    def page(since):
+        trades = [trade for trade in history if trade["timestamp"] >= since]
+        return {"trades": list(reversed(trades[:100]))}
+
+    pager = TradePager("XBTZAR", since=1000)
+    assert pager.page(page(pager.since)) == history[:100]
+    assert pager.page(page(pager.since)) == []
+
+    message = f"expected the pager to continue from 1001, since is {pager.since}"
+    assert not pager.done and pager.since == 1001, message
+    assert pager.page(page(pager.since)) == history[150:]
+    assert pager.done
+
+
+def test_pager_until() -> None:
+    """Tests that the pager stops after the until timestamp"""
+    pager = TradePager("XBTZAR", since=0, until=1009)
+    trades = pager.page(fetch("get", "trades", pager.params()))
+
+    assert trades == HISTORY[:30]
+    assert pager.done
+
+
+def test_pager_empty_page() -> None:
+    """Tests that an empty page completes the pager"""
+    pager = TradePager("XBTZAR", since=0)
+
+    assert pager.page({"trades": None}) == []
+    assert pager.done
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_sync_iter_trades(mocker, prefetch) -> None:
+    """Tests that the sync client walks the full trade history"""
+    client = LunoSyncClient()
+    mocker.patch.object(client, "_fetch_resource", side_effect=fetch)
+
+    trades = list(client.iter_trades("XBTZAR", since=0, prefetch=prefetch))
+
+    message = f"expected {len(HISTORY)} trades, received {len(trades)}"
+    assert trades == HISTORY, message
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_iter_trades(mocker) -> None:
+    """Tests that the twisted client walks the trade history with prefetching"""
+    client = LunoAsyncClient()
+    mocker.patch.object(
+        client, "_fetch_resource", side_effect=lambda *args: succeed(fetch(*args))
+    )
+
+    async def collect():
+        return [trade async for trade in client.iter_trades("XBTZAR", 0, prefetch=True)]
+
+    trades = yield Deferred.fromCoroutine(collect())
+    assert trades == HISTORY
+
+
+def test_aio_iter_trades(mocker) -> None:
+    """Tests that the asyncio client walks the trade history with prefetching"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def afetch(*args):
+        return fetch(*args)
+
+    async def collect():
+        client = LunoAsyncioClient()
+        mocker.patch.object(client, "_fetch_resource", side_effect=afetch)
+        return [trade async for trade in client.iter_trades("XBTZAR", 0, prefetch=True)]
+
+    assert asyncio.run(collect()) == HISTORY
+
+
+ROWS = [{"row_index": i, "balance": str(i)} for i in range(1, 2501)]
+
+
+def fetch_rows(method, suffix, params):
+    """Serves windows of transaction rows newest first"""
+    min_row, max_row = params["min_row"], params["max_row"]
+    if min_row < 0:
+        rows = ROWS[min_row:]
+    else:
+        rows = ROWS[min_row - 1 : max_row - 1]
+
+    return {"id": "1", "transactions": list(reversed(rows))}
+
+
+def test_row_windows() -> None:
+    """Tests that a row range is split into windows of at most 1000 rows"""
+    windows = list(row_windows(1, 2501))
+
+    assert windows == [(1, 1001), (1001, 2001), (2001, 2501)]
+    assert list(row_windows(5, 5)) == []
+
+
+def test_sync_iter_transactions(mocker) -> None:
+    """Tests that the sync client fetches every window and yields rows in order"""
+    client = LunoSyncClient("api_key", "secret")
+    fetch = mocker.patch.object(client, "_fetch_resource", side_effect=fetch_rows)
+
+    rows = list(client.iter_transactions(1, concurrency=2))
+
+    message = f"expected {len(ROWS)} rows in order"
+    assert rows == ROWS, message
+    assert fetch.call_count == 4
+
+
+def test_sync_iter_transactions_range(mocker) -> None:
+    """Tests that an explicit row range does not probe for the latest row"""
+    client = LunoSyncClient("api_key", "secret")
+    fetch = mocker.patch.object(client, "_fetch_resource", side_effect=fetch_rows)
+
+    rows = list(client.iter_transactions(1, min_row=500, max_row=1600))
+
+    assert rows == ROWS[499:1599]
+    assert fetch.call_count == 2
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_iter_transactions(mocker) -> None:
+    """Tests that the twisted client fetches every window and yields rows in order"""
+    client = LunoAsyncClient("api_key", "secret")
+    mocker.patch.object(
+        client,
+        "_fetch_resource",
+        side_effect=lambda *args: succeed(fetch_rows(*args)),
+    )
+
+    async def collect():
+        return [row async for row in client.iter_transactions(1, concurrency=2)]
+
+    rows = yield Deferred.fromCoroutine(collect())
+    assert rows == ROWS
+
+
+def test_aio_iter_transactions(mocker) -> None:
+    """Tests that the asyncio client fetches every window and yields rows in order"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def afetch(*args):
+        await asyncio.sleep(0)
+        return fetch_rows(*args)
+
+    async def collect():
+        client = LunoAsyncioClient("api_key", "secret")
+        mocker.patch.object(client, "_fetch_resource", side_effect=afetch)
+        return [row async for row in client.iter_transactions(1, concurrency=3)]
+
+    assert asyncio.run(collect()) == ROWS
@@ -0,0 +1,87 @@
+import pytest
+
+from helpers import Response
+from luno.clients.sync import LunoSyncClient
+from luno.ratelimit import PRIVATE
+from luno.ratelimit import PUBLIC
+from luno.ratelimit import RECEIVE_ADDRESS
+from luno.ratelimit import RateLimiter
+from luno.ratelimit import TokenBucket
+
+
+def test_bucket_allows_burst(clock) -> None:
+    """Tests that a full bucket serves a burst without waiting"""
+    bucket = TokenBucket(rate=1, burst=3, clock=clock)
+    waits = [bucket.reserve() for _ in range(3)]
+
+    message = f"expected no waits, received {waits}"
+    assert waits == [0.0, 0.0, 0.0], message
+
+
+def test_bucket_queues_callers(clock) -> None:
+    """Tests that callers beyond the burst are queued in order"""
+    bucket = TokenBucket(rate=2, burst=1, clock=clock)
+    waits = [bucket.reserve() for _ in range(3)]
+
+    message = f"expected increasing waits, received {waits}"
+    assert waits == [0.0, 0.5, 1.0], message
+
+
+def test_bucket_refills(clock) -> None:
+    """Tests that tokens are added back over time up to the burst size"""
+    bucket = TokenBucket(rate=1, burst=2, clock=clock)
+    bucket.reserve()
+    bucket.reserve()
+
+    clock.now = 10
+    assert bucket.reserve() == 0.0
+    assert bucket.tokens == 1
+
+
+def test_bucket_rejects_invalid_config() -> None:
+    """Tests that a bucket requires a positive rate and burst"""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, burst=1)
+
+
+def test_endpoint_groups() -> None:
+    """Tests the mapping of endpoints to groups"""
+    assert RateLimiter.groups("get", "orderbook") == (PUBLIC,)
+    assert RateLimiter.groups("get", "accounts/1/transactions") == (PRIVATE,)
+    assert RateLimiter.groups("get", "funding_address") == (PRIVATE,)
+    assert RateLimiter.groups("post", "funding_address") == (PRIVATE, RECEIVE_ADDRESS)
+
+
+def test_receive_address_budget(clock) -> None:
+    """Tests that create_receive_address allows a burst of 10 then 1 per hour"""
+    limiter = RateLimiter(budgets={PRIVATE: (100, 100)}, clock=clock)
+    waits = [limiter.reserve("post", "funding_address") for _ in range(11)]
+
+    assert waits[:10] == [0.0] * 10
+    assert waits[10] == pytest.approx(3600)
+
+
+def test_stats(clock) -> None:
+    """Tests the wait time metrics"""
+    limiter = RateLimiter(budgets={PUBLIC: (1, 1)}, clock=clock)
+    limiter.reserve("get", "ticker")
+    limiter.reserve("get", "ticker")
+    limiter.reserve("get", "tickers")
+
+    stats = limiter.stats()[PUBLIC]
+    expected = {"requests": 3, "delayed": 2, "wait_total": 3.0, "wait_max": 2.0}
+    message = f"expected stats {expected}, received {stats}"
+    assert stats == expected, message
+
+
+def test_sync_client_waits(mocker, clock) -> None:
+    """Tests that the sync client sleeps for the reserved wait time"""
+    limiter = RateLimiter(budgets={PUBLIC: (2, 1)}, clock=clock)
+    client = LunoSyncClient(rate_limiter=limiter)
+    mocker.patch("requests.Session.request", return_value=Response())
+    sleep = mocker.patch("luno.clients.sync.time.sleep")
+
+    client.ticker(pair="XBTZAR")
+    client.ticker(pair="XBTZAR")
+
+    sleep.assert_called_once_with(0.5)
@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+import pytest_twisted
+import requests
+
+from helpers import Response
+from helpers import TwistedResponse
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from luno.exceptions import HttpStatusException
+from luno.retry import RetryPolicy
+from luno.retry import parse_retry_after
+from unittest.mock import AsyncMock
+
+
+@pytest.fixture
+def policy(clock):
+    """Provides a retry policy without jitter as a fixture"""
+    return RetryPolicy(
+        attempts=4, backoff=1.0, max_backoff=3.0, clock=clock, jitter=lambda: 1.0
+    )
+
+
+def test_backoff(policy) -> None:
+    """Tests that the backoff doubles for every retry up to the maximum"""
+    retry = policy.begin("get", "ticker")
+    delays = [retry.next_delay(503) for _ in range(4)]
+
+    message = f"expected delays [1, 2, 3, None], received {delays}"
+    assert delays == [1.0, 2.0, 3.0, None], message
+    assert policy.stats() == {
+        "requests": 1,
+        "retries": 3,
+        "failures": 1,
+        "wait_total": 6.0,
+    }
+
+
+def test_jitter(clock) -> None:
+    """Tests that the backoff is scaled by the jitter"""
+    policy = RetryPolicy(backoff=1.0, clock=clock, jitter=lambda: 0.25)
+
+    assert policy.begin("get", "ticker").next_delay() == 0.25
+
+
+def test_only_retryable_statuses(policy) -> None:
+    """Tests that client errors are not retried"""
+    retry = policy.begin("get", "ticker")
+
+    assert retry.next_delay(404) is None
+    assert retry.next_delay(429) == 1.0
+    assert policy.stats()["failures"] == 0
+
+
+def test_unsafe_methods(clock) -> None:
+    """Tests that post requests are only retried for endpoints marked safe"""
+    policy = RetryPolicy(safe_endpoints=[("post", "stoporder")], clock=clock)
+
+    assert policy.begin("post", "postorder").next_delay(503) is None
+    assert policy.begin("post", "stoporder").next_delay(503) is not None
+    assert policy.begin("put", "quotes/1").next_delay() is None
+
+
+def test_safe_endpoints_by_method(clock) -> None:
+    """Tests that marking one verb of an endpoint safe does not retry the others"""
+    safe = [("delete", "quotes/{quote_id}")]
+    policy = RetryPolicy(safe_endpoints=safe, clock=clock)
+
+    assert policy.begin("delete", "quotes/1324").next_delay(503) is not None
+    assert policy.begin("put", "quotes/1324").next_delay(503) is None
+    assert policy.begin("post", "quotes").next_delay(503) is None
+
+
+def test_retry_after(policy) -> None:
+    """Tests that the Retry-After header takes precedence over the backoff"""
+    retry = policy.begin("get", "ticker")
+
+    assert retry.next_delay(429, "2.5") == 2.5
+    assert retry.next_delay(429, "60") is None
+
+
+def test_parse_retry_after() -> None:
+    """Tests that Retry-After is parsed in seconds and as an http date"""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+    date = "Wed, 21 Oct 2015 07:28:05 GMT"
+    assert parse_retry_after(date, now=lambda: 1445412480.0) == 5.0
+
+
+def test_deadline(policy, clock) -> None:
+    """Tests that no retry is made which would end after the deadline"""
+    policy.deadline = 2.5
+    retry = policy.begin("get", "ticker")
+
+    assert retry.next_delay(503) == 1.0
+    clock.now = 1.0
+    assert retry.next_delay(503) is None
+
+
+def test_attempt_timeout(policy, clock) -> None:
+    """Tests that each attempt times out at the deadline of the request"""
+    policy.deadline = 2.5
+    retry = policy.begin("get", "ticker")
+
+    assert retry.timeout() == 2.5
+    clock.now = 2.0
+    assert retry.timeout() == 0.5
+    clock.now = 3.0
+    assert retry.timeout() == 0.001
+
+    policy.deadline = None
+    assert retry.timeout() is None
+
+
+def test_sync_client_retries(mocker) -> None:
+    """Tests that the sync client retries a failed GET request"""
+    policy = RetryPolicy(jitter=lambda: 0.0)
+    client = LunoSyncClient(retry_policy=policy)
+    send = mocker.patch(
+        "requests.Session.request",
+        side_effect=[
+            requests.ConnectionError("reset"),
+            Response(status=503),
+            Response(),
+        ],
+    )
+
+    assert client.ticker("XBTZAR") == {"pair": "XBTZAR"}
+    assert send.call_count == 3
+    assert policy.stats()["retries"] == 2
+    assert 0 < send.call_args.kwargs["timeout"] <= policy.deadline
+
+
+def test_sync_client_does_not_retry_orders(mocker) -> None:
+    """Tests that the sync client does not retry a failed order placement"""
+    client = LunoSyncClient("api_key", "secret", retry_policy=RetryPolicy())
+    send = mocker.patch("requests.Session.request", return_value=Response(status=503))
+
+    with pytest.raises(requests.HTTPError):
+        client.post_market_order("XBTZAR", "BUY", counter_volume=10)
+
+    assert send.call_count == 1
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_client_retries(mocker) -> None:
+    """Tests that the twisted client retries a failed GET request"""
+    client = LunoAsyncClient(retry_policy=RetryPolicy(jitter=lambda: 0.0))
+    send = mocker.patch(
+        "treq.request",
+        side_effect=[TwistedResponse(status=429, retry_after="0"), TwistedResponse()],
+    )
+
+    response = yield client.ticker("XBTZAR")
+    assert response == {"pair": "XBTZAR"}
+    assert send.call_count == 2
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_client_checks_status(mocker) -> None:
+    """Tests that the twisted client raises on an error status"""
+    client = LunoAsyncClient()
+    mocker.patch("treq.request", return_value=TwistedResponse(status=500))
+
+    with pytest.raises(HttpStatusException) as e:
+        yield client.ticker("XBTZAR")
+
+    assert e.value.status == 500
+
+
+def test_aio_client_retries(mocker) -> None:
+    """Tests that the asyncio client retries a failed GET request"""
+    aiohttp = pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    send = mocker.patch(
+        "aiohttp.ClientSession.request",
+        new=AsyncMock(
+            side_effect=[
+                aiohttp.ClientConnectionError(),
+                Response(status=502),
+                Response(),
+            ]
+        ),
+    )
+
+    async def main():
+        policy = RetryPolicy(jitter=lambda: 0.0)
+        async with LunoAsyncioClient(retry_policy=policy) as client:
+            return await client.ticker("XBTZAR")
+
+    assert asyncio.run(main()) == {"pair": "XBTZAR"}
+    assert send.call_count == 3
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+import requests
+
+from luno.clients.sync import LunoSyncClient
+from luno.testing.server import PayloadServer
+from luno.testing.server import endpoint
+
+
+@pytest.fixture
+def server():
+    """Provides a running payload server as a fixture"""
+    with PayloadServer() as server:
+        yield server
+
+
+def test_endpoint() -> None:
+    """Tests that request paths are mapped to endpoint names"""
+    assert endpoint("/api/1/ticker?pair=XBTZAR") == "ticker"
+    assert endpoint("/api/1/orders/BXMC2CJ7HNB88U4") == "orders"
+    assert endpoint("/api/1/accounts/1000/transactions?min_row=1") == "transactions"
+
+
+def test_sync_client(server) -> None:
+    """Tests that the sync client is answered with the recorded payloads"""
+    client = LunoSyncClient("key", "secret")
+    client.BASE_URI = server.uri
+
+    assert client.ticker("XBTZAR")["pair"] == "XBTZAR"
+    assert len(client.order_book("XBTZAR")["bids"]) == 1000
+    assert client.get_order("BXMC2CJ7HNB88U4")["state"]
+    assert client.exercise_quote(1324)["id"] == "1324"
+
+    message = f"expected a request per endpoint, received {server.requests}"
+    assert server.requests == {
+        "ticker": 1,
+        "orderbook": 1,
+        "orders": 1,
+        "quotes": 1,
+    }, message
+
+
+def test_set_response(server) -> None:
+    """Tests that responses may be replaced and unknown endpoints are not found"""
+    client = LunoSyncClient()
+    client.BASE_URI = server.uri
+    server.set_response("get", "ticker", {"pair": "ETHXBT"})
+
+    assert client.ticker("ETHXBT") == {"pair": "ETHXBT"}
+
+    with pytest.raises(requests.HTTPError):
+        client._fetch_resource("get", "unknown", {})
+
+
+def test_aio_client(server) -> None:
+    """Tests that the asyncio client is answered with the recorded payloads"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def main():
+        async with LunoAsyncioClient() as client:
+            client.BASE_URI = server.uri
+            return await asyncio.gather(client.tickers(), client.trades("XBTZAR"))
+
+    tickers, trades = asyncio.run(main())
+    assert tickers["tickers"]
+    assert trades["trades"]
@@ -0,0 +1,220 @@
+import asyncio
+import os
+
+import pytest
+import pytest_twisted
+
+from luno import store as store_module
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from luno.store import RECORD
+from luno.store import TradeStore
+from luno.store import sync_trades
+from twisted.internet.defer import succeed
+
+# three trades share every timestamp so page boundaries split equal timestamps
+HISTORY = [
+    {
+        "sequence": i + 1,
+        "timestamp": 1000 + i // 3,
+        "price": str(100 + i),
+        "volume": "0.5",
+        "is_buy": i % 2 == 0,
+    }
+    for i in range(1000)
+]
+
+
+def fetch(method, suffix, params):
+    """Serves pages of the trade history including trades at the since timestamp"""
+    trades = [trade for trade in HISTORY if trade["timestamp"] >= params["since"]]
+    return {"trades": list(reversed(trades[:100]))}
+
+
+@pytest.fixture(params=["numpy", "array"])
+def store(request, tmp_path, monkeypatch):
+    """Provides a store with small segments with and without NumPy"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(store_module, "np", None)
+
+    with TradeStore(str(tmp_path), segment_records=300) as store:
+        yield store
+
+
+def timestamps(records) -> list:
+    return [int(record[0]) for record in records]
+
+
+def test_append_skips_stored_trades(store) -> None:
+    """Tests that trades repeated at the tail or older than it are not appended"""
+    assert store.append("XBTZAR", HISTORY[:10]) == 10
+    assert store.append("XBTZAR", HISTORY[8:20]) == 10
+    assert store.append("XBTZAR", HISTORY[:5]) == 0
+
+    assert store.count("XBTZAR") == 20
+    assert store.last_timestamp("XBTZAR") == HISTORY[19]["timestamp"]
+    assert [trade["sequence"] for trade in store.iter_trades("XBTZAR")] == list(
+        range(1, 21)
+    )
+
+
+def test_segments_and_range_queries(store) -> None:
+    """Tests that ranges spanning segment boundaries return exactly the trades in range"""
+    store.append("XBTZAR", HISTORY)
+    assert len(store.segments("XBTZAR")) == 4
+
+    for since, until in [(None, None), (1000, 1000), (1099, 1201), (1300, 2000)]:
+        expected = [
+            trade["timestamp"]
+            for trade in HISTORY
+            if (since is None or trade["timestamp"] >= since)
+            and (until is None or trade["timestamp"] <= until)
+        ]
+        records = store.read("XBTZAR", since, until)
+
+        message = f"expected {len(expected)} trades between {since} and {until}"
+        assert timestamps(records) == expected, message
+
+    assert len(store.read("XBTZAR", 5000)) == 0
+    assert len(store.read("ETHZAR")) == 0
+
+
+def test_read_record_fields(store) -> None:
+    """Tests that records hold the trade fields"""
+    store.append("XBTZAR", HISTORY[:2])
+    trades = list(store.iter_trades("XBTZAR"))
+
+    assert trades[1] == {
+        "timestamp": 1000,
+        "sequence": 2,
+        "price": 101.0,
+        "volume": 0.5,
+        "is_buy": False,
+    }
+
+
+def test_numpy_read_is_a_view(tmp_path) -> None:
+    """Tests that a range within a segment is read without copying the records"""
+    np = pytest.importorskip("numpy")
+    with TradeStore(str(tmp_path)) as store:
+        store.append("XBTZAR", HISTORY)
+        records = store.read("XBTZAR", 1100, 1200)
+
+    assert not records.flags.owndata
+    assert records.dtype.itemsize == RECORD.size
+    assert float(records["volume"].sum()) == pytest.approx(0.5 * len(records))
+    assert np.all(np.diff(records["timestamp"]) >= 0)
+
+
+def test_reopen(tmp_path) -> None:
+    """Tests that a reopened store rebuilds its index and drops a torn record"""
+    with TradeStore(str(tmp_path), segment_records=300) as store:
+        store.append("XBTZAR", HISTORY[:700])
+        path = store.segments("XBTZAR")[-1].path
+
+    with open(path, "ab") as f:
+        f.write(RECORD.pack(9999, 0, 1.0, 1.0, True)[:10])
+
+    with TradeStore(str(tmp_path), segment_records=300) as reopened:
+        assert reopened.pairs() == ["XBTZAR"]
+        assert reopened.count("XBTZAR") == 700
+        assert os.path.getsize(path) == 100 * RECORD.size
+        assert reopened.append("XBTZAR", HISTORY[690:710]) == 10
+        assert timestamps(reopened.read("XBTZAR", 1230)) == [
+            trade["timestamp"] for trade in HISTORY[690:710]
+        ]
+
+
+def test_close(tmp_path) -> None:
+    """Tests that closing unmaps the segments and the store may be used again"""
+    store = TradeStore(str(tmp_path))
+    store.append("XBTZAR", HISTORY[:10])
+    records = store.read("XBTZAR")
+    segment = store.segments("XBTZAR")[0]
+
+    store.close()
+    assert timestamps(records) == [trade["timestamp"] for trade in HISTORY[:10]]
+
+    del records
+    segment.close()
+    assert segment.maps == []
+    assert store.append("XBTZAR", HISTORY[:20]) == 10
+    assert store.count("XBTZAR") == 20
+    store.close()
+
+
+def test_identical_fills_without_sequence(store) -> None:
+    """Tests that list_trades() fills alike in every field are kept but not repeated"""
+    fill = {"timestamp": 1000, "price": "100", "base": "0.5", "type": "BID"}
+    other = dict(fill, price="101")
+
+    assert store.append("XBTZAR", [fill, fill, other]) == 3
+    assert store.append("XBTZAR", [fill, fill, other]) == 0
+    assert store.append("XBTZAR", [fill, fill, fill, other]) == 1
+    assert store.count("XBTZAR") == 4
+
+
+def test_pager_resumes_from_tail(tmp_path) -> None:
+    """Tests that the pager starts at the newest stored trade"""
+    with TradeStore(str(tmp_path)) as store:
+        with pytest.raises(ValueError):
+            store.pager("XBTZAR")
+
+        params = store.pager("XBTZAR", since=0).params()
+        assert params == {"pair": "XBTZAR", "since": 0}
+        store.append("XBTZAR", HISTORY[:50])
+        since = store.pager("XBTZAR", since=0).params()["since"]
+        assert since == HISTORY[49]["timestamp"]
+
+
+def test_sync_trades(mocker, tmp_path) -> None:
+    """Tests that sync_trades with the sync client only fetches the missing tail of the history"""
+    client = LunoSyncClient()
+    request = mocker.patch.object(client, "_fetch_resource", side_effect=fetch)
+
+    with TradeStore(str(tmp_path)) as store:
+        assert sync_trades(client, store, "XBTZAR", since=0, until=1199) == 600
+        assert sync_trades(client, store, "XBTZAR") == 400
+        request.reset_mock()
+
+        assert sync_trades(client, store, "XBTZAR") == 0
+
+        message = "expected a single request once the store is up to date"
+        assert request.call_count == 1, message
+        sequences = [trade["sequence"] for trade in store.iter_trades("XBTZAR")]
+        assert sequences == list(range(1, 1001))
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_sync_trades(mocker, tmp_path) -> None:
+    """Tests that the twisted client appends the trade history to a store"""
+    client = LunoAsyncClient()
+    mocker.patch.object(
+        client, "_fetch_resource", side_effect=lambda *args: succeed(fetch(*args))
+    )
+
+    with TradeStore(str(tmp_path)) as store:
+        added = yield sync_trades(client, store, "XBTZAR", since=0)
+
+        assert added == len(HISTORY)
+        assert store.count("XBTZAR") == len(HISTORY)
+
+
+def test_aio_sync_trades(mocker, tmp_path) -> None:
+    """Tests that the asyncio client appends the trade history to a store"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def afetch(*args):
+        return fetch(*args)
+
+    async def main(store):
+        client = LunoAsyncioClient()
+        mocker.patch.object(client, "_fetch_resource", side_effect=afetch)
+        return await sync_trades(client, store, "XBTZAR", since=0)
+
+    with TradeStore(str(tmp_path)) as store:
+        assert asyncio.run(main(store)) == len(HISTORY)
+        assert store.count("XBTZAR") == len(HISTORY)
@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import pytest
+import pytest_twisted
+
+from decimal import Decimal
+from luno.exceptions import SequenceGapException
+from luno.streams.base import LunoStreamBase
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("autobahn")
+
+from luno.streams.aio import LunoAsyncioStreamClient
+from luno.streams.asynchronous import LunoAsyncStreamClient
+from luno.testing.stream import FakeStreamServer
+from twisted.internet import reactor
+from twisted.internet.defer import inlineCallbacks
+from twisted.internet.task import deferLater
+
+
+@pytest.fixture
+def snapshot():
+    """Provides an initial stream message as a fixture"""
+    return {
+        "sequence": "10",
+        "bids": [
+            {"id": "B1", "price": "1000", "volume": "1"},
+            {"id": "B2", "price": "1000", "volume": "2"},
+        ],
+        "asks": [{"id": "A1", "price": "1100", "volume": "0.5"}],
+        "status": "ACTIVE",
+        "timestamp": 1,
+    }
+
+
+@pytest.fixture
+def stream(snapshot):
+    """Provides a stream which has applied the snapshot as a fixture"""
+    stream = LunoStreamBase("XBTZAR")
+    stream.handle_message(snapshot)
+    return stream
+
+
+@pytest.fixture
+def server():
+    """Provides a running fake stream server as a fixture"""
+    server = FakeStreamServer()
+    server.set_orders("XBTZAR", bids=[("1000", "1")], asks=[("1100", "2")])
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_snapshot_is_applied(stream) -> None:
+    """Tests that the initial message seeds the order book"""
+    message = f"expected best bid of 3 at 1000, received {stream.book.best_bid()}"
+    assert stream.book.best_bid() == (Decimal("1000"), Decimal("3")), message
+    assert stream.sequence == 10
+
+
+def test_updates_are_applied(stream) -> None:
+    """Tests create, trade and delete updates"""
+    trades = []
+    stream.on_trade = trades.append
+
+    create = {"order_id": "A2", "type": "ASK", "price": "1050", "volume": "1"}
+    stream.handle_message({"sequence": "11", "create_update": create})
+    assert stream.book.best_ask() == (Decimal("1050"), Decimal("1"))
+
+    trade = {"base": "0.5", "counter": "500", "maker_order_id": "B1"}
+    stream.handle_message({"sequence": "12", "trade_updates": [trade]})
+    assert stream.book.best_bid() == (Decimal("1000"), Decimal("2.5"))
+    assert trades == [trade]
+
+    stream.handle_message({"sequence": "13", "delete_update": {"order_id": "B2"}})
+    assert stream.book.best_bid() == (Decimal("1000"), Decimal("0.5"))
+    assert stream.sequence == 13
+
+
+def test_stale_updates_are_ignored(stream) -> None:
+    """Tests that updates which have already been applied are ignored"""
+    stream.handle_message({"sequence": "9", "delete_update": {"order_id": "B1"}})
+    assert stream.book.best_bid() == (Decimal("1000"), Decimal("3"))
+
+
+def test_sequence_gap_raises(stream) -> None:
+    """Tests that a missing update raises and discards local state"""
+    with pytest.raises(SequenceGapException):
+        stream.handle_message({"sequence": "12"})
+
+    assert not stream.synced
+    assert stream.book.best_bid() is None
+
+
+def test_asyncio_client(server) -> None:
+    """Tests the asyncio stream client against the fake server"""
+
+    async def run():
+        client = LunoAsyncioStreamClient("XBTZAR", "api_key", "secret", uri=server.uri)
+        task = asyncio.ensure_future(client.run())
+        await asyncio.wait_for(client.wait_synced(), 5)
+
+        order_id = await asyncio.get_event_loop().run_in_executor(
+            None, server.create_order, "XBTZAR", "BID", "1050", "0.1"
+        )
+        await _wait(lambda: order_id in client.orders)
+        assert client.book.best_bid() == (Decimal("1050"), Decimal("0.1"))
+
+        await asyncio.get_event_loop().run_in_executor(
+            None, server.skip_sequence, "XBTZAR"
+        )
+        await _wait(lambda: client.resyncs == 1 and client.synced)
+        assert client.book.best_bid() == (Decimal("1050"), Decimal("0.1"))
+
+        await client.stop()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(run())
+    assert server.credentials[0] == {
+        "api_key_id": "api_key",
+        "api_key_secret": "secret",
+    }
+
+
+@pytest_twisted.inlineCallbacks
+def test_twisted_client(server) -> None:
+    """Tests the twisted stream client against the fake server"""
+    client = LunoAsyncStreamClient("XBTZAR", "api_key", "secret", uri=server.uri)
+    book = yield client.start()
+    assert book.best_ask() == (Decimal("1100"), Decimal("2"))
+
+    order_id = server.create_order("XBTZAR", "ASK", "1090", "1")
+    yield _twisted_wait(lambda: order_id in client.orders)
+    assert client.book.best_ask() == (Decimal("1090"), Decimal("1"))
+
+    server.trade("XBTZAR", order_id, "0.25", "272.5")
+    yield _twisted_wait(lambda: client.book.best_ask()[1] == Decimal("0.75"))
+
+    server.skip_sequence("XBTZAR")
+    yield _twisted_wait(lambda: client.resyncs == 1 and client.synced)
+    assert client.book.best_ask() == (Decimal("1090"), Decimal("0.75"))
+
+    client.stop()
+
+
+async def _wait(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the stream"
+        await asyncio.sleep(0.01)
+
+
+@inlineCallbacks
+def _twisted_wait(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the stream"
+        yield deferLater(reactor, 0.01, lambda: None)
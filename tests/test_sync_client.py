@@ -1,21 +1,18 @@
 import pytest
 
+from decimal import Decimal
+
+from helpers import Response
 from luno.clients.sync import LunoSyncClient
 from luno.exceptions import UnauthorisedResourceException
-
-
-class Response:
-    def raise_for_status(self) -> None:
-        pass
-    
-    def json(self):
-        return {}
+from luno.models import Trade
+from luno.orderbook import ColumnarOrderBook
 
 
 @pytest.fixture
 def response():
     """Provides a response object as a fixture"""
-    return Response()
+    return Response({})
 
 
 @pytest.fixture
@@ -66,6 +63,19 @@ def test_order_book(mocker, response, client) -> None:
     assert data == response, message
 
 
+def test_order_book_columnar(mocker, response, client) -> None:
+    """Test that the order_book method of the sync client returns a columnar book"""
+    response.data = {'bids': [{'price': '100.00', 'volume': '1.5'}], 'asks': []}
+
+    mocker.patch('requests.Session.request', return_value=response)
+    book = client.order_book(pair='XBTZAR', columnar=True)
+
+    message = f"expected a columnar book, received {book}"
+    assert isinstance(book, ColumnarOrderBook), message
+    assert book.pair == 'XBTZAR'
+    assert book.best_bid() == (100.0, 1.5)
+
+
 def test_trades(mocker, response, client) -> None:
     """Test the test_trades method of the sync client"""
     url = f'{LunoSyncClient.BASE_URI}trades'
@@ -78,6 +88,19 @@ def test_trades(mocker, response, client) -> None:
     assert data == response, message
 
 
+def test_trades_typed(mocker, response) -> None:
+    """Test that the trades method of a typed sync client returns trade models"""
+    client = LunoSyncClient(typed=True)
+    response.data = {'trades': [{'timestamp': 1, 'price': '1.50', 'volume': '2', 'is_buy': True}]}
+
+    mocker.patch('requests.Session.request', return_value=response)
+    trades = client.trades(pair='XBTZAR')
+
+    message = f"expected a list of trades, received {trades}"
+    assert [trade.price for trade in trades] == [Decimal('1.50')], message
+    assert isinstance(trades[0], Trade)
+
+
 def test_private_resource_raises(mocker, response, client) -> None:
     """Tests that accessing a private resource raises the UnauthorisedResourceException
     exception when accessing it with an unathenticated client"""
@@ -380,3 +403,65 @@ def test_discard_quote(mocker, response, uclient) -> None:
     response = uclient.discard_quote(quote_id=1)    
     message = (f"expected response {data}, received {response}")
     assert data == response, message
+
+
+@pytest.fixture
+def server():
+    """Provides a local keep-alive http server which responds with an empty json object"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/api/1/'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_pool_configuration() -> None:
+    """Tests that the connection pool options are passed to the session adapter"""
+    client = LunoSyncClient(pool_connections=2, pool_maxsize=20, pool_block=True)
+
+    assert client.session.get_adapter('https://api.mybitx.com') is client.adapter
+    assert client.adapter._pool_maxsize == 20
+    assert client.adapter._pool_block is True
+
+
+def test_connection_stats(server) -> None:
+    """Tests that connections are reused across requests"""
+    client = LunoSyncClient()
+    client.BASE_URI = server
+
+    for _ in range(3):
+        client.ticker(pair='XBTZAR')
+
+    stats = client.connection_stats()
+    message = f"expected a single connection to be reused, received {stats}"
+    assert stats == {'requests': 3, 'opened': 1, 'reused': 2}, message
+
+
+def test_connection_stats_without_keep_alive(server) -> None:
+    """Tests that a connection is opened per request when keep alive is disabled"""
+    client = LunoSyncClient(keep_alive=False)
+    client.BASE_URI = server
+
+    for _ in range(2):
+        client.ticker(pair='XBTZAR')
+
+    stats = client.connection_stats()
+    message = f"expected a connection per request, received {stats}"
+    assert stats == {'requests': 2, 'opened': 2, 'reused': 0}, message
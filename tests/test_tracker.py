@@ -0,0 +1,248 @@
+import asyncio
+
+import pytest
+import pytest_twisted
+
+from decimal import Decimal
+from helpers import TwistedResponse
+from luno.clients.asynchronous import LunoAsyncClient
+from luno.clients.sync import LunoSyncClient
+from luno.testing.exchange import FakeExchange
+from luno.tracker import CANCELLED
+from luno.tracker import FILL
+from luno.tracker import FILLED
+from luno.tracker import NEW
+from luno.tracker import OrderTracker
+
+
+def order(order_id: str, base: str = "0", volume: str = "1") -> dict:
+    return {
+        "order_id": order_id,
+        "pair": "XBTZAR",
+        "type": "BID",
+        "state": "PENDING",
+        "limit_price": "100",
+        "limit_volume": volume,
+        "base": base,
+        "counter": str(Decimal(base) * 100),
+        "creation_timestamp": 1000,
+    }
+
+
+def kinds(events) -> list:
+    return [(event.kind, event.order_id) for event in events]
+
+
+def test_update_and_resolve() -> None:
+    """Tests that listings are diffed into new and fill events and departures resolved"""
+    received = []
+    tracker = OrderTracker(observers=[received.append])
+
+    events = tracker.update({"orders": [order("1"), order("2")]})
+    assert kinds(events) == [(NEW, "1"), (NEW, "2")]
+    assert tracker.trade_queries() == []
+
+    events = tracker.update({"orders": [order("1", base="0.25")]})
+    assert kinds(events) == [(FILL, "1")]
+    assert events[0].base == Decimal("0.25")
+    assert events[0].counter == Decimal("25")
+    assert tracker.trade_queries() == [{"pair": "XBTZAR", "since": 1000}]
+
+    trades = {"trades": [{"order_id": "2", "base": "0.5", "counter": "50"}]}
+    assert tracker.resolve("XBTZAR", trades) == []
+    assert tracker.trade_queries() == []
+    assert tracker.order_queries() == ["2"]
+
+    response = dict(order("2", base="0.5"), state="COMPLETE")
+    assert kinds(tracker.confirm(response)) == [(CANCELLED, "2")]
+    assert tracker.order_queries() == []
+
+    tracker.update({"orders": []})
+    trades = {"trades": [{"order_id": "1", "base": "1", "counter": "100"}]}
+    events = tracker.resolve("XBTZAR", trades)
+    assert kinds(events) == [(FILLED, "1")]
+    assert events[0].base == Decimal("0.75")
+
+    assert len(received) == 5
+    assert tracker.open_orders() == []
+
+
+def test_resolve_pages_trades() -> None:
+    """Tests that full pages of trades are paged through until the orders are accounted for"""
+    tracker = OrderTracker()
+    tracker.update({"orders": [order("1"), order("2")]})
+    tracker.update({"orders": []})
+
+    other = [
+        {
+            "order_id": "x",
+            "sequence": i,
+            "timestamp": 1000 + i,
+            "base": "1",
+            "counter": "100",
+        }
+        for i in range(100)
+    ]
+    assert tracker.resolve("XBTZAR", {"trades": other}) == []
+    assert tracker.trade_queries() == [{"pair": "XBTZAR", "since": 1099}]
+
+    trades = other[-1:] + [
+        {
+            "order_id": "1",
+            "sequence": 100,
+            "timestamp": 1100,
+            "base": "1",
+            "counter": "100",
+        }
+    ]
+    assert kinds(tracker.resolve("XBTZAR", {"trades": trades})) == [(FILLED, "1")]
+    assert tracker.trade_queries() == []
+    assert tracker.order_queries() == ["2"]
+
+
+def test_confirm_still_pending() -> None:
+    """Tests that an order get_order() reports as pending is tracked again"""
+    tracker = OrderTracker()
+    tracker.update({"orders": [order("1")]})
+    tracker.update({"orders": []})
+    tracker.resolve("XBTZAR", {"trades": []})
+
+    assert tracker.confirm(order("1")) == []
+    assert [tracked.order_id for tracked in tracker.open_orders()] == ["1"]
+
+
+def test_adaptive_delay(clock) -> None:
+    """Tests that refreshes are fast after a change and slow while orders rest"""
+    tracker = OrderTracker(fast=0.5, slow=5.0, settle=10.0, clock=clock)
+    assert tracker.delay() == 5.0
+
+    tracker.track("1", "XBTZAR")
+    assert tracker.delay() == 0.5
+
+    clock.now = 9.0
+    tracker.update({"orders": [order("1")]})
+    clock.now = 18.0
+    assert tracker.delay() == 0.5
+
+    clock.now = 19.5
+    tracker.update({"orders": [order("1")]})
+    assert tracker.delay() == 5.0
+
+
+def test_sync_refresh_orders(exchange) -> None:
+    """Tests that the sync client reports fills and cancels with constant requests"""
+    client = LunoSyncClient("key", "secret", base_uri=exchange.uri)
+    tracker = OrderTracker()
+    placed = [
+        client.post_limit_order("XBTZAR", "BID", "0.1", str(90000 + i))["order_id"]
+        for i in range(20)
+    ]
+    for order_id in placed:
+        tracker.track(order_id, "XBTZAR")
+
+    assert [event.kind for event in client.refresh_orders(tracker)] == [NEW] * 20
+
+    exchange.fill(placed[0], "0.04")
+    exchange.fill(placed[1])
+    client.cancel_order(placed[2])
+    exchange.requests.clear()
+
+    events = client.refresh_orders(tracker)
+
+    message = f"expected a fill, a filled and a cancelled event, received {events}"
+    assert kinds(events) == [
+        (FILL, placed[0]),
+        (FILLED, placed[1]),
+        (CANCELLED, placed[2]),
+    ], message
+    assert exchange.requests == {"listorders": 1, "listtrades": 1, "orders": 1}
+    assert len(tracker.open_orders()) == 18
+
+    exchange.requests.clear()
+    assert client.refresh_orders(tracker) == []
+    assert exchange.requests == {"listorders": 1}
+
+
+def test_sync_market_order_filled_before_listing(exchange) -> None:
+    """Tests that an order which fills before it is ever listed is reported as filled"""
+    client = LunoSyncClient("key", "secret", base_uri=exchange.uri)
+    tracker = OrderTracker()
+    response = client.post_market_order("XBTZAR", "BUY", counter_volume="1000")
+    tracker.track(response["order_id"], "XBTZAR")
+
+    events = client.refresh_orders(tracker)
+
+    assert kinds(events) == [(FILLED, response["order_id"])]
+    assert events[0].base == Decimal("0.01")
+
+
+def test_sync_resolve_past_first_page(exchange) -> None:
+    """Tests that an order filled after more than a page of other trades is reported as filled"""
+    client = LunoSyncClient("key", "secret", base_uri=exchange.uri)
+    tracker = OrderTracker()
+    tracked = client.post_limit_order("XBTZAR", "BID", "0.1", "90000")["order_id"]
+    tracker.track(tracked, "XBTZAR")
+    client.refresh_orders(tracker)
+
+    for _ in range(120):
+        exchange.fill(
+            client.post_limit_order("XBTZAR", "ASK", "0.01", "95000")["order_id"]
+        )
+
+    exchange.fill(tracked)
+    exchange.requests.clear()
+
+    events = client.refresh_orders(tracker)
+
+    assert [(event.kind, event.order_id) for event in events] == [(FILLED, tracked)]
+    assert events[0].base == Decimal("0.1")
+    assert exchange.requests["listtrades"] == 2
+    assert "orders" not in exchange.requests
+
+
+def test_aio_watch_orders(exchange) -> None:
+    """Tests that the asyncio client watches the tracker on its schedule"""
+    pytest.importorskip("aiohttp")
+    from luno.clients.aio import LunoAsyncioClient
+
+    async def main():
+        async with LunoAsyncioClient("key", "secret", base_uri=exchange.uri) as client:
+            tracker = OrderTracker(fast=0.01)
+            placed = await client.post_limit_order("XBTZAR", "ASK", "0.1", "200000")
+            tracker.track(placed["order_id"], "XBTZAR")
+
+            events = []
+            watch = client.watch_orders(tracker)
+            async for event in watch:
+                events.append(event.kind)
+                if event.kind == NEW:
+                    exchange.fill(placed["order_id"])
+                else:
+                    break
+
+            await watch.aclose()
+            return events
+
+    assert asyncio.run(main()) == [NEW, FILLED]
+
+
+@pytest_twisted.inlineCallbacks
+def test_async_refresh_orders(mocker) -> None:
+    """Tests that the twisted client refreshes the tracker"""
+    client = LunoAsyncClient("key", "secret")
+    tracker = OrderTracker()
+    tracker.update({"orders": [order("1"), order("2")]})
+    request = mocker.patch(
+        "treq.request",
+        side_effect=[
+            TwistedResponse({"orders": [order("1")]}),
+            TwistedResponse({"trades": []}),
+            TwistedResponse(dict(order("2"), state="COMPLETE")),
+        ],
+    )
+
+    events = yield client.refresh_orders(tracker)
+
+    assert kinds(events) == [(CANCELLED, "2")]
+    assert request.call_args_list[1][1]["params"] == {"pair": "XBTZAR", "since": 1000}
+    assert request.call_args_list[2][0][1].endswith("orders/2")